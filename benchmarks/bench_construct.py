@@ -0,0 +1,89 @@
+__doc__ = """Benchmarks construction of many ``touketsu`` decorated instances.
+
+Compares building instances one at a time through :meth:`__init__`, either
+written by hand or generated with ``init = True``, with the bulk
+``from_columns`` and ``from_records`` class methods added by
+:func:`~touketsu.core.class_decorator_factory`. Run from the repository root
+with ``python benchmarks/bench_construct.py [n_instances]``.
+"""
+
+from array import array
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable
+
+
+@immutable
+class tick:
+    """Immutable market record.
+
+    :param venue: Venue identifier
+    :param price: Traded price
+    :param size: Traded size
+    """
+    def __init__(self, venue, price, size):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+
+@immutable(slots = True)
+class slotted_tick:
+    """Slotted version of :class:`tick`.
+
+    :param venue: Venue identifier
+    :param price: Traded price
+    :param size: Traded size
+    """
+    def __init__(self, venue, price, size):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+
+@immutable(init = True)
+class init_tick:
+    """Version of :class:`tick` with a generated :meth:`__init__`.
+
+    :param venue: Venue identifier
+    :param price: Traded price
+    :param size: Traded size
+    """
+    venue: int
+    price: float
+    size: int
+
+
+def main(n = 100000, repeat = 5):
+    """Run the benchmark and print the best time per instance.
+
+    :param n: Number of instances built per timing run
+    :type n: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    venues = [i % 16 for i in range(n)]
+    prices = array("d", (100 + i * 0.01 for i in range(n)))
+    sizes = array("q", range(n))
+    records = list(zip(venues, prices, sizes))
+    print(f"{'case':<34}{'per instance (ns)':>18}")
+    for cls in (tick, slotted_tick, init_tick):
+        env = {"cls": cls, "records": records, "venues": venues,
+               "prices": prices, "sizes": sizes}
+        stmts = [("__init__", "[cls(*rec) for rec in records]"),
+                 ("from_records", "cls.from_records(records)"),
+                 ("from_columns", "cls.from_columns(venue = venues, "
+                  "price = prices, size = sizes)")]
+        for name, stmt in stmts:
+            best = min(timeit.repeat(stmt, globals = env, number = 1,
+                                     repeat = repeat))
+            label = f"{cls.__name__}.{name}"
+            print(f"{label:<34}{best / n * 1e9:>18.1f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,88 @@
+__doc__ = """Benchmarks construction of instances of deep decorated hierarchies.
+
+Builds chains of classes whose :meth:`__init__` calls ``super().__init__()``
+and sets one attribute, and reports the time per construction of an
+undecorated chain, of a chain where only the most derived class is decorated
+with :func:`~touketsu.core.immutable`, and of a chain where every level is.
+Only the outermost decorated :meth:`__init__` lifts and reapplies the
+restriction, while nested ones forward their arguments to the original
+:meth:`__init__` after one check, so the last column, the cost of the nested
+decorated :meth:`__init__` calls per extra level, should stay small. The rest
+of the overhead, which also grows with the depth, is that of one write per
+level through the restricted :meth:`__setattr__`, see ``bench_setattr.py``.
+Run from the repository root with ``python benchmarks/bench_inherit.py``.
+"""
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable
+
+
+def _level(base, i):
+    """Return a subclass of ``base`` whose :meth:`__init__` sets ``f{i}``.
+
+    :param base: Base class
+    :type base: type
+    :param i: Level of the class
+    :type i: int
+    :rtype: type
+    """
+    name = f"f{i}"
+
+    class level(base):
+        def __init__(self):
+            super().__init__()
+            setattr(self, name, i)
+
+    return level
+
+
+def _chain(depth, decorator = None, leaf_only = False):
+    """Return the most derived class of a chain of ``depth`` classes.
+
+    :param depth: Number of classes in the chain
+    :type depth: int
+    :param decorator: Class decorator applied to each level, if any
+    :type decorator: function, optional
+    :param leaf_only: ``True`` to only decorate the most derived class,
+        default ``False``
+    :type leaf_only: bool, optional
+    :rtype: type
+    """
+    cls = object
+    for i in range(depth):
+        cls = _level(cls, i)
+        if (decorator is not None) and \
+            ((not leaf_only) or (i == depth - 1)):
+            cls = decorator(cls)
+    return cls
+
+
+def main(number = 200000, repeat = 5):
+    """Run the benchmarks and print the best time per construction.
+
+    :param number: Number of constructions per timing run
+    :type number: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    print(f"{'depth':<8}{'plain (ns)':>12}{'leaf (ns)':>12}{'all (ns)':>12}"
+          f"{'nested per level (ns)':>24}")
+    for depth in range(1, 7):
+        times = []
+        for decorator, leaf_only in ((None, False), (immutable, True),
+                                     (immutable, False)):
+            cls = _chain(depth, decorator, leaf_only)
+            best = min(timeit.repeat(cls, number = number, repeat = repeat))
+            times.append(best / number * 1e9)
+        nested = (times[2] - times[1]) / (depth - 1) if depth > 1 else 0.
+        print(f"{depth:<8}{times[0]:>12.1f}{times[1]:>12.1f}{times[2]:>12.1f}"
+              f"{nested:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
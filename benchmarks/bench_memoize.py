@@ -0,0 +1,66 @@
+__doc__ = """Benchmarks caching functions of ``touketsu`` immutable instances.
+
+Compares cache hits of :func:`~touketsu.cache.memoize` against
+:func:`functools.lru_cache` for a function of two immutable instances, with
+``eq = True`` so that :func:`functools.lru_cache` can hash them. Run from the
+repository root with ``python benchmarks/bench_memoize.py``.
+"""
+
+from functools import lru_cache
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable, memoize
+
+
+@immutable(eq = True, slots = True)
+class params:
+    """Pricing parameters.
+
+    :param rate: Interest rate
+    :param vol: Volatility
+    :param tenors: Tenors in years
+    """
+    def __init__(self, rate = 0.03, vol = 0.2, tenors = (0.25, 0.5, 1., 2.)):
+        self.rate = rate
+        self.vol = vol
+        self.tenors = tenors
+
+
+def price(model, market, strike = 100.):
+    """Return a made-up price.
+
+    :param model: Model parameters
+    :type model: :class:`params`
+    :param market: Market parameters
+    :type market: :class:`params`
+    :param strike: Strike price
+    :type strike: float, optional
+    """
+    return strike * (model.rate + market.vol) * sum(market.tenors)
+
+
+def main(number = 200000, repeat = 5):
+    """Run the benchmarks and print the best times per call.
+
+    :param number: Number of calls per timing run
+    :type number: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    model, market = params(), params(vol = 0.25)
+    print(f"{'cache':<12}{'hit (ns)':>10}")
+    for name, cache in (("lru_cache", lru_cache(maxsize = None)),
+                        ("memoize", memoize)):
+        func = cache(price)
+        func(model, market)
+        best = min(timeit.repeat(lambda: func(model, market), number = number,
+                                 repeat = repeat))
+        print(f"{name:<12}{best / number * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
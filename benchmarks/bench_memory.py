@@ -0,0 +1,70 @@
+__doc__ = """Benchmarks the memory used by instances of ``touketsu`` classes.
+
+Allocates many instances of the same small record class decorated in different
+ways and reports the memory traced by :mod:`tracemalloc` per instance. The
+``legacy`` case stores the ``touketsu`` restriction in each instance's
+``__dict__``, as the decorator originally did. Run from the repository root
+with ``python benchmarks/bench_memory.py [n_instances]``.
+"""
+
+import gc
+import os.path
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable
+from legacy import generic_decorator
+
+
+class record:
+    "Undecorated baseline class."
+    def __init__(self, a = 0, b = 0.0, c = ""):
+        self.a = a
+        self.b = b
+        self.c = c
+
+
+def _make(decorator):
+    "Return a decorated copy of :class:`record`, with its own ``__init__``."
+    return decorator(type("record", (), {"__init__": record.__init__}))
+
+
+def traced_bytes(cls, n):
+    """Return bytes traced while holding ``n`` instances of ``cls``.
+
+    :param cls: Class to instantiate with no arguments.
+    :type cls: type
+    :param n: Number of instances
+    :type n: int
+    :rtype: int
+    """
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objs = [cls() for _ in range(n)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return end - start
+
+
+def main(n = 1000000):
+    """Run the benchmark and print total and per instance memory.
+
+    :param n: Number of instances per case, default ``1000000``.
+    :type n: int, optional
+    """
+    cases = [("plain", record),
+             ("legacy immutable", _make(generic_decorator("immutable"))),
+             ("touketsu immutable", _make(immutable)),
+             ("touketsu immutable slots", _make(immutable(slots = True)))]
+    print(f"{'case':<28}{'total (MiB)':>14}{'per instance (B)':>18}")
+    for name, cls in cases:
+        total = traced_bytes(cls, n)
+        print(f"{name:<28}{total / 2 ** 20:>14.1f}{total / n:>18.1f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
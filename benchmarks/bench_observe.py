@@ -0,0 +1,81 @@
+__doc__ = """Benchmarks change notifications of ``touketsu`` instances.
+
+Times updating the two fields of a nondynamic instance of a class without
+``observable``, of an observable class without subscribers, and of an
+observable class with one callback subscriber, whose writes are either
+delivered one at a time or coalesced by a method decorated with
+:func:`~touketsu.core.urt_method`. Reports the time per update and the number
+of notifications per update. Run from the repository root with
+``python benchmarks/bench_observe.py``.
+"""
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import nondynamic, subscribe, urt_method
+
+
+class quote:
+    """Quote with a method updating both prices.
+
+    :param bid: Bid price
+    :param ask: Ask price
+    """
+    def __init__(self, bid = 100., ask = 100.5):
+        self.bid = bid
+        self.ask = ask
+
+    @urt_method
+    def update(self, bid, ask):
+        """Update both prices.
+
+        :param bid: Bid price
+        :param ask: Ask price
+        """
+        self.bid = bid
+        self.ask = ask
+
+
+def _writes(obj):
+    """Update both prices of ``obj`` with plain writes.
+
+    :param obj: :class:`quote` instance
+    :type obj: object
+    """
+    obj.bid = 100.
+    obj.ask = 100.5
+
+
+def main(number = 200000, repeat = 5):
+    """Run the benchmarks and print the best time per update.
+
+    :param number: Number of updates per timing run
+    :type number: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    plain = nondynamic(type("quote", (quote,), {}))
+    observed = nondynamic(observable = True)(type("quote", (quote,), {}))
+    events = []
+    cases = [("nondynamic", plain, _writes, False),
+             ("observable", observed, _writes, False),
+             ("subscribed, writes", observed, _writes, True),
+             ("subscribed, urt_method", observed,
+              lambda obj: obj.update(100., 100.5), True)]
+    print(f"{'case':<24}{'update (ns)':>14}{'notifications':>15}")
+    for name, cls, update, subscribed in cases:
+        obj = cls()
+        sub = subscribe(cls, events.append) if subscribed else None
+        best = min(timeit.repeat(lambda: update(obj), number = number,
+                                 repeat = repeat))
+        if sub is not None: sub.cancel()
+        per_update = len(events) / number / repeat
+        events.clear()
+        print(f"{name:<24}{best / number * 1e9:>14.1f}{per_update:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
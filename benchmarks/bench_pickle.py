@@ -0,0 +1,80 @@
+__doc__ = """Benchmarks pickling of many ``touketsu`` decorated instances.
+
+Compares the ``__reduce_ex__`` generated by
+:func:`~touketsu.core.class_decorator_factory` with the default pickling of an
+undecorated class, reporting the time per instance to pickle and unpickle a
+list of instances and the pickled size per instance. Also times sending a large
+:class:`bytes` value with protocol 5 in-band and out-of-band. Run from the
+repository root with ``python benchmarks/bench_pickle.py [n_instances]``.
+"""
+
+import os.path
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable
+from bench_construct import slotted_tick, tick
+
+
+class plain_tick:
+    """Undecorated baseline version of :class:`bench_construct.tick`.
+
+    :param venue: Venue identifier
+    :param price: Traded price
+    :param size: Traded size
+    """
+    def __init__(self, venue, price, size):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+
+@immutable
+class frame:
+    """Immutable record holding a large binary payload.
+
+    :param name: Frame name
+    :param payload: Frame data
+    """
+    def __init__(self, name, payload):
+        self.name = name
+        self.payload = payload
+
+
+def main(n = 100000, repeat = 5):
+    """Run the benchmarks and print the best times.
+
+    :param n: Number of instances pickled per timing run
+    :type n: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    print(f"{'case':<24}{'dumps (ns)':>12}{'loads (ns)':>12}{'bytes':>8}")
+    for cls in (plain_tick, tick, slotted_tick):
+        objs = [cls(i % 16, 100 + i * 0.01, i) for i in range(n)]
+        data = pickle.dumps(objs, 5)
+        env = {"pickle": pickle, "objs": objs, "data": data}
+        dumps = min(timeit.repeat("pickle.dumps(objs, 5)", globals = env,
+                                  number = 1, repeat = repeat))
+        loads = min(timeit.repeat("pickle.loads(data)", globals = env,
+                                  number = 1, repeat = repeat))
+        print(f"{cls.__name__:<24}{dumps / n * 1e9:>12.1f}"
+              f"{loads / n * 1e9:>12.1f}{len(data) / n:>8.1f}")
+    # 64 MiB payload, pickled in-band or handed over as a buffer
+    obj = frame("frame", bytes(1 << 26))
+    env = {"pickle": pickle, "obj": obj}
+    stmts = [("in-band", "pickle.loads(pickle.dumps(obj, 5))"),
+             ("out-of-band", "buffers = []; pickle.loads(pickle.dumps(obj, 5, "
+              "buffer_callback = buffers.append), buffers = buffers)")]
+    print(f"\n{'64 MiB payload':<24}{'round trip (ms)':>16}")
+    for name, stmt in stmts:
+        best = min(timeit.repeat(stmt, globals = env, number = 1,
+                                 repeat = repeat))
+        print(f"{name:<24}{best * 1e3:>16.2f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
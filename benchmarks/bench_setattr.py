@@ -0,0 +1,79 @@
+__doc__ = """Benchmarks the restricted ``__setattr__`` of ``touketsu`` classes.
+
+Compares the specialized ``__setattr__`` produced by
+:func:`~touketsu.core.class_decorator_factory` against the generic
+``__setattr__`` that compared the instance restriction against the strings
+``"immutable"`` and ``"nondynamic"`` on every assignment, and classes
+decorated with restrictions turned off by :func:`~touketsu.core.configure`
+or with ``track_changes``, whose instances record updates after a
+:func:`~touketsu.core.checkpoint`. Plain :meth:`object.__setattr__` is shown
+as a baseline. Run from the repository root with
+``python benchmarks/bench_setattr.py``.
+"""
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import checkpoint, configure, immutable, nondynamic
+from legacy import generic_decorator
+
+
+class plain_state:
+    "Undecorated baseline class."
+    def __init__(self, a = 0, b = 0, c = 0):
+        self.a = a
+        self.b = b
+        self.c = c
+
+
+def _make(decorator, mode = "enforce"):
+    """Return a decorated copy of :class:`plain_state`.
+
+    :param decorator: Class decorator
+    :type decorator: function
+    :param mode: Mode passed to :func:`~touketsu.core.configure` while
+        decorating
+    :type mode: str, optional
+    """
+    settings = configure()
+    configure(mode = mode)
+    try: return decorator(type("state", (plain_state,), {}))
+    finally: configure(*settings)
+
+
+def main(number = 1000000, repeat = 5):
+    """Run the benchmarks and print the best time per operation.
+
+    :param number: Number of operations per timing run
+    :type number: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    cases = [("plain", plain_state),
+             ("generic nondynamic", _make(generic_decorator("nondynamic"))),
+             ("touketsu nondynamic", _make(nondynamic)),
+             ("generic immutable", _make(generic_decorator("immutable"))),
+             ("touketsu immutable", _make(immutable)),
+             ("touketsu nondynamic off", _make(nondynamic, "off")),
+             ("touketsu immutable off", _make(immutable, "off")),
+             ("touketsu tracked", _make(nondynamic(track_changes = True)))]
+    print(f"{'case':<24}{'update (ns)':>14}{'construct (ns)':>16}")
+    for name, cls in cases:
+        obj = cls()
+        if name.endswith("tracked"): checkpoint(obj)
+        # immutable instances can't be updated after __init__
+        update = float("nan")
+        if "immutable" not in name:
+            update = min(timeit.repeat("obj.a = 1", globals = {"obj": obj},
+                                       number = number, repeat = repeat))
+        construct = min(timeit.repeat("cls(1, 2, 3)", globals = {"cls": cls},
+                                      number = number, repeat = repeat))
+        print(f"{name:<24}{update / number * 1e9:>14.1f}"
+              f"{construct / number * 1e9:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+__doc__ = """Benchmarks sorting ``touketsu`` immutable instances.
+
+Compares sorting instances of a class with a hand-written :meth:`__lt__`
+against a class decorated with ``order``, sorted by its generated comparisons
+and by :func:`~touketsu.core.sort_key`, reporting the time per instance of a
+sort after the first, once sort keys are cached. Run from the repository root
+with ``python benchmarks/bench_sort.py``.
+"""
+
+import os.path
+from random import Random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import immutable, sort_key
+
+
+class trade:
+    """Trade ordered by venue, then price.
+
+    :param venue: Venue code
+    :param price: Trade price
+    :param size: Trade size
+    """
+    def __init__(self, venue = "XNYS", price = 100., size = 1):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+    def __lt__(self, other):
+        return (self.venue, self.price) < (other.venue, other.price)
+
+
+@immutable(eq = True, order = ("venue", "price"), slots = True)
+class ordered_trade:
+    """:class:`trade` with generated comparisons.
+
+    :param venue: Venue code
+    :param price: Trade price
+    :param size: Trade size
+    """
+    def __init__(self, venue = "XNYS", price = 100., size = 1):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+
+def main(n_objs = 100000, repeat = 5, seed = 7):
+    """Run the benchmarks and print the best times.
+
+    :param n_objs: Number of instances sorted
+    :type n_objs: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    :param seed: Seed of the random prices and venues
+    :type seed: int, optional
+    """
+    rng = Random(seed)
+    values = [(rng.choice(("XNYS", "XNAS", "ARCX")), rng.random(), 1)
+              for _ in range(n_objs)]
+    print(f"{'sort':<22}{'time (ns)':>12}")
+    for name, cls, key in (("hand-written __lt__", trade, None),
+                           ("order, __lt__", ordered_trade, None),
+                           ("order, sort_key", ordered_trade, sort_key)):
+        objs = [cls(*value) for value in values]
+        sorted(objs, key = key)
+        best = min(timeit.repeat(lambda: sorted(objs, key = key), number = 1,
+                                 repeat = repeat))
+        print(f"{name:<22}{best / n_objs * 1e9:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
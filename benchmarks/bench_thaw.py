@@ -0,0 +1,89 @@
+__doc__ = """Benchmarks lifting the restriction of one ``touketsu`` instance.
+
+Compares toggling the restriction of one instance with
+:func:`~touketsu.core.thaw` and :func:`~touketsu.core.freeze` against toggling
+its whole class with :func:`~touketsu.core.urt_class` and redecorating it,
+reporting the time per toggle and the time per method call on other instances
+of the class made between toggles. Changing the class invalidates CPython's
+per-type attribute cache and specialized attribute lookups, which slows down
+method calls on every instance. Run from the repository root with
+``python benchmarks/bench_thaw.py``.
+"""
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import freeze, immutable, thaw, urt_class
+
+
+class state:
+    """Quote state with a method called on the hot path.
+
+    :param bid: Bid price
+    :param ask: Ask price
+    """
+    def __init__(self, bid = 100., ask = 100.5):
+        self.bid = bid
+        self.ask = ask
+
+    def mid(self):
+        "Return the mid price."
+        return (self.bid + self.ask) / 2
+
+
+def _calls(objs, n_calls):
+    """Call :meth:`state.mid` on each instance ``n_calls`` times.
+
+    :param objs: :class:`state` instances
+    :type objs: list
+    :param n_calls: Number of calls per instance
+    :type n_calls: int
+    """
+    for _ in range(n_calls):
+        for obj in objs: obj.mid()
+
+
+def main(number = 20000, n_objs = 10, n_calls = 10, repeat = 5):
+    """Run the benchmarks and print the best times.
+
+    :param number: Number of toggles per timing run
+    :type number: int, optional
+    :param n_objs: Number of other instances whose method is called
+    :type n_objs: int, optional
+    :param n_calls: Number of calls per instance between toggles
+    :type n_calls: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    cls = immutable(type("state", (state,), {}))
+    target, objs = cls(), [cls() for _ in range(n_objs)]
+
+    def none():
+        pass
+
+    def instance():
+        freeze(thaw(target))
+
+    def whole_class():
+        immutable(urt_class(cls))
+
+    n_total = n_objs * n_calls
+    print(f"{'toggle':<14}{'toggle (ns)':>14}{'call (ns)':>12}")
+    for name, toggle in (("none", none), ("thaw/freeze", instance),
+                         ("urt_class", whole_class)):
+        toggles = min(timeit.repeat(toggle, number = number, repeat = repeat))
+
+        def run():
+            toggle()
+            _calls(objs, n_calls)
+
+        total = min(timeit.repeat(run, number = number, repeat = repeat))
+        print(f"{name:<14}{toggles / number * 1e9:>14.1f}"
+              f"{(total - toggles) / number / n_total * 1e9:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+__doc__ = """Benchmarks the per-call overhead of ``urt_method``.
+
+Compares the context-local :func:`~touketsu.core.urt_method` against the
+original implementation, which wrote the instance restriction twice with
+:meth:`object.__setattr__`, and against an undecorated method. Run from the
+repository root with ``python benchmarks/bench_urt_method.py``.
+"""
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from touketsu import nondynamic, urt_method
+from legacy import generic_decorator, legacy_urt_method
+
+
+def _make(decorator, method_decorator):
+    """Return a class with method ``touch`` decorated by ``method_decorator``.
+
+    :param decorator: Class decorator, or ``None`` for no decoration.
+    :type decorator: function
+    :param method_decorator: Method decorator, or ``None`` for no decoration.
+    :type method_decorator: function
+    :rtype: type
+    """
+    def __init__(self): self.count = 0
+
+    def touch(self): pass
+
+    if method_decorator is not None: touch = method_decorator(touch)
+    cls = type("state", (), {"__init__": __init__, "touch": touch})
+    if decorator is not None: cls = decorator(cls)
+    return cls
+
+
+def main(number = 1000000, repeat = 5):
+    """Run the benchmark and print the best time per call.
+
+    :param number: Number of calls per timing run
+    :type number: int, optional
+    :param repeat: Number of timing runs, best of which is reported
+    :type repeat: int, optional
+    """
+    cases = [("plain method", _make(None, None)),
+             ("legacy urt_method",
+              _make(generic_decorator("nondynamic"), legacy_urt_method)),
+             ("touketsu urt_method", _make(nondynamic, urt_method))]
+    print(f"{'case':<24}{'call (ns)':>12}")
+    for name, cls in cases:
+        obj = cls()
+        best = min(timeit.repeat("obj.touch()", globals = {"obj": obj},
+                                 number = number, repeat = repeat))
+        print(f"{name:<24}{best / number * 1e9:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+__doc__ = """Reference copy of the original ``touketsu`` class decorator.
+
+Used by the benchmarks to compare against the decorator from before the
+performance work. The decorated classes store the ``touketsu`` restriction in
+each instance's ``__dict__`` and check it with string comparisons in a generic
+``__setattr__``.
+"""
+
+from functools import wraps
+
+
+def generic_decorator(dectype):
+    """Return a class decorator using the old generic restricted setter.
+
+    :param dectype: ``"immutable"`` or ``"nondynamic"``
+    :type dectype: str
+    :rtype: function
+    """
+    def wrapper(cls):
+        cls._touketsu_restriction = None
+        _orig__setattr__ = cls.__setattr__
+
+        def _touketsu_restricted_setattr(self, key, value):
+            if self._touketsu_restriction == "immutable":
+                raise AttributeError("Immutable class instance")
+            elif (self._touketsu_restriction == "nondynamic") and \
+                (not hasattr(self, key)):
+                raise AttributeError("Nondynamic class instance")
+            _orig__setattr__(self, key, value)
+
+        def init_wrapper(init):
+            @wraps(init)
+            def _init_wrapper(self, *args, **kwargs):
+                init(self, *args, **kwargs)
+                self._touketsu_restriction = dectype
+
+            return _init_wrapper
+
+        cls.__setattr__ = _touketsu_restricted_setattr
+        cls.__init__ = init_wrapper(cls.__init__)
+        return cls
+
+    return wrapper
+
+
+def legacy_urt_method(meth):
+    """Return ``meth`` wrapped with the original :func:`urt_method` logic.
+
+    The restriction is lifted by writing ``None`` into the instance with
+    :meth:`object.__setattr__` and restored by a second write.
+
+    :param meth: An unbound instance method
+    :type meth: function
+    :rtype: function
+    """
+    @wraps(meth)
+    def meth_wrapper(obj, *args, **kwargs):
+        restriction = obj._touketsu_restriction
+        object.__setattr__(obj, "_touketsu_restriction", None)
+        try:
+            res = meth(obj, *args, **kwargs)
+            obj._touketsu_restriction = restriction
+            return res
+        except Exception as e:
+            obj._touketsu_restriction = restriction
+            raise e
+
+    return meth_wrapper
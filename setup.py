@@ -23,7 +23,6 @@ def _setup():
           packages = ["touketsu"],
           classifiers = ["License :: OSI Approved :: MIT License",
                          "Operating System :: OS Independent",
-                         "Programming Language :: Python :: 3.6",
                          "Programming Language :: Python :: 3.7",
                          "Programming Language :: Python :: 3.8"],
           license = "MIT",
@@ -31,7 +30,7 @@ def _setup():
               "Documentation":"https://touketsu.readthedocs.io/en/latest/",
               "Source": "https://github.com/phetdam/touketsu/"
           },
-          python_requires = ">=3.6"
+          python_requires = ">=3.7"
     )
 
 if __name__ == "__main__":
@@ -2,7 +2,18 @@ __doc__ = "``__init__.py`` for ``touketsu``."
 
 # make stuff from core available in top-level package namespace
 __all__ = ["class_decorator_factory", "urt_class", "urt_method", "orig_init",
-           "immutable", "nondynamic", "identity_immutable",
-           "identity_nondynamic"]
+           "immutable", "deep_immutable", "nondynamic", "identity_immutable",
+           "identity_nondynamic", "unrestricted", "batch_update", "intern_info",
+           "intern_clear", "evolve", "share", "attach", "shared_block",
+           "frozen_table", "dump", "load", "freeze", "thaw",
+           "is_frozen", "configure",
+           "cached_method", "lazy_attr", "memoize", "sort_key",
+           "checkpoint", "changed_fields", "subscribe", "subscription",
+           "batch", "change"]
 
-from .core import *
\ No newline at end of file
+from .core import *
+from .cache import cached_method, lazy_attr, memoize
+from .observe import batch, change, subscribe, subscription
+from .shared import attach, share, shared_block
+from .store import dump, load
+from .table import frozen_table
\ No newline at end of file
@@ -0,0 +1,319 @@
+__doc__ = """Caching of derived values of ``touketsu`` immutable instances.
+
+Since immutable instances never change, values computed from them can be cached
+per instance without invalidation. :func:`cached_method` and :class:`lazy_attr`
+keep their caches in tables outside the instances, keyed by instance id, so
+instances need no extra attributes and their restriction is never lifted.
+:func:`memoize` caches functions taking immutable instances by their identity.
+"""
+
+from collections import OrderedDict, namedtuple
+from functools import update_wrapper
+import weakref
+
+_CacheInfo = namedtuple("_CacheInfo", ("hits", "misses", "maxsize", "currsize"))
+
+_KWARGS_MARK = object()
+"Separates positional from keyword arguments in :func:`cached_method` keys."
+
+_VALUE_MARK = object()
+"Precedes arguments keyed by value in :func:`memoize` keys."
+
+
+class _entry_ref(weakref.ref):
+    """Weak reference to an instance holding its cached value or values.
+
+    The reference is stored under its ``key``, the instance's :func:`id`, in an
+    :class:`_instance_table`, and removes itself when the instance dies.
+    """
+    __slots__ = ("key", "value")
+
+
+class _instance_table:
+    """Table mapping live instances to values, keyed by instance id.
+
+    Entries are removed when their instance is collected, so ids of dead
+    instances are never looked up. Instances must be weak referenceable and
+    instances of an immutable decorated class.
+
+    :param owner: Name of the caching function or attribute, used in error
+        messages
+    :type owner: str
+    :param on_remove: Function called with the entry of a collected instance
+        after it is removed, default ``None``.
+    :type on_remove: function, optional
+    """
+    __slots__ = ("data", "owner", "_remove")
+
+    def __init__(self, owner, on_remove = None):
+        self.data = {}
+        self.owner = owner
+        data = self.data
+
+        def _remove(ref):
+            if data.get(ref.key) is not ref: return
+            del data[ref.key]
+            if on_remove is not None: on_remove(ref)
+
+        self._remove = _remove
+
+    def add(self, obj, value):
+        """Store ``value`` for ``obj`` and return the new entry.
+
+        :param obj: Instance of an immutable decorated class
+        :type obj: object
+        :param value: Value to store
+        :type value: object
+        :rtype: :class:`_entry_ref`
+        """
+        if getattr(type(obj), "_touketsu_restriction", None) != "immutable":
+            raise TypeError(f"{self.owner}: {type(obj).__name__} is not an "
+                            "immutable decorated class")
+        try: ref = _entry_ref(obj, self._remove)
+        except TypeError:
+            raise TypeError(f"{self.owner}: {type(obj).__name__} instances "
+                            "must support weak references") from None
+        ref.key = id(obj)
+        ref.value = value
+        self.data[ref.key] = ref
+        return ref
+
+
+def cached_method(func = None, maxsize = 128):
+    """Decorate a method of an immutable class to cache its results.
+
+    Results are cached separately for each instance, in a least recently used
+    cache of at most ``maxsize`` entries keyed by the method's arguments, which
+    must be hashable. As the instance cannot change, cached results never need
+    to be invalidated. The cache is kept outside the instance, so the method
+    needs no :func:`~touketsu.core.urt_method` and works on slotted classes.
+    Entries are dropped when their instance is collected.
+
+    .. code:: python
+
+       from touketsu import cached_method, immutable
+
+       @immutable
+       class curve:
+
+           def __init__(self, points):
+               self.points = points
+
+           @cached_method(maxsize = 1024)
+           def rate(self, tenor):
+               return interpolate(self.points, tenor)
+
+    The decorated method has a ``cache_info`` function returning a named tuple
+    of the hits, misses, and ``maxsize`` over all instances, and the current
+    number of cached results, and a ``cache_clear`` function that clears the
+    cache of one instance, or of all instances if called without arguments.
+
+    .. note::
+
+       Instances must be weak referenceable, which is the case for slotted
+       classes made by the ``slots`` option. Do not call cached methods on
+       thawed instances, as their results could change.
+
+    :param func: Method to decorate. If ``None``, a decorator is returned, so
+        both ``@cached_method`` and ``@cached_method(maxsize = 256)`` work.
+    :type func: function, optional
+    :param maxsize: Maximum number of cached results per instance, or ``None``
+        for no limit. Default ``128``.
+    :type maxsize: int, optional
+    :rtype: function
+    """
+    if func is None:
+        return lambda func: cached_method(func, maxsize = maxsize)
+    _fn = cached_method.__name__
+    if (maxsize is not None) and \
+        ((not isinstance(maxsize, int)) or (maxsize < 1)):
+        raise ValueError(f"{_fn}: maxsize must be a positive int or None")
+    table = _instance_table(func.__qualname__)
+    data = table.data
+    # [hits, misses]
+    stats = [0, 0]
+
+    def wrapper(self, *args, **kwargs):
+        key = args
+        if kwargs: key = key + (_KWARGS_MARK,) + tuple(kwargs.items())
+        ref = data.get(id(self))
+        if ref is None: ref = table.add(self, OrderedDict())
+        cache = ref.value
+        if key in cache:
+            stats[0] = stats[0] + 1
+            cache.move_to_end(key)
+            return cache[key]
+        stats[1] = stats[1] + 1
+        result = func(self, *args, **kwargs)
+        cache[key] = result
+        if (maxsize is not None) and (len(cache) > maxsize):
+            cache.popitem(last = False)
+        return result
+
+    def cache_info():
+        "Return the cache statistics of the method over all instances."
+        return _CacheInfo(stats[0], stats[1], maxsize,
+                          sum(len(ref.value) for ref in list(data.values())))
+
+    def cache_clear(obj = None):
+        """Clear the cached results of ``obj``, or of all instances.
+
+        Clearing all instances also resets the statistics.
+
+        :param obj: Instance whose results are cleared, default ``None``
+        :type obj: object, optional
+        """
+        if obj is not None:
+            data.pop(id(obj), None)
+            return
+        data.clear()
+        stats[:] = [0, 0]
+
+    update_wrapper(wrapper, func)
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+class lazy_attr:
+    """Read-only attribute of immutable instances computed on first access.
+
+    The decorated method is called once per instance, the first time the
+    attribute is read, and its result is returned on later reads. Like
+    :func:`cached_method`, the value is kept outside the instance, so the
+    instance stays restricted and need not have a ``__dict__``.
+
+    .. code:: python
+
+       from touketsu import immutable, lazy_attr
+
+       @immutable
+       class portfolio:
+
+           def __init__(self, positions):
+               self.positions = positions
+
+           @lazy_attr
+           def notional(self):
+               return sum(p.price * p.size for p in self.positions)
+
+    :param func: Method computing the value from the instance
+    :type func: function
+    """
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+        self._table = _instance_table(func.__qualname__)
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype = None):
+        if obj is None: return self
+        ref = self._table.data.get(id(obj))
+        if ref is not None: return ref.value
+        value = self.func(obj)
+        self._table.add(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        raise AttributeError(f"lazy attribute {self.name!r} is read-only")
+
+    def __delete__(self, obj):
+        raise AttributeError(f"lazy attribute {self.name!r} is read-only")
+
+
+def memoize(func = None, maxsize = None):
+    """Decorate a function to cache its results by the identity of arguments.
+
+    Arguments that are instances of immutable decorated classes are keyed by
+    their :func:`id`, which is cheap and safe as they cannot change, so they
+    need not be hashable, while other arguments must be hashable and are keyed
+    by value. Unlike :func:`functools.lru_cache`, the cache does not keep the
+    instances alive: results involving an instance are evicted when the
+    instance is collected.
+
+    .. code:: python
+
+       from touketsu import memoize
+
+       @memoize
+       def price(curve, option):
+           return expensive_model(curve, option)
+
+    As keys use identity, equal but distinct instances do not share results,
+    unless the class is interned. The decorated function has ``cache_info``
+    and ``cache_clear`` functions like those of :func:`cached_method`.
+
+    :param func: Function to decorate. If ``None``, a decorator is returned, so
+        both ``@memoize`` and ``@memoize(maxsize = 4096)`` work.
+    :type func: function, optional
+    :param maxsize: Maximum number of cached results, least recently used
+        first evicted, or ``None``, the default, for no limit.
+    :type maxsize: int, optional
+    :rtype: function
+    """
+    if func is None: return lambda func: memoize(func, maxsize = maxsize)
+    _fn = memoize.__name__
+    if (maxsize is not None) and \
+        ((not isinstance(maxsize, int)) or (maxsize < 1)):
+        raise ValueError(f"{_fn}: maxsize must be a positive int or None")
+    # cached results by key, as (result, ids of the instances in the key)
+    cache = OrderedDict()
+    # [hits, misses]
+    stats = [0, 0]
+
+    def _evict(ref):
+        for key in ref.value: cache.pop(key, None)
+
+    # the keys involving each live instance, evicted when it dies
+    table = _instance_table(func.__qualname__, on_remove = _evict)
+    data = table.data
+
+    def wrapper(*args, **kwargs):
+        values = (*args, *kwargs.values()) if kwargs else args
+        # ids of immutable instances stand alone and other values follow a
+        # mark, so the two cannot be confused
+        key, objs = [], []
+        for value in values:
+            if getattr(type(value), "_touketsu_restriction", None) == \
+                "immutable":
+                key.append(id(value))
+                objs.append(value)
+            else: key += (_VALUE_MARK, value)
+        if kwargs: key.append(tuple(kwargs))
+        key = tuple(key)
+        entry = cache.get(key)
+        if entry is not None:
+            stats[0] = stats[0] + 1
+            if maxsize is not None: cache.move_to_end(key)
+            return entry[0]
+        stats[1] = stats[1] + 1
+        result = func(*args, **kwargs)
+        for obj in objs:
+            ref = data.get(id(obj))
+            if ref is None: ref = table.add(obj, set())
+            ref.value.add(key)
+        cache[key] = (result, tuple(map(id, objs)))
+        if (maxsize is not None) and (len(cache) > maxsize):
+            old_key, (_, old_ids) = cache.popitem(last = False)
+            for key_id in old_ids:
+                ref = data.get(key_id)
+                if ref is not None: ref.value.discard(old_key)
+        return result
+
+    def cache_info():
+        "Return the cache statistics of the function."
+        return _CacheInfo(stats[0], stats[1], maxsize, len(cache))
+
+    def cache_clear():
+        "Clear the cached results and reset the statistics."
+        cache.clear()
+        data.clear()
+        stats[:] = [0, 0]
+
+    update_wrapper(wrapper, func)
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
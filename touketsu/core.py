@@ -4,110 +4,2235 @@ Contains the decorators and decorator factory that are the package's lifeblood.
 """
 
 from abc import ABCMeta
+from collections import namedtuple
+from collections.abc import Mapping
+from contextvars import ContextVar
 from copy import deepcopy
-from inspect import signature
+from inspect import (CO_VARARGS, CO_VARKEYWORDS, isasyncgenfunction,
+                     iscoroutinefunction, isgeneratorfunction, signature)
 from functools import wraps
+from itertools import chain
+from operator import attrgetter, itemgetter
+from keyword import iskeyword
+from threading import get_ident
+from types import MappingProxyType, MemberDescriptorType
+try: from pickle import PickleBuffer
+# pickle protocol 5 requires Python 3.8
+except ImportError: PickleBuffer = None
+import os
+import random
 import warnings
+import weakref
 
-from .utils import classdocmod
+from .utils import classdocmod, init_attr_names, slotted_copy
 
 # set up warnings
 warnings.simplefilter("always")
 
-def class_decorator_factory(dectype = None, docmod = None):
+class _unrestricted_ids(set):
+    """Set of instance ids held by :data:`_unrestricted`.
+
+    :param ids: Initial ids
+    :type ids: iterable, optional
+    :param thread: :func:`threading.get_ident` of the thread owning the set, or
+        ``None`` for the empty default
+    :type thread: int, optional
+    """
+    __slots__ = ("thread",)
+
+    def __init__(self, ids = (), thread = None):
+        super().__init__(ids)
+        self.thread = thread
+
+
+_unrestricted = ContextVar("_unrestricted", default = _unrestricted_ids())
+"""Ids of instances whose ``touketsu`` restriction is lifted in this context.
+
+Holds the :func:`id` of each instance that is being initialized or is executing
+a method decorated with :func:`urt_method` in the current thread or asyncio
+task. All other instances of decorated classes are restricted, so instances
+carry no per-instance restriction state, and other threads or tasks never see
+an instance unrestricted.
+
+Synchronous calls, i.e. :meth:`__init__` and plain methods, add and remove
+their id in place, which is cheaper than setting the variable, and is safe
+because no other task of the thread can run before they return, even if it
+shares the set through a copied context. Restrictions lifted across
+suspension points, e.g. by coroutine methods, set a copy with
+:func:`_unrestrict` instead. The set is only counted in the thread owning it,
+so that a context copied to another thread, e.g. by
+:func:`asyncio.to_thread`, never sees the writes of the original thread.
+"""
+
+_thawed = {}
+"""Instances whose ``touketsu`` restriction is lifted by :func:`thaw`.
+
+Maps the :func:`id` of each thawed instance to a weak reference to it, whose
+callback removes the entry when the instance is collected, or to the instance
+itself if it does not support weak references. Unlike :data:`_unrestricted`,
+the restriction of a thawed instance is lifted in all threads and tasks.
+"""
+
+_initialized = {}
+"""Instances of undecorated subclasses whose decorated :meth:`__init__` ran.
+
+An undecorated subclass overriding the :meth:`__init__` of a decorated class
+does not have a decorated :meth:`__init__` itself, so its instances are only
+restricted once its :meth:`__init__` calls the decorated one. Maps the
+:func:`id` of each such instance to a weak reference to it, whose callback
+removes the entry when the instance is collected. Instances that do not
+support weak references are not added and stay unrestricted.
+"""
+
+
+def _context_ids():
+    """Return the :data:`_unrestricted` set to update in place.
+
+    If the set of the current context is owned by another thread, or is the
+    default, it is replaced by an empty set owned by the current thread.
+
+    :rtype: :class:`_unrestricted_ids`
+    """
+    ids = _unrestricted.get()
+    thread = get_ident()
+    if ids.thread != thread:
+        ids = _unrestricted_ids((), thread)
+        _unrestricted.set(ids)
+    return ids
+
+
+def _in_context(key):
+    """Return ``True`` if the id ``key`` is unrestricted in the current context.
+
+    :param key: Instance id
+    :type key: int
+    :rtype: bool
+    """
+    ids = _unrestricted.get()
+    return (key in ids) and (ids.thread == get_ident())
+
+
+def _unrestrict(obj):
+    """Lift the restriction of ``obj`` in the current context.
+
+    Sets a copy of the :data:`_unrestricted` set, so that other tasks sharing
+    the set do not see ``obj`` unrestricted while the caller is suspended.
+
+    :param obj: Class instance
+    :type obj: object
+    :returns: Token to pass to :func:`_restrict`, or ``None`` if ``obj`` is
+        already unrestricted in the current context.
+    :rtype: :class:`contextvars.Token` or None
+    """
+    ids = _unrestricted.get()
+    key = id(obj)
+    thread = get_ident()
+    if ids.thread != thread: ids = ()
+    elif key in ids: return None
+    ids = _unrestricted_ids(ids, thread)
+    ids.add(key)
+    return _unrestricted.set(ids)
+
+
+def _restrict(token):
+    """Undo the matching :func:`_unrestrict` call.
+
+    :param token: Token returned by :func:`_unrestrict`
+    :type token: :class:`contextvars.Token` or None
+    :rtype: None
+    """
+    if token is None: return None
+    try: _unrestricted.reset(token)
+    # a coroutine closed by the garbage collector is finalized in whatever
+    # context is current, where the token is invalid and nothing needs undoing
+    except ValueError: pass
+
+
+def _is_restricted(obj):
+    """Return ``True`` if ``obj`` is a restricted instance of its class.
+
+    Instances are restricted once the decorated :meth:`__init__` of their class
+    returns, unless they are currently listed in :data:`_unrestricted` for the
+    current context or in :data:`_thawed`, and, if their class was decorated
+    in ``"sampled"`` mode, unless they are not sampled. If the class's
+    :meth:`__init__` is a decorated :meth:`__init__`, i.e. the class is
+    decorated or inherits its :meth:`__init__` from a decorated class, every
+    instance has completed it. Otherwise the class is an undecorated subclass
+    overriding :meth:`__init__`, and its instances are restricted if they are
+    listed in :data:`_initialized`, i.e. the overriding :meth:`__init__` called
+    the decorated one.
+
+    :param obj: Class instance
+    :type obj: object
+    :rtype: bool
+    """
+    key = id(obj)
+    if _in_context(key) or (key in _thawed): return False
+    if (not hasattr(type(obj).__init__, "_touketsu_orig__init__")) and \
+        (key not in _initialized):
+        return False
+    return _is_sampled(obj)
+
+
+def _mark_initialized(obj):
+    """Add ``obj`` to :data:`_initialized` if its class needs it.
+
+    Called when a decorated :meth:`__init__` returns for an instance of a
+    subclass. Only instances of undecorated subclasses that override
+    :meth:`__init__` are added.
+
+    :param obj: Initialized instance of a subclass of a decorated class
+    :type obj: object
+    :rtype: None
+    """
+    if hasattr(type(obj).__init__, "_touketsu_orig__init__"): return
+    key = id(obj)
+    try: ref = _thaw_ref(obj, _uninitialize)
+    # without weak references the entry could never be removed
+    except TypeError: return
+    ref.key = key
+    _initialized[key] = ref
+
+
+def _uninitialize(ref):
+    """Remove the entry of a collected instance from :data:`_initialized`.
+
+    :param ref: Weak reference to the collected instance
+    :type ref: :class:`_thaw_ref`
+    :rtype: None
+    """
+    if _initialized.get(ref.key) is ref: del _initialized[ref.key]
+
+
+class _state_ref(weakref.ref):
+    """Weak reference to an instance that knows its key in a
+    :class:`_side_table` and holds the instance's value."""
+    __slots__ = ("key", "value")
+
+
+class _side_table:
+    """Per-instance state used by ``touketsu`` itself, e.g. the cached hash.
+
+    Slotted classes made with the ``slots`` option have a slot named ``name``
+    for the state. Other instances keep it in the table instead of their
+    ``__dict__``, so that it never shows up in :func:`vars`, comparisons of
+    ``__dict__``, or serialized state. Like :data:`_thawed`, the table maps
+    instance ids to weak references whose callbacks remove the entries of
+    collected instances. The state of instances that are neither slotted nor
+    weak referenceable is not stored.
+
+    :param name: Name of the slot holding the state in slotted classes
+    :type name: str
+    """
+    __slots__ = ("name", "data", "_remove")
+
+    def __init__(self, name):
+        self.name = name
+        self.data = data = {}
+
+        # the entry is only removed if it still refers to the dead instance
+        def _remove(ref):
+            if data.get(ref.key) is ref: del data[ref.key]
+
+        self._remove = _remove
+
+    def get(self, obj):
+        """Return the state of ``obj``, or ``None`` if it has none.
+
+        :param obj: Class instance
+        :type obj: object
+        :rtype: object
+        """
+        # the table is looked up first, since hasattr is slow for missing
+        # names, and slotted instances never have entries in it
+        ref = self.data.get(id(obj))
+        if ref is not None: return ref.value
+        if hasattr(type(obj), self.name): return getattr(obj, self.name, None)
+        return None
+
+    def set(self, obj, value):
+        """Store the state of ``obj``.
+
+        :param obj: Class instance
+        :type obj: object
+        :param value: New state
+        :type value: object
+        :returns: ``False`` if the state cannot be stored, else ``True``
+        :rtype: bool
+        """
+        if hasattr(type(obj), self.name):
+            # views of shared or stored instances have no storage for slots
+            try: object.__setattr__(obj, self.name, value)
+            except AttributeError: return False
+            return True
+        try: ref = _state_ref(obj, self._remove)
+        except TypeError: return False
+        ref.key = id(obj)
+        ref.value = value
+        self.data[ref.key] = ref
+        return True
+
+    def update(self, obj, value):
+        """Store the state of ``obj``, reusing its table entry if it has one.
+
+        Cheaper than :meth:`set` for state that changes often, e.g. the bits of
+        :data:`_dirty`, since only the first write creates a weak reference.
+
+        :param obj: Class instance
+        :type obj: object
+        :param value: New state
+        :type value: object
+        :returns: ``False`` if the state cannot be stored, else ``True``
+        :rtype: bool
+        """
+        ref = self.data.get(id(obj))
+        if ref is None: return self.set(obj, value)
+        ref.value = value
+        return True
+
+    def discard(self, obj):
+        """Remove the state of ``obj``, if any.
+
+        :param obj: Class instance
+        :type obj: object
+        :rtype: None
+        """
+        if hasattr(type(obj), self.name):
+            try: object.__delattr__(obj, self.name)
+            except AttributeError: pass
+        else: self.data.pop(id(obj), None)
+
+
+_hashes = _side_table("_touketsu_hash")
+"Hashes cached by generated :meth:`__hash__` methods."
+
+_sort_keys = _side_table("_touketsu_sort_key")
+"Sort keys cached for classes decorated with ``order``."
+
+_dirty = _side_table("_touketsu_dirty")
+"""Bitsets of the attributes changed since the last :func:`checkpoint` of
+instances of classes decorated with ``track_changes``."""
+
+_PICKLE_BUFFER_MIN_SIZE = 4096
+"""Minimum size of :class:`bytes` and :class:`bytearray` values sent as
+:class:`pickle.PickleBuffer` instances, which may be pickled out-of-band."""
+
+_INTERN_MAXSIZE = 65536
+"Maximum size of the cache of an interned class created with ``interned=True``."
+
+_MODES = ("enforce", "sampled", "off")
+"Modes of :func:`configure`."
+
+_SAMPLE_MULTIPLIER = 0x9E3779B97F4A7C15
+"""Odd multiplier used to hash the ids of instances that cannot be weakly
+referenced, see :func:`_is_sampled`."""
+
+_samples = _side_table("_touketsu_sampled")
+"""Whether instances of classes decorated in ``"sampled"`` mode are
+sampled."""
+
+_sample_random = random.Random()
+"Source of the draws of :func:`_is_sampled`."
+
+_Settings = namedtuple("_Settings", ("mode", "sample_rate"))
+
+
+def _settings_from_env():
+    """Return the settings given by the environment.
+
+    The mode and sample rate are read from the ``TOUKETSU_MODE`` and
+    ``TOUKETSU_SAMPLE_RATE`` environment variables, see :func:`configure`.
+
+    :rtype: :class:`_Settings`
+    """
+    rate = os.environ.get("TOUKETSU_SAMPLE_RATE", "0.01")
+    try: sample_rate = float(rate)
+    except ValueError:
+        raise ValueError("touketsu: TOUKETSU_SAMPLE_RATE must be a number, "
+                         f"received {rate!r}") from None
+    return _check_settings(os.environ.get("TOUKETSU_MODE", "enforce"),
+                           sample_rate, "touketsu")
+
+
+def _check_settings(mode, sample_rate, _fn):
+    """Return validated settings.
+
+    :param mode: One of :data:`_MODES`
+    :type mode: str
+    :param sample_rate: Fraction of instances that are restricted in
+        ``"sampled"`` mode, between 0 and 1
+    :type sample_rate: float
+    :param _fn: Name of the caller, used in error messages
+    :type _fn: str
+    :rtype: :class:`_Settings`
+    """
+    if mode not in _MODES:
+        raise ValueError(f"{_fn}: mode must be one of {_MODES}, received "
+                         f"{mode!r}")
+    if not 0 <= sample_rate <= 1:
+        raise ValueError(f"{_fn}: sample_rate must be between 0 and 1")
+    return _Settings(mode, sample_rate)
+
+
+_settings = _settings_from_env()
+"Current :class:`_Settings`, read by decorators when they are applied."
+
+
+def configure(mode = None, sample_rate = None):
+    """Set how classes decorated from now on are restricted.
+
+    The mode is read once when a class is decorated, so it should be set
+    before modules defining decorated classes are imported. Classes that are
+    already decorated keep their mode. The initial settings are read from the
+    ``TOUKETSU_MODE`` and ``TOUKETSU_SAMPLE_RATE`` environment variables.
+
+    ``"enforce"``, the default, restricts all instances. ``"off"`` keeps the
+    class attributes and generated methods added by the decorators, e.g.
+    ``__slots__``, ``eq``, and ``interned``, but leaves the original
+    :meth:`__init__` and :meth:`__setattr__` in place, so instances are not
+    restricted and run at undecorated speed, and makes :func:`urt_method` return
+    methods unchanged. Containers of deeply immutable classes are not frozen and
+    fields are not learned from :meth:`__init__`. ``"sampled"`` restricts a
+    pseudo-random fraction ``sample_rate`` of the instances of each class,
+    drawn once per instance, and leaves the others
+    unrestricted, e.g. to catch some bugs in production without failing on
+    every instance. Sampling reduces enforcement, not overhead: writes still go
+    through the restricted :meth:`__setattr__`, which also checks whether the
+    instance is sampled, so only ``"off"`` runs at undecorated speed.
+
+    .. code:: python
+
+       import touketsu
+
+       touketsu.configure(mode = "off")
+       import app.models
+
+    :param mode: ``"enforce"``, ``"sampled"``, or ``"off"``. If ``None``, the
+        mode is unchanged.
+    :type mode: str, optional
+    :param sample_rate: Fraction of instances restricted in ``"sampled"``
+        mode, between 0 and 1. If ``None``, the rate is unchanged. The default
+        rate is ``0.01``.
+    :type sample_rate: float, optional
+    :returns: Named tuple of the new ``mode`` and ``sample_rate``
+    :rtype: tuple
+    """
+    global _settings
+    _settings = _check_settings(
+        _settings.mode if mode is None else mode,
+        _settings.sample_rate if sample_rate is None else sample_rate,
+        configure.__name__
+    )
+    return _settings
+
+
+def _is_sampled(obj):
+    """Return ``True`` if ``obj`` may be restricted given its class's sampling.
+
+    Classes decorated in ``"sampled"`` mode have a ``_touketsu_sample``
+    threshold. The first time an instance is checked, a random 64-bit number is
+    drawn and the instance is sampled if it is below the threshold. The outcome
+    is kept in :data:`_samples`, so an instance is sampled or not for its whole
+    lifetime, and since entries are removed when instances are collected, an
+    instance reusing the :func:`id` of a collected one gets its own draw.
+    Instances that cannot be weakly referenced fall back to hashing their
+    :func:`id` with :data:`_SAMPLE_MULTIPLIER`.
+
+    :param obj: Class instance
+    :type obj: object
+    :rtype: bool
+    """
+    threshold = getattr(type(obj), "_touketsu_sample", None)
+    if threshold is None: return True
+    sampled = _samples.get(obj)
+    if sampled is None:
+        sampled = _sample_random.getrandbits(64) < threshold
+        if not _samples.set(obj, sampled):
+            return ((id(obj) * _SAMPLE_MULTIPLIER)
+                    & 0xFFFFFFFFFFFFFFFF) < threshold
+    return sampled
+
+
+def class_decorator_factory(dectype = None, docmod = None, fields = None,
+                            slots = False, deep = False, eq = False,
+                            interned = False, init = False, order = False,
+                            track_changes = False, observable = False):
     """``touketsu`` class decorator factory.
 
-    The returned decorator is able to automatically modify the docstrings of
-    the wrapped class, provided they follow the docstring format specified in
-    `PEP 257`__.
+    The returned decorator is able to automatically modify the docstrings of
+    the wrapped class, provided they follow the docstring format specified in
+    `PEP 257`__.
+
+    .. note::
+
+       It is possible to tell which classes have been wrapped a decorator
+       returned by :func:`class_decorator_factory` because the decoration
+       process introduces additional class attributes prepended by 
+       ``_touketsu``. Using :func:`urt_class` on any of these decorated
+       classes undos the decoration and returns the class to its original
+       definition.
+
+    .. __: https://www.python.org/dev/peps/pep-0257/
+
+    :param dectype: The decorator type. Pass ``"immutable"`` to return a class
+        decorator that makes a class instance immutable or ``"nondynamic"`` to
+        make a class instance nondynamic.
+    :type dectype: str
+    :param docmod: How to modify the docstring of the class the returned
+        decorator is applied to. Either ``"brief"``, or ``"identity"``. The
+        default value is ``"brief"``.
+    :type docmod: str, optional
+    :param fields: Names of the instance attributes of the decorated class. For
+        nondynamic instances, assignment to any of these names is allowed with a
+        single set lookup instead of a :func:`hasattr` call. If ``None``, the
+        default, the names are learned from the instance attributes present
+        after the first completed :meth:`__init__` call. Names not in
+        ``fields`` are still checked with :func:`hasattr`, so ``fields`` need
+        not be exhaustive.
+    :type fields: iterable, optional
+    :param slots: ``True`` to replace the decorated class with a copy that
+        stores instance attributes in ``__slots__``, so that instances carry no
+        ``__dict__``. The slot names are ``fields`` plus the names assigned to
+        in the source of the class's :meth:`__init__`, which are also used as
+        the class's fields. Since there is no ``__dict__``, instances of a
+        slotted class cannot gain new attributes, even in methods decorated
+        with :func:`urt_method`. Default ``False``.
+    :type slots: bool, optional
+    :param deep: ``True`` to also freeze the containers held by instances,
+        which is only allowed if ``dectype`` is ``"immutable"``. When the
+        outermost :meth:`__init__` returns, instance attribute values are
+        converted recursively: :class:`list` to :class:`tuple`, :class:`dict`
+        to a read-only :class:`types.MappingProxyType`, and :class:`set` to
+        :class:`frozenset`. Subclasses of these, e.g.
+        :class:`collections.OrderedDict`, are converted the same way, while
+        tuples and frozensets keep their type, e.g. namedtuples are rebuilt
+        with their items frozen. Nested instances of deeply immutable classes
+        have their attribute values converted the same way, nested instances
+        of other immutable classes are left as they are, and nested
+        nondynamic instances raise :class:`TypeError`. Shared containers are
+        converted once, and cyclic containers raise :class:`ValueError`.
+        Default ``False``.
+    :type deep: bool, optional
+    :param eq: ``True`` to generate :meth:`__eq__` and :meth:`__hash__` from
+        the values of the class's fields, which is only allowed if ``dectype``
+        is ``"immutable"``. The hash is computed on first use and cached in a
+        slot if ``slots`` is ``True`` and in a table outside the instance
+        otherwise, never in its ``__dict__``, so later hashes cost one lookup.
+        Methods the class defines itself are not replaced. Do
+        not change the fields of a hashed instance with :func:`urt_method`, as
+        the cached hash is not updated. Default ``False``.
+    :type eq: bool, optional
+    :param interned: ``True`` or a maximum cache size to intern instances,
+        which is only allowed if ``dectype`` is ``"immutable"``. Calling the
+        class then returns the live instance with equal field values if there is
+        one, so equal instances are usually identical. Interned instances are
+        held by weak references in a least recently used cache, evicting the
+        oldest entry when the cache is full. ``True`` uses a maximum size of
+        ``65536``. Instances with unhashable field values are not interned, and
+        the class must not define :meth:`__new__`. See :func:`intern_info`.
+        Default ``False``.
+    :type interned: bool or int, optional
+    :param init: ``True`` to generate the class's :meth:`__init__` from its
+        declared fields, like :mod:`dataclasses` does. The fields are
+        ``fields`` if given, else the names annotated in the class body, and
+        class attributes with the same names are removed from the class and
+        used as default values, e.g. ``size: int = 0``. The generated
+        :meth:`__init__` takes the fields as arguments in order and writes them
+        straight into the instance ``__dict__`` or slots, without the
+        :meth:`__init__` wrapper or :meth:`__setattr__` checks, so construction
+        costs about as much as for an undecorated class. The class must not
+        define :meth:`__init__`, and :class:`list`, :class:`dict`, and
+        :class:`set` defaults are rejected as they would be shared by all
+        instances. Default ``False``.
+    :type init: bool, optional
+    :param order: ``True`` to generate :meth:`__lt__`, :meth:`__le__`,
+        :meth:`__gt__`, and :meth:`__ge__` comparing the class's fields in
+        order, or field names to compare in the given order, which is only
+        allowed if ``dectype`` is ``"immutable"``. The tuple of compared values
+        is the instance's sort key, computed on first use and cached in the
+        instance like the hash of ``eq``, so comparisons and
+        ``sorted(objs, key = sort_key)`` do not rebuild it. Instances of
+        different classes are not ordered. Methods the class defines itself are
+        not replaced. Requires ``eq = True``, so that instances that are
+        neither less nor greater than each other can compare equal. Field
+        names are checked against the fields once these are known. See
+        :func:`sort_key`. Default ``False``.
+    :type order: bool or iterable, optional
+    :param track_changes: ``True`` to record which attributes of an instance
+        are assigned after :func:`checkpoint` is called on it, which is only
+        allowed if ``dectype`` is ``"nondynamic"``. The names are recorded as a
+        bitset, an :class:`int` in the instance with one bit per attribute
+        name of the class, which the restricted :meth:`__setattr__` updates on
+        each write, also when restrictions are turned off by
+        :func:`configure`. See :func:`changed_fields`. Default ``False``.
+    :type track_changes: bool, optional
+    :param observable: ``True`` to let :func:`~touketsu.observe.subscribe`
+        observe the writes to instances, which is only allowed if ``dectype``
+        is ``"nondynamic"``. The restricted :meth:`__setattr__` records each
+        assigned name, and methods of the class decorated with
+        :func:`urt_method`, including inherited ones, and
+        :class:`unrestricted` blocks coalesce their writes into one
+        notification, see :mod:`touketsu.observe`. Writes in :meth:`__init__`
+        are not reported. Writes are only recorded while there are
+        subscriptions. Default ``False``.
+    :type observable: bool, optional
+    :returns: A class decorator that either makes disables dynamic attribute
+        creation for class instances or makes class instances immutable.
+    :type: function
+    """
+    _fn = class_decorator_factory.__name__
+    # if dectype is not valid, raise error
+    if (dectype != "immutable") and (dectype != "nondynamic"):
+        raise ValueError(f"{_fn}: dectype must be \"immutable\" or "
+                         f"\"nondynamic\"")
+    # fields must be strings if provided
+    if fields is not None:
+        fields = tuple(fields)
+        if not all(isinstance(field, str) for field in fields):
+            raise TypeError(f"{_fn}: fields must be an iterable of str")
+    if deep and (dectype != "immutable"):
+        raise ValueError(f"{_fn}: deep requires dectype \"immutable\"")
+    if eq and (dectype != "immutable"):
+        raise ValueError(f"{_fn}: eq requires dectype \"immutable\"")
+    if interned and (dectype != "immutable"):
+        raise ValueError(f"{_fn}: interned requires dectype \"immutable\"")
+    if order and (dectype != "immutable"):
+        raise ValueError(f"{_fn}: order requires dectype \"immutable\"")
+    # identity equality would contradict field-based ordering
+    if order and not eq:
+        raise ValueError(f"{_fn}: order requires eq = True")
+    if track_changes and (dectype != "nondynamic"):
+        raise ValueError(f"{_fn}: track_changes requires dectype "
+                         "\"nondynamic\"")
+    if observable and (dectype != "nondynamic"):
+        raise ValueError(f"{_fn}: observable requires dectype "
+                         "\"nondynamic\"")
+    if order and (order is not True):
+        order = tuple(order)
+        if not all(isinstance(name, str) for name in order):
+            raise TypeError(f"{_fn}: order must be True or an iterable of str")
+    # True is also an int, so it is checked first
+    if interned is True: interned = _INTERN_MAXSIZE
+    if interned and ((not isinstance(interned, int)) or (interned < 0)):
+        raise ValueError(f"{_fn}: interned must be a bool or positive int")
+
+    # decorator for a class
+    def wrapper(cls):
+        # the mode is fixed when the class is decorated, not checked on writes
+        mode = _settings.mode
+        # raise TypeError if this is not a type or abc.ABCMeta
+        if cls.__class__ not in (type, ABCMeta):
+            raise TypeError(f"{_fn}: expected type or abc.ABCMeta, received "
+                            f"{type(cls)}")
+        if interned and ("__new__" in cls.__dict__):
+            raise TypeError(f"{_fn}: interned class {cls.__name__} must not "
+                            "define __new__")
+        # fields of a generated __init__ and their defaults, which are removed
+        # from the class so they don't conflict with slots
+        cls_fields = fields
+        if init:
+            if "__init__" in cls.__dict__:
+                raise TypeError(f"{_fn}: {cls.__name__} must not define "
+                                "__init__ if init is True")
+            cls_fields, defaults = _declared_fields(cls, fields, _fn)
+            # fields and defaults inherited by subclasses decorated with init
+            cls._touketsu_init = (cls_fields, defaults)
+        # rebuild class with __slots__ if requested. the slots determine fields
+        if slots:
+            # the cached hash and sort key need their own slots
+            cls = _slotted_class(
+                cls, cls_fields,
+                extra = (("_touketsu_hash",) if eq else ()) +
+                (("_touketsu_sort_key",) if order else ()) +
+                (("_touketsu_dirty",) if track_changes else ())
+            )
+            # slots of base classes come first, like their __init__ writes
+            cls_fields = tuple(
+                name for klass in reversed(cls.__mro__)
+                for name in klass.__dict__.get("__slots__", ())
+                if not name.startswith(("_touketsu", "__weakref__"))
+            )
+        # order names can only be checked if the fields are known
+        if order and (cls_fields is not None):
+            _check_order(order, cls_fields, _fn)
+        # class attribute indicating restriction imposed by touketsu. whether an
+        # instance is currently restricted is tracked by _unrestricted.
+        cls._touketsu_restriction = dectype
+        # instance attribute names; None until learned from a completed __init__
+        cls._touketsu_fields = cls_fields
+        # whether nested containers are frozen as well
+        cls._touketsu_deep = deep
+        # cache of interned instances, if any
+        cls._touketsu_intern = _InternCache(cls, interned) if interned else None
+        # bit of each attribute name in the bitsets of changed attributes
+        changes = _ChangeIndex(cls_fields) if track_changes else None
+        cls._touketsu_track = changes
+        # function run after each write to track or observe it, if any
+        if observable:
+            # touketsu.observe imports core, so it is imported here
+            from .observe import _record, batch
+            after_write = _after_write_hook(changes, _record)
+        else: after_write = _after_write_hook(changes, None)
+        # context manager coalescing notifications, used by unrestricted
+        cls._touketsu_batch = batch if observable else None
+        # restriction mode and, in sampled mode, the threshold of _is_sampled
+        cls._touketsu_mode = mode
+        cls._touketsu_sample = (
+            int(_settings.sample_rate * (1 << 64)) if mode == "sampled"
+            else None
+        )
+        # original class docstring, original class __init__ and __setattr__
+        cls._touketsu_orig__doc__ = cls.__doc__
+        # if __init__ is inherited from a decorated superclass, wrap the
+        # superclass's original __init__ so wrappers are not stacked
+        _orig__init__ = getattr(cls.__init__, "_touketsu_orig__init__",
+                                cls.__init__)
+        # if __setattr__ is inherited from a decorated superclass, use the
+        # superclass's original __setattr__ so checks are not chained
+        _orig__setattr__ = getattr(cls.__setattr__, "_touketsu_orig__setattr__",
+                                   cls.__setattr__)
+        # frozenset of cls._touketsu_fields used for fast membership checks.
+        # empty until fields are learned, which just means hasattr is used.
+        schema = frozenset(() if cls_fields is None else cls_fields)
+
+        # new __setattr__, specialized on dectype so that no restriction string
+        # comparisons happen on assignment. note: we could just use
+        # object.__setattr__, but since self will have the
+        # _touketsu_orig__setattr__ pointing to the original __setattr__ of the
+        # class, we use that instead. this is useful if the class itself has an
+        # overriden __setattr__ method itself.
+        if dectype == "immutable":
+            def _touketsu_restricted_setattr(self, key, value):
+                # _unrestricted is checked inline first so writes during
+                # __init__ or urt_method calls don't pay for a function call
+                ids = _unrestricted.get()
+                if ((id(self) not in ids) or (ids.thread != get_ident())) \
+                    and _is_restricted(self):
+                    raise AttributeError("Immutable class instance")
+                # use original __setattr__; see _orig__setattr__
+                _orig__setattr__(self, key, value)
+        elif after_write is not None:
+            def _touketsu_restricted_setattr(self, key, value):
+                if (key not in schema) and _is_restricted(self) and \
+                    (not hasattr(self, key)):
+                    raise AttributeError("Nondynamic class instance")
+                _orig__setattr__(self, key, value)
+                after_write(self, key)
+        else:
+            def _touketsu_restricted_setattr(self, key, value):
+                # known fields are always allowed, so the restriction is only
+                # looked up for unknown names
+                if (key not in schema) and _is_restricted(self) and \
+                    (not hasattr(self, key)):
+                    raise AttributeError("Nondynamic class instance")
+                # use original __setattr__; see _orig__setattr__
+                _orig__setattr__(self, key, value)
+
+        # wrapper for class __init__ method
+        def init_wrapper(init):
+
+            # run by the outermost decorated __init__ once the original
+            # __init__ returns, with the instance restricted again
+            def _init_done(self):
+                nonlocal schema
+                # instances of undecorated subclasses overriding __init__ are
+                # restricted from now on
+                if type(self) is not cls: _mark_initialized(self)
+                # containers are converted once the outermost __init__ is done,
+                # in sampled mode only for sampled instances
+                if deep and _is_sampled(self): _deep_freeze(self, {})
+                # learn fields from the first completed __init__ of cls itself,
+                # as subclass instances may carry extra attributes
+                if (cls._touketsu_fields is None) and (type(self) is cls):
+                    cls._touketsu_fields = tuple(
+                        name for name in getattr(self, "__dict__", ())
+                        if not name.startswith("_touketsu")
+                    )
+                    schema = frozenset(cls._touketsu_fields)
+
+            # for "well-behaved" decoration (don't lose signature and docstring)
+            return wraps(init)(_init_wrapper_method(init, _init_done))
+        
+        # perform docstring modification
+        classdocmod(cls, dectype, docmod = docmod)
+        # a generated __init__ writes fields directly, so it needs no wrapper
+        if init:
+            _orig__init__ = _init_method(cls, cls_fields, defaults,
+                                         deep and (mode != "off"),
+                                         mode == "sampled")
+            cls.__init__ = _orig__init__
+        # original __init__ and __setattr__ are kept when restrictions are off,
+        # except that writes are still tracked or observed if requested
+        if mode == "off":
+            if after_write is not None:
+                cls.__setattr__ = _hooked_setattr(_orig__setattr__,
+                                                  after_write)
+            return _add_methods(cls, interned, eq, order, observable)
+        # override __setattr__ and __init__ of class + preserve original
+        # signature. sphinx doesn't work well with functools.wraps.
+        cls.__setattr__ = _touketsu_restricted_setattr
+        # a second generated __init__ marks the class as decorated
+        if init:
+            cls.__init__ = _init_method(cls, cls_fields, defaults, deep,
+                                        mode == "sampled", mark = True)
+        else:
+            # warn if the class doesn't override object __init__ method
+            try: _orig__init__.__signature__ = signature(_orig__init__)
+            except AttributeError:
+                warnings.warn("Class without __init__ decorated. "
+                              "object.__init__ signature will be displayed "
+                              "instead.")
+            cls.__init__ = init_wrapper(_orig__init__)
+        # bind original __init__ method to new __init__ so orig_init works
+        cls.__init__._touketsu_orig__init__ = _orig__init__
+        # bind original __setattr__ to new __setattr__
+        cls.__setattr__._touketsu_orig__setattr__ = _orig__setattr__
+        # retain original __setattr__ docstring, in case there was one
+        cls.__setattr__.__doc__ = _orig__setattr__.__doc__
+        return _add_methods(cls, interned, eq, order, observable)
+
+    # return decorator
+    return wrapper
+
+
+def _add_methods(cls, interned, eq, order, observable):
+    """Add interning and generated methods to a decorated class.
+
+    :param cls: Class being decorated by
+        :func:`class_decorator_factory`, with its class attributes set
+    :type cls: type
+    :param interned: Maximum size of the interning cache, or ``False``
+    :type interned: bool or int
+    :param eq: Whether to generate :meth:`__eq__` and :meth:`__hash__`
+    :type eq: bool
+    :param order: ``True`` or field names to generate comparison methods, or
+        ``False``
+    :type order: bool or tuple
+    :param observable: Whether to coalesce the notifications of writes in
+        :meth:`__init__` and in methods decorated with :func:`urt_method`
+    :type observable: bool
+    :returns: ``cls``
+    :rtype: type
+    """
+    # instances of cls are initialized in __new__ before being interned
+    if interned: _add_interning(cls)
+    # add generated methods the class does not already have
+    _add_generated(cls, "from_columns", classmethod(_from_columns))
+    _add_generated(cls, "from_records", classmethod(_from_records))
+    _add_generated(cls, "__copy__", _copy)
+    _add_generated(cls, "__deepcopy__", _deepcopy)
+    # pickling methods are only added together, and not if the class
+    # customizes pickling itself. object defines some of them.
+    if all(getattr(cls, name, None) is getattr(object, name, None)
+           for name in _PICKLE_METHODS):
+        cls.__reduce_ex__ = _reduce_ex
+        cls.__getstate__ = _getstate
+        cls.__setstate__ = _setstate
+    # field-based __eq__ and __hash__ replace inherited ones, but not ones
+    # defined in the class body. defining __eq__ sets __hash__ to None.
+    if eq:
+        _eq, _hash = _eq_hash_methods(cls)
+        if "__eq__" not in cls.__dict__: cls.__eq__ = _eq
+        if cls.__dict__.get("__hash__") is None: cls.__hash__ = _hash
+    # every class inherits comparisons from object, so only ones defined in
+    # the class body are kept
+    if order:
+        cls._touketsu_order = _sort_key_function(cls, order)
+        for name, op in (("__lt__", "<"), ("__le__", "<="), ("__gt__", ">"),
+                         ("__ge__", ">=")):
+            if name not in cls.__dict__:
+                setattr(cls, name, _compare_method(cls, name, op))
+    # the wrappers keep the attributes of the wrapped functions, so urt_class
+    # still finds the original __init__. inherited methods are wrapped too.
+    if observable:
+        from .observe import _batched, _silenced
+        seen = set()
+        for klass in cls.__mro__:
+            for name, member in list(klass.__dict__.items()):
+                if name in seen: continue
+                seen.add(name)
+                if getattr(member, "is_urt_method", False) and \
+                    not hasattr(member, "_touketsu_batched"):
+                    setattr(cls, name, _batched(member))
+        cls.__init__ = _silenced(cls.__init__)
+    return cls
+
+
+def _declared_fields(cls, fields, _fn):
+    """Return the fields of a generated :meth:`__init__` and their defaults.
+
+    Class attributes named like fields are removed from ``cls`` and returned
+    as defaults. Without declared fields, like :mod:`dataclasses`, the fields
+    of base classes decorated with ``init`` come first, in the order of the
+    method resolution order, followed by the fields annotated in the body of
+    ``cls``. A field annotated again keeps its position and takes the new
+    default, if any.
+
+    :param cls: Class to be decorated with ``init``
+    :type cls: type
+    :param fields: Declared field names, or ``None`` to use the annotated
+        names of ``cls`` and the fields of its bases.
+    :type fields: tuple
+    :param _fn: Name of the caller, used in error messages
+    :type _fn: str
+    :returns: Tuple of field names and tuple of default values of the last
+        fields
+    :rtype: tuple
+    """
+    # defaults of inherited fields, removed from the bases when decorated
+    inherited = {}
+    if fields is None:
+        names = {}
+        for klass in reversed(cls.__mro__[1:]):
+            base = klass.__dict__.get("_touketsu_init")
+            if base is None: continue
+            base_fields, base_defaults = base
+            for name in base_fields:
+                names[name] = None
+                inherited.pop(name, None)
+            inherited.update(zip(
+                base_fields[len(base_fields) - len(base_defaults):],
+                base_defaults
+            ))
+        for name in cls.__dict__.get("__annotations__", {}):
+            names[name] = None
+            inherited.pop(name, None)
+        fields = tuple(names)
+    if not fields:
+        raise ValueError(f"{_fn}: init requires fields or annotations in "
+                         f"{cls.__name__}")
+    defaults = []
+    for name in fields:
+        if (not name.isidentifier()) or iskeyword(name) or \
+            name.startswith(("__", "_touketsu")) or (name == "self"):
+            raise ValueError(f"{_fn}: invalid field name {name!r}")
+        if name in cls.__dict__:
+            default = cls.__dict__[name]
+            if isinstance(default, (list, dict, set)):
+                raise ValueError(f"{_fn}: mutable default for field {name!r}")
+            defaults.append(default)
+        elif name in inherited: defaults.append(inherited[name])
+        elif defaults:
+            raise ValueError(f"{_fn}: field {name!r} without a default follows "
+                             "a field with a default")
+    for name in fields[len(fields) - len(defaults):]:
+        if name in cls.__dict__: delattr(cls, name)
+    return fields, tuple(defaults)
+
+
+def _init_method(cls, names, defaults, deep, sampled, mark = False):
+    """Return a generated :meth:`__init__` for a class decorated with ``init``.
+
+    Like the builders of :func:`_instance_builder`, the generated method writes
+    its arguments straight into the instance ``__dict__``, or through the slot
+    descriptor for names stored in slots, without calling :meth:`__setattr__`.
+
+    :param cls: Decorated class, after any slotting
+    :type cls: type
+    :param names: Field names, which are also the argument names
+    :type names: tuple
+    :param defaults: Default values of the last arguments
+    :type defaults: tuple
+    :param deep: Whether to deeply freeze the arguments
+    :type deep: bool
+    :param sampled: Whether to only deeply freeze arguments of instances for
+        which :func:`_is_sampled` is true
+    :type sampled: bool
+    :param mark: Whether to pass instances of subclasses to
+        :func:`_mark_initialized`, default ``False``
+    :type mark: bool, optional
+    :rtype: function
+    """
+    # builtins are bound to prefixed names, as field names may shadow them
+    namespace = {"_touketsu_freeze": _deep_freeze_value,
+                 "_touketsu_sampled": _is_sampled, "_touketsu_id": id,
+                 "_touketsu_cls": cls, "_touketsu_mark": _mark_initialized}
+    body = []
+    if deep:
+        indent = "    " if sampled else ""
+        if sampled: body.append("if _touketsu_sampled(self):")
+        body.append(f"{indent}_touketsu_memo = "
+                    "{_touketsu_id(self): (self, self)}")
+        body += [f"{indent}{name} = _touketsu_freeze({name}, _touketsu_memo)"
+                 for name in names]
+    writes = []
+    for i, name in enumerate(names):
+        descr = getattr(cls, name, None)
+        if isinstance(descr, MemberDescriptorType):
+            namespace[f"_touketsu_set{i}"] = descr.__set__
+            writes.append(f"_touketsu_set{i}(self, {name})")
+        else: writes.append(f"_touketsu_dict[{name!r}] = {name}")
+    if any(line.startswith("_touketsu_dict") for line in writes):
+        writes.insert(0, "_touketsu_dict = self.__dict__")
+    lines = [f"def __init__(self, {', '.join(names)}):"]
+    if mark:
+        writes.append("if self.__class__ is not _touketsu_cls: "
+                      "_touketsu_mark(self)")
+    lines += [f"    {line}" for line in body + writes]
+    exec("\n".join(lines), namespace)
+    init = namespace["__init__"]
+    init.__defaults__ = defaults or None
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    init.__module__ = cls.__module__
+    return init
+
+
+def _init_wrapper_method(init, done):
+    """Return the decorated :meth:`__init__` wrapping ``init``.
+
+    The outermost call for an instance lifts its restriction while ``init``
+    runs and then calls ``done``. Nested calls, e.g. ``super().__init__()``
+    from the :meth:`__init__` of a decorated subclass, run ``init`` directly
+    after one membership check, so each level of a decorated hierarchy only
+    adds a function call. To make that call cheap, the wrapper is generated
+    with the parameters of ``init`` and forwards them as they are, instead of
+    packing them into ``*args`` and ``**kwargs``. ``init`` functions whose
+    parameters cannot be copied, e.g. :meth:`object.__init__`, are forwarded
+    with ``*args`` and ``**kwargs``.
+
+    :param init: Original :meth:`__init__`
+    :type init: function
+    :param done: Function called with the instance after the outermost call
+    :type done: function
+    :rtype: function
+    """
+    # builtins are bound to prefixed names, as parameters may shadow them
+    namespace = {"_touketsu_init": init, "_touketsu_done": done,
+                 "_touketsu_id": id, "_touketsu_thread": get_ident,
+                 "_touketsu_get": _unrestricted.get,
+                 "_touketsu_own": _context_ids}
+    code = getattr(init, "__code__", None)
+    params = args = None
+    if (init.__class__.__name__ == "function") and (code is not None) and \
+        (code.co_argcount > 0):
+        n_pos, n_kw = code.co_argcount, code.co_kwonlyargcount
+        n_posonly = getattr(code, "co_posonlyargcount", 0)
+        names = code.co_varnames
+        pos, kwonly = names[:n_pos], names[n_pos:n_pos + n_kw]
+        rest = iter(names[n_pos + n_kw:])
+        varargs = next(rest) if code.co_flags & CO_VARARGS else None
+        varkw = next(rest) if code.co_flags & CO_VARKEYWORDS else None
+        params, args = list(pos), list(pos)
+        if n_posonly: params.insert(n_posonly, "/")
+        if varargs is not None:
+            params.append(f"*{varargs}")
+            args.append(f"*{varargs}")
+        elif kwonly: params.append("*")
+        params += kwonly
+        args += [f"{name}={name}" for name in kwonly]
+        if varkw is not None:
+            params.append(f"**{varkw}")
+            args.append(f"**{varkw}")
+        # parameter names must not shadow the names the wrapper uses
+        if any(name.startswith(("_touketsu", "*_touketsu", "**_touketsu"))
+               for name in params):
+            params = None
+    if params is None:
+        params = ["self", "*_touketsu_args", "**_touketsu_kwargs"]
+        args = params
+    self = params[0]
+    params, args = ", ".join(params), ", ".join(args)
+    lines = [
+        f"def __init__({params}):",
+        "    _touketsu_ids = _touketsu_get()",
+        f"    _touketsu_key = _touketsu_id({self})",
+        "    if _touketsu_ids.thread != _touketsu_thread(): "
+        "_touketsu_ids = _touketsu_own()",
+        "    elif _touketsu_key in _touketsu_ids: "
+        f"return _touketsu_init({args})",
+        "    _touketsu_ids.add(_touketsu_key)",
+        f"    try: _touketsu_init({args})",
+        "    finally: _touketsu_ids.discard(_touketsu_key)",
+        f"    _touketsu_done({self})"
+    ]
+    exec("\n".join(lines), namespace)
+    wrapper = namespace["__init__"]
+    # the parameters are the same, so the defaults line up
+    wrapper.__defaults__ = getattr(init, "__defaults__", None)
+    wrapper.__kwdefaults__ = getattr(init, "__kwdefaults__", None)
+    return wrapper
+
+
+def _slotted_class(cls, fields = None, extra = ()):
+    """Return slotted copy of ``cls`` for :func:`class_decorator_factory`.
+
+    Slot names are ``fields`` followed by the names assigned to in the source of
+    the original :meth:`__init__` of ``cls``, if it has one, and ``extra``.
+    Names of data descriptors, e.g. properties or slots of base classes, are
+    skipped, and private names are mangled.
+
+    :param cls: Class to be decorated.
+    :type cls: type
+    :param fields: Declared instance attribute names, default ``None``.
+    :type fields: tuple, optional
+    :param extra: Slot names used by ``touketsu`` itself, default ``()``.
+    :type extra: tuple, optional
+    :rtype: type
+    """
+    names = list(fields or ())
+    init = getattr(cls.__init__, "_touketsu_orig__init__", cls.__init__)
+    # object.__init__ is a slot wrapper and assigns nothing. if the source is
+    # unavailable, e.g. in the interpreter, declared fields must be enough
+    if init.__class__.__name__ == "function":
+        try: names.extend(init_attr_names(init))
+        except TypeError:
+            if fields is None:
+                raise TypeError(f"{_slotted_class.__name__}: unable to infer "
+                                f"slots of {cls.__name__}; pass fields instead")
+    names.extend(extra)
+    slots = {}
+    for name in names:
+        # mangle private names, as the compiler does for self.__name
+        if name.startswith("__") and not name.endswith("__"):
+            name = f"_{cls.__name__.lstrip('_')}{name}"
+        # properties, base class slots, etc. are not instance attributes
+        if hasattr(getattr(cls, name, None), "__set__"): continue
+        slots[name] = None
+    return slotted_copy(cls, tuple(slots))
+
+
+def _tuple_getter(names):
+    """Return a function returning the tuple of the attributes ``names``.
+
+    Uses one :func:`operator.attrgetter` call, which returns a bare value for
+    one name and needs at least one name, so those cases are wrapped.
+
+    :param names: Attribute names
+    :type names: tuple
+    :rtype: function
+    """
+    if len(names) > 1: return attrgetter(*names)
+    if not names: return lambda obj: ()
+    get = attrgetter(*names)
+    return lambda obj: (get(obj),)
+
+
+def _instance_items(obj):
+    """Return the names and values of the instance attributes of ``obj``.
+
+    Includes attributes in the instance ``__dict__`` and set slots of all
+    classes in the method resolution order, except for slots whose names
+    start with ``_touketsu``, which are used by ``touketsu`` itself. If all
+    slots are set and there is no ``__dict__``, the names are a tuple cached
+    in the class.
+
+    :param obj: Class instance
+    :type obj: object
+    :returns: ``(names, values)``, both tuples.
+    :rtype: tuple
+    """
+    cls = type(obj)
+    # slot names, a getter of their values, and whether instances have a
+    # __dict__ are cached per class, since walking the MRO is slow
+    layout = cls.__dict__.get("_touketsu_layout")
+    if layout is None:
+        slots = tuple(
+            name for klass in cls.__mro__
+            for name in klass.__dict__.get("__slots__", ())
+            if not name.startswith(("_touketsu", "__dict__", "__weakref__"))
+        )
+        getter = _tuple_getter(slots) if slots else None
+        layout = (slots, getter, cls.__dictoffset__ != 0)
+        setattr(cls, "_touketsu_layout", layout)
+    slots, getter, has_dict = layout
+    if getter is None: values = ()
+    else:
+        try: values = getter(obj)
+        # unset slots raise AttributeError, so they are read one at a time
+        except AttributeError:
+            names, values = [], []
+            for name in slots:
+                try: values.append(object.__getattribute__(obj, name))
+                except AttributeError: continue
+                names.append(name)
+            slots, values = tuple(names), tuple(values)
+    if not has_dict: return slots, values
+    state = obj.__dict__
+    if not slots: return tuple(state), tuple(state.values())
+    return tuple(state) + slots, tuple(state.values()) + values
+
+
+def _instance_state(obj):
+    """Return the instance attributes of ``obj`` as a :class:`dict`.
+
+    See :func:`_instance_items` for the attributes included.
+
+    :param obj: Class instance
+    :type obj: object
+    :rtype: dict
+    """
+    return dict(zip(*_instance_items(obj)))
+
+
+def _new_with_state(cls, state):
+    """Return a new instance of ``cls`` with the given instance attributes.
+
+    Neither :meth:`__init__` nor the interning :meth:`__new__` of ``cls`` is
+    called, and values are written with :meth:`object.__setattr__`.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param state: Instance attribute values by name
+    :type state: dict
+    :rtype: object
+    """
+    obj = getattr(cls.__new__, "_touketsu_orig__new__", cls.__new__)(cls)
+    for name, value in state.items(): object.__setattr__(obj, name, value)
+    return obj
+
+
+_FREEZING = object()
+"Marker for containers whose conversion by :func:`_deep_freeze` is underway."
+
+
+def _deep_freeze_value(value, memo):
+    """Return a deeply frozen version of ``value``.
+
+    See the ``deep`` parameter of :func:`class_decorator_factory`. Values of
+    other types are returned unchanged.
+
+    :param value: Value to freeze
+    :type value: object
+    :param memo: Maps the :func:`id` of each visited value to a tuple of the
+        value and its frozen version, so that shared values are converted once
+        and kept alive for the whole pass.
+    :type memo: dict
+    :rtype: object
+    """
+    # fast path for common scalars
+    if isinstance(value, (str, int, float, bytes, type(None))): return value
+    key = id(value)
+    if key in memo:
+        frozen = memo[key][1]
+        if frozen is _FREEZING:
+            raise ValueError(f"{_deep_freeze_value.__name__}: cannot freeze "
+                             f"cyclic {type(value).__name__}")
+        return frozen
+    # decorated instances are frozen in place
+    restriction = getattr(type(value), "_touketsu_restriction", None)
+    if restriction == "nondynamic":
+        raise TypeError(f"{_deep_freeze_value.__name__}: cannot deeply freeze "
+                        f"nondynamic {type(value).__name__} instance")
+    if restriction == "immutable":
+        # instances of shallow classes keep their containers
+        memo[key] = (value, value)
+        if getattr(type(value), "_touketsu_deep", False):
+            _deep_freeze(value, memo)
+        return value
+    if isinstance(value, (list, tuple, dict, set, frozenset)):
+        memo[key] = (value, _FREEZING)
+        if isinstance(value, dict):
+            frozen = MappingProxyType({k: _deep_freeze_value(v, memo)
+                                       for k, v in value.items()})
+        else:
+            items = [_deep_freeze_value(item, memo) for item in value]
+            # keep original tuples and frozensets if nothing changed, and
+            # rebuild them with their own type, e.g. namedtuples, otherwise
+            if isinstance(value, (tuple, frozenset)):
+                if all(a is b for a, b in zip(items, value)): frozen = value
+                else: frozen = _rebuild(value, items)
+            elif isinstance(value, set): frozen = frozenset(items)
+            else: frozen = tuple(items)
+        memo[key] = (value, frozen)
+        return frozen
+    return value
+
+
+def _rebuild(value, items):
+    """Return a tuple or frozenset of the type of ``value`` holding ``items``.
+
+    :param value: Tuple or frozenset, possibly of a subclass
+    :type value: tuple or frozenset
+    :param items: New items
+    :type items: list
+    :rtype: tuple or frozenset
+    """
+    cls = type(value)
+    if (cls is tuple) or (cls is frozenset): return cls(items)
+    # namedtuple constructors take the items as separate arguments
+    if isinstance(value, tuple) and hasattr(cls, "_make"):
+        return cls._make(items)
+    return cls(items)
+
+
+def _deep_freeze(obj, memo):
+    """Deeply freeze the attribute values of an immutable instance in place.
+
+    Values are written with :meth:`object.__setattr__`, bypassing the
+    restricted :meth:`__setattr__`.
+
+    :param obj: Instance of an immutable decorated class
+    :type obj: object
+    :param memo: See :func:`_deep_freeze_value`.
+    :type memo: dict
+    :rtype: None
+    """
+    memo[id(obj)] = (obj, obj)
+    for name, value in _instance_state(obj).items():
+        frozen = _deep_freeze_value(value, memo)
+        if frozen is not value: object.__setattr__(obj, name, frozen)
+
+
+def _deep_freeze_all(objs):
+    """Deeply freeze each instance in ``objs`` in one pass with a shared memo.
+
+    :param objs: Instances of an immutable decorated class
+    :type objs: iterable
+    :rtype: None
+    """
+    memo = {}
+    for obj in objs: _deep_freeze(obj, memo)
+
+
+def _eq_hash_methods(cls):
+    """Return field-based :meth:`__eq__` and :meth:`__hash__` for ``cls``.
+
+    Both compare the tuple of field values read with one
+    :func:`operator.attrgetter` call, created once the fields of ``cls`` are
+    known. Until then, e.g. if only subclass instances were created, all
+    instance attributes returned by :func:`_instance_state` are used. The hash
+    is cached in the ``_touketsu_hash`` slot of slotted classes and in
+    :data:`_hashes` otherwise.
+
+    :param cls: Class decorated with ``eq = True``
+    :type cls: type
+    :returns: ``(__eq__, __hash__)``
+    :rtype: tuple
+    """
+    getter = None
+
+    def _key(obj):
+        nonlocal getter
+        if getter is None:
+            fields = cls._touketsu_fields
+            if fields is None: return _instance_state(obj)
+            getter = _tuple_getter(fields)
+        return getter(obj)
+
+    @_generated
+    def __eq__(self, other):
+        if self is other: return True
+        if other.__class__ is not self.__class__: return NotImplemented
+        # skip the _key calls once the getter exists
+        if getter is not None: return getter(self) == getter(other)
+        return _key(self) == _key(other)
+
+    def _hash(obj):
+        key = _key(obj)
+        if isinstance(key, dict): key = frozenset(key.items())
+        value = hash(key)
+        _hashes.set(obj, value)
+        return value
+
+    # only the first call per instance computes the hash
+    if hasattr(cls, _hashes.name):
+        @_generated
+        def __hash__(self):
+            try: return self._touketsu_hash
+            except AttributeError: return _hash(self)
+    else:
+        hashes = _hashes.data
+
+        @_generated
+        def __hash__(self):
+            ref = hashes.get(id(self))
+            if ref is None: return _hash(self)
+            return ref.value
+
+    __eq__.__qualname__ = f"{cls.__qualname__}.__eq__"
+    __hash__.__qualname__ = f"{cls.__qualname__}.__hash__"
+    return __eq__, __hash__
+
+
+def _sort_key_function(cls, order):
+    """Return the function returning the cached sort key of ``cls`` instances.
+
+    The sort key is the tuple of the values of the ordered fields, read with
+    one :func:`operator.attrgetter` call created once the fields are known, and
+    is cached in the ``_touketsu_sort_key`` slot of slotted classes and in
+    :data:`_sort_keys` otherwise.
+
+    :param cls: Class decorated with ``order``
+    :type cls: type
+    :param order: ``True`` to order by the fields of ``cls``, or field names
+    :type order: bool or tuple
+    :rtype: function
+    """
+    getter = None
+
+    def _sort_key(obj):
+        nonlocal getter
+        key = _sort_keys.get(obj)
+        if key is not None: return key
+        if getter is None:
+            fields = cls._touketsu_fields
+            names = fields if order is True else order
+            if names is None:
+                raise TypeError(f"{cls.__name__}: fields unknown; pass fields "
+                                "or order to the decorator or create an "
+                                "instance first")
+            # names given before the fields were known are checked now
+            if fields is not None: _check_order(order, fields, cls.__name__)
+            getter = _tuple_getter(names)
+        key = getter(obj)
+        _sort_keys.set(obj, key)
+        return key
+
+    return _sort_key
+
+
+def _check_order(order, fields, _fn):
+    """Raise :class:`ValueError` unless ``order`` only names fields.
+
+    :param order: ``True`` or field names passed as ``order``
+    :type order: bool or tuple
+    :param fields: Fields of the class
+    :type fields: tuple
+    :param _fn: Name of the caller, used in the error message
+    :type _fn: str
+    :rtype: None
+    """
+    if order is True: return
+    unknown = [name for name in order if name not in fields]
+    if unknown:
+        raise ValueError(f"{_fn}: order names {unknown} are not fields "
+                         f"{fields}")
+
+
+def _compare_method(cls, name, op):
+    """Return a generated comparison method comparing cached sort keys.
+
+    The operator is inlined in the source of the method, which is faster than
+    calling a function from :mod:`operator`, and cached keys are compared
+    without calling the sort key function.
+
+    :param cls: Class decorated with ``order``, with ``_touketsu_order`` set
+    :type cls: type
+    :param name: Name of the method, e.g. ``"__lt__"``
+    :type name: str
+    :param op: Comparison operator, e.g. ``"<"``
+    :type op: str
+    :rtype: function
+    """
+    namespace = {"_touketsu_key": cls._touketsu_order,
+                 "_touketsu_keys": _sort_keys.data}
+    # cached keys are read from the slots or from the entries of _sort_keys
+    if hasattr(cls, _sort_keys.name):
+        cached = ("self._touketsu_sort_key", "other._touketsu_sort_key",
+                  "AttributeError")
+    else:
+        cached = ("_touketsu_keys[id(self)].value",
+                  "_touketsu_keys[id(other)].value", "KeyError")
+    lines = [
+        f"def {name}(self, other):",
+        "    if other.__class__ is not self.__class__: return NotImplemented",
+        f"    try: return {cached[0]} {op} {cached[1]}",
+        f"    except {cached[2]}:",
+        f"        return _touketsu_key(self) {op} _touketsu_key(other)"
+    ]
+    exec("\n".join(lines), namespace)
+    method = _generated(namespace[name])
+    method.__qualname__ = f"{cls.__qualname__}.{name}"
+    method.__module__ = cls.__module__
+    return method
+
+
+def sort_key(obj):
+    """Return the cached sort key of an instance of a class with ``order``.
+
+    The key is the tuple of the values of the ordered fields of ``obj``, see
+    the ``order`` parameter of :func:`class_decorator_factory`. It is computed
+    once per instance, so sorting with it compares cached tuples instead of
+    calling a comparison method for each pair.
+
+    .. code:: python
+
+       records.sort(key = sort_key)
+
+    :param obj: Instance of a class decorated with ``order``
+    :type obj: object
+    :rtype: tuple
+    """
+    _sort_key = getattr(type(obj), "_touketsu_order", None)
+    if _sort_key is None:
+        raise TypeError(f"{sort_key.__name__}: {type(obj).__name__} is not "
+                        "decorated with order")
+    return _sort_key(obj)
+
+
+class _ChangeIndex:
+    """Bits of the attribute names of a class decorated with ``track_changes``.
+
+    Each attribute name is given the next free bit when the index is created,
+    if the fields of the class are known, at the first :func:`checkpoint` of an
+    instance with the attribute, or when the attribute is first written, so
+    bits are stable for the life of the class.
+
+    :param fields: Known field names of the class, or ``None``
+    :type fields: tuple
+    """
+    __slots__ = ("bits", "names")
+
+    def __init__(self, fields = None):
+        # bits by name, and names in order of their bits
+        self.bits = {}
+        self.names = []
+        for name in fields or (): self.bit(name)
+
+    def bit(self, name):
+        """Return the bit of ``name``, assigning the next free bit if needed.
+
+        :param name: Attribute name
+        :type name: str
+        :rtype: int
+        """
+        bit = self.bits.get(name)
+        if bit is not None: return bit
+        # a name appended twice by racing threads keeps its first position
+        self.names.append(name)
+        return self.bits.setdefault(name, 1 << self.names.index(name))
+
+    def names_of(self, dirty):
+        """Return the names whose bits are set in ``dirty``, in bit order.
+
+        :param dirty: Bitset of changed attributes
+        :type dirty: int
+        :rtype: tuple
+        """
+        return tuple(name for i, name in enumerate(list(self.names))
+                     if dirty >> i & 1)
+
+
+def _after_write_hook(changes, record):
+    """Return the function run after each write to a nondynamic instance.
+
+    :param changes: Bit index of a class decorated with ``track_changes``, or
+        ``None``
+    :type changes: :class:`_ChangeIndex`
+    :param record: :func:`touketsu.observe._record` for a class decorated with
+        ``observable``, or ``None``
+    :type record: function
+    :returns: A function taking the instance and the attribute name, or
+        ``None`` if writes are neither tracked nor observed.
+    :rtype: function
+    """
+    if changes is None: return record
+    bits = changes.bits
+
+    def _track(self, key):
+        # instances are only tracked after their first checkpoint. bits are
+        # never 0, so a missing bit is assigned with "or"
+        dirty = _dirty.get(self)
+        if dirty is not None:
+            _dirty.update(self, dirty | (bits.get(key) or changes.bit(key)))
+
+    if record is None: return _track
+
+    def _track_record(self, key):
+        _track(self, key)
+        record(self, key)
+
+    return _track_record
+
+
+def _hooked_setattr(_orig__setattr__, after_write):
+    """Return a :meth:`__setattr__` that only tracks or observes writes.
+
+    Used for classes decorated with ``track_changes`` or ``observable`` while
+    restrictions are turned off by :func:`configure`.
+
+    :param _orig__setattr__: Original :meth:`__setattr__` of the class
+    :type _orig__setattr__: function
+    :param after_write: Function made by :func:`_after_write_hook`
+    :type after_write: function
+    :rtype: function
+    """
+    def __setattr__(self, key, value):
+        _orig__setattr__(self, key, value)
+        after_write(self, key)
+
+    __setattr__._touketsu_orig__setattr__ = _orig__setattr__
+    __setattr__.__doc__ = _orig__setattr__.__doc__
+    return __setattr__
+
+
+def _change_index(obj, _fn):
+    """Return the bit index of the class of ``obj``.
+
+    :param obj: Instance of a class decorated with ``track_changes``
+    :type obj: object
+    :param _fn: Name of the caller, used in error messages
+    :type _fn: str
+    :rtype: :class:`_ChangeIndex`
+    """
+    changes = getattr(type(obj), "_touketsu_track", None)
+    if changes is None:
+        raise TypeError(f"{_fn}: {type(obj).__name__} is not decorated with "
+                        "track_changes")
+    return changes
+
+
+def changed_fields(obj):
+    """Return the names of the attributes assigned since the last checkpoint.
+
+    Attributes count as changed when assigned, even if the new value equals
+    the old one. Until :func:`checkpoint` is first called on ``obj``, all of
+    its instance attributes count as changed.
+
+    .. code:: python
+
+       from touketsu import changed_fields, checkpoint, nondynamic
+
+       @nondynamic(track_changes = True)
+       class book:
+
+           def __init__(self):
+               self.bid = 0.
+               self.ask = 0.
+
+       state = book()
+       checkpoint(state)
+       state.bid = 99.5
+       changed_fields(state)   # ("bid",)
+
+    :param obj: Instance of a class decorated with ``track_changes``
+    :type obj: object
+    :rtype: tuple
+    """
+    changes = _change_index(obj, changed_fields.__name__)
+    dirty = _dirty.get(obj)
+    if dirty is None: return _instance_items(obj)[0]
+    return changes.names_of(dirty)
+
+
+def checkpoint(obj):
+    """Forget the changed attributes of ``obj`` and return them.
+
+    After a checkpoint, :func:`changed_fields` returns the attributes assigned
+    since, e.g. to persist only those.
+
+    :param obj: Instance of a class decorated with ``track_changes``
+    :type obj: object
+    :returns: The names :func:`changed_fields` returned before the checkpoint
+    :rtype: tuple
+    """
+    _fn = checkpoint.__name__
+    changes = _change_index(obj, _fn)
+    dirty = _dirty.get(obj)
+    if dirty is None:
+        names = _instance_items(obj)[0]
+        # bits follow the attribute order if fields were not known in advance
+        for name in names: changes.bit(name)
+    else: names = changes.names_of(dirty)
+    if not _dirty.set(obj, 0):
+        raise TypeError(f"{_fn}: {type(obj).__name__} instances must be "
+                        "slotted or support weak references")
+    return names
+
+
+_InternInfo = namedtuple(
+    "InternInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+
+
+class _InternCache:
+    """Cache of the interned instances of a class decorated with ``interned``.
+
+    Maps keys made of the field values and their types to weak references to
+    instances, ordered from least to most recently used, so that e.g. ``1``,
+    ``1.0``, and ``True`` are interned separately. Entries are removed when
+    their instance is garbage collected, when the cache is full and a new
+    instance is added, or when they are looked up and their instance was
+    unrestricted, e.g. by :func:`thaw` or :func:`urt_method`, or no longer
+    matches its key, so a mutated instance is never returned for its old
+    values.
+
+    :param cls: Interned class
+    :type cls: type
+    :param maxsize: Maximum number of entries
+    :type maxsize: int
+    """
+    __slots__ = ("cls", "maxsize", "hits", "misses", "evictions", "refs",
+                 "getter")
+
+    def __init__(self, cls, maxsize):
+        self.cls = cls
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self.refs = {}
+        # attrgetter for the fields of cls, made once they are known
+        self.getter = None
+
+    def key(self, obj):
+        """Return the cache key of ``obj`` from its current field values.
+
+        :param obj: Instance of the interned class
+        :type obj: object
+        :rtype: tuple
+        """
+        values = self.getter(obj)
+        # the number of fields is fixed, so the types can simply be appended
+        return values + tuple(map(type, values))
+
+    def intern(self, obj):
+        """Return the interned instance equal to ``obj``, interning ``obj`` if
+        there is none.
+
+        :param obj: Initialized instance of the interned class
+        :type obj: object
+        :rtype: object
+        """
+        refs = self.refs
+        if self.getter is None:
+            fields = self.cls._touketsu_fields
+            if not fields: return obj
+            self.getter = _tuple_getter(fields)
+        key = self.key(obj)
+        try: ref = refs.pop(key, None)
+        except TypeError: return obj
+        if ref is not None:
+            cached = ref()
+            # unrestricted or mutated instances are dropped from the cache
+            if (cached is not None) and (id(cached) not in _thawed) and \
+                (not _in_context(id(cached))) and \
+                (self.key(cached) == key):
+                self.hits = self.hits + 1
+                # reinsert as most recently used
+                refs[key] = ref
+                return cached
+        self.misses = self.misses + 1
+        if len(refs) >= self.maxsize:
+            del refs[next(iter(refs))]
+            self.evictions = self.evictions + 1
+
+        # the entry is only removed if it still refers to the dead instance
+        def _remove(ref, key = key):
+            if refs.get(key) is ref: del refs[key]
+
+        refs[key] = weakref.ref(obj, _remove)
+        return obj
+
+
+def _add_interning(cls):
+    """Make calls to ``cls`` return instances interned in ``_touketsu_intern``.
+
+    The new :meth:`__new__` creates and initializes an instance of ``cls`` with
+    the decorated :meth:`__init__` before looking it up in the cache, and the
+    :meth:`__init__` called afterwards by :func:`type.__call__` does nothing
+    for instances of ``cls``. Subclass instances are neither initialized in
+    :meth:`__new__` nor interned.
+
+    :param cls: Class decorated with ``interned``
+    :type cls: type
+    :rtype: None
+    """
+    cache = cls._touketsu_intern
+    initialize = cls.__init__
+    # avoid calling an inherited interning __new__
+    orig_new = getattr(cls.__new__, "_touketsu_orig__new__", cls.__new__)
+
+    @wraps(initialize)
+    def _interned_init(self, *args, **kwargs):
+        if self.__class__ is not cls: initialize(self, *args, **kwargs)
+
+    # object.__new__ rejects extra arguments when __new__ is overridden
+    if orig_new is object.__new__:
+        def _new_instance(klass, *args, **kwargs):
+            return orig_new(klass)
+    else: _new_instance = orig_new
+
+    def __new__(klass, *args, **kwargs):
+        # avoid a call to _new_instance in the usual case
+        if orig_new is object.__new__: obj = orig_new(klass)
+        else: obj = orig_new(klass, *args, **kwargs)
+        if klass is not cls: return obj
+        initialize(obj, *args, **kwargs)
+        return cache.intern(obj)
+
+    __new__._touketsu_orig__new__ = _new_instance
+    cls.__init__ = _interned_init
+    cls.__new__ = staticmethod(__new__)
+
+
+def _intern_all(cls, objs):
+    """Return ``objs`` with each instance replaced by its interned instance.
+
+    Only instances of a class decorated with ``interned`` itself are interned.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param objs: Instances of ``cls``
+    :type objs: list
+    :rtype: list
+    """
+    cache = cls.__dict__.get("_touketsu_intern")
+    if cache is None: return objs
+    return [cache.intern(obj) for obj in objs]
+
+
+def intern_info(cls):
+    """Return statistics of the instance cache of an interned class.
 
-    .. note::
+    Like the ``cache_info`` method of functions decorated with
+    :func:`functools.lru_cache`. Hits and misses count calls to the class and
+    instances made in bulk, and evictions count entries removed because the
+    cache was full. Entries of garbage collected instances are removed without
+    being counted.
 
-       It is possible to tell which classes have been wrapped a decorator
-       returned by :func:`class_decorator_factory` because the decoration
-       process introduces additional class attributes prepended by 
-       ``_touketsu``. Using :func:`urt_class` on any of these decorated
-       classes undos the decoration and returns the class to its original
-       definition.
+    :param cls: Class decorated with ``interned``
+    :type cls: type
+    :returns: Named tuple with fields ``hits``, ``misses``, ``evictions``,
+        ``maxsize``, and ``currsize``.
+    :rtype: tuple
+    """
+    cache = cls.__dict__.get("_touketsu_intern")
+    if cache is None:
+        raise TypeError(f"{intern_info.__name__}: {cls.__name__} is not "
+                        "interned")
+    return _InternInfo(cache.hits, cache.misses, cache.evictions,
+                       cache.maxsize, len(cache.refs))
 
-    .. __: https://www.python.org/dev/peps/pep-0257/
 
-    :param dectype: The decorator type. Pass ``"immutable"`` to return a class
-        decorator that makes a class instance immutable or ``"nondynamic"`` to
-        make a class instance nondynamic.
-    :type dectype: str
-    :param docmod: How to modify the docstring of the class the returned
-        decorator is applied to. Either ``"brief"``, or ``"identity"``. The
-        default value is ``"brief"``.
-    :type docmod: str, optional
-    :returns: A class decorator that either makes disables dynamic attribute
-        creation for class instances or makes class instances immutable.
-    :type: function
+def intern_clear(cls):
+    """Clear the instance cache and statistics of an interned class.
+
+    Existing instances are unaffected, but new instances will no longer be
+    identical to them.
+
+    :param cls: Class decorated with ``interned``
+    :type cls: type
+    :rtype: None
     """
-    _fn = class_decorator_factory.__name__
-    # if dectype is not valid, raise error
-    if (dectype != "immutable") and (dectype != "nondynamic"):
-        raise ValueError(f"{_fn}: dectype must be \"immutable\" or "
-                         f"\"nondynamic\"")
+    cache = cls.__dict__.get("_touketsu_intern")
+    if cache is None:
+        raise TypeError(f"{intern_clear.__name__}: {cls.__name__} is not "
+                        "interned")
+    cache.refs.clear()
+    cache.hits = cache.misses = cache.evictions = 0
 
-    # decorator for a class
-    def wrapper(cls):
-        # raise TypeError if this is not a type or abc.ABCMeta
-        if cls.__class__ not in (type, ABCMeta):
-            raise TypeError(f"{_fn}: expected type or abc.ABCMeta, received "
-                            f"{type(cls)}")
-        # class attribute indicating restriction imposed by touketsu
-        cls._touketsu_restriction = None
-        # original class docstring, original class __init__ and __setattr__
-        cls._touketsu_orig__doc__ = cls.__doc__
-        _orig__init__ = cls.__init__
-        _orig__setattr__ = cls.__setattr__
-
-        # new __setattr__. note: we could just use object.__setattr__, but since
-        # self will have the _touketsu_orig__setattr__ pointing to the original
-        # __setattr__ of the class, we use that instead. this is useful if the
-        # class itself has an overriden __setattr__ method itself.
-        def _touketsu_restricted_setattr(self, key, value):
-            if self._touketsu_restriction == "immutable":
-                raise AttributeError("Immutable class instance")
-            elif (self._touketsu_restriction == "nondynamic") and \
-                (not hasattr(self, key)):
-                raise AttributeError("Nondynamic class instance")
-            # use original __setattr__; see _orig__setattr__
-            _orig__setattr__(self, key, value)
 
-        # wrapper for class __init__ method
-        def init_wrapper(init):
-            # for "well-behaved" decoration (don't lose signature and docstring)
-            @wraps(init)
-            def _init_wrapper(self, *args, **kwargs):
-                init(self, *args, **kwargs)
-                self._touketsu_restriction = dectype
+def _generated(func):
+    """Mark ``func`` as a method generated by :func:`class_decorator_factory`.
 
-            return _init_wrapper
-        
-        # perform docstring modification
-        classdocmod(cls, dectype, docmod = docmod)
-        # override __setattr__ and __init__ of class + preserve original
-        # signature. sphinx doesn't work well with functools.wraps.
-        cls.__setattr__ = _touketsu_restricted_setattr
-        # warn if the class doesn't override object __init__ method
-        try: cls.__init__.__signature__ = signature(cls.__init__)
-        except AttributeError:
-            warnings.warn("Class without __init__ decorated. object.__init__ "
-                          "signature will be displayed instead.")
-        cls.__init__ = init_wrapper(cls.__init__)
-        # bind original __init__ method to new __init__ so orig_init works
-        cls.__init__._touketsu_orig__init__ = _orig__init__
-        # bind original __setattr__ to new __setattr__
-        cls.__setattr__._touketsu_orig__setattr__ = _orig__setattr__
-        # retain original __setattr__ docstring, in case there was one
-        cls.__setattr__.__doc__ = _orig__setattr__.__doc__
-        # return class
-        return cls
+    Generated methods are removed from a class by :func:`urt_class`.
+
+    :param func: Function to mark
+    :type func: function
+    :returns: ``func``
+    :rtype: function
+    """
+    func._touketsu_generated = True
+    return func
+
+
+def _add_generated(cls, name, member):
+    """Set ``member`` as attribute ``name`` of ``cls`` unless ``cls`` has one.
+
+    Existing attributes, including inherited ones, are not overridden, so that
+    user-defined methods take precedence over generated ones.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param name: Attribute name
+    :type name: str
+    :param member: Generated method, possibly a :class:`classmethod`
+    :type member: object
+    :rtype: None
+    """
+    if not hasattr(cls, name): setattr(cls, name, member)
+
+
+def _instance_builder(cls, names, one = False):
+    """Return a function building instances of ``cls`` from rows of values.
+
+    The returned function takes an iterable of rows, each with one value per
+    name in ``names``, and returns a list of new instances of ``cls``. Neither
+    :meth:`__init__` nor :meth:`__setattr__` is called. Values are written
+    straight into the instance ``__dict__``, or through the slot descriptor for
+    names stored in slots. The function is generated once per ``cls`` and
+    ``names`` so the loop has no per-attribute calls or lookups.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param names: Instance attribute names
+    :type names: tuple
+    :param one: ``True`` to return a function taking a single row and returning
+        a single instance instead. Default ``False``.
+    :type one: bool, optional
+    :rtype: function
+    """
+    # builders are cached in the _touketsu_builders attribute of cls, which
+    # maps (names, one) to builders
+    cache = cls.__dict__.get("_touketsu_builders")
+    if cache is None:
+        cache = {}
+        setattr(cls, "_touketsu_builders", cache)
+    key = (names, one)
+    if key in cache: return cache[key]
+    # the interning __new__ would call __init__
+    new = getattr(cls.__new__, "_touketsu_orig__new__", cls.__new__)
+    namespace = {"new": new, "cls": cls}
+    # unpack rows into locals v0, v1, ...; a 1-tuple target needs a comma
+    targets = ", ".join(f"v{i}" for i in range(len(names))) or "_"
+    if len(names) == 1: targets = targets + ","
+    body = []
+    for i, name in enumerate(names):
+        descr = getattr(cls, name, None)
+        if isinstance(descr, MemberDescriptorType):
+            namespace[f"set{i}"] = descr.__set__
+            body.append(f"set{i}(obj, v{i})")
+        else: body.append(f"obj_dict[{name!r}] = v{i}")
+    if any(line.startswith("obj_dict") for line in body):
+        body.insert(0, "obj_dict = obj.__dict__")
+    if one:
+        lines = ["def build(row):", f"    {targets} = row",
+                 "    obj = new(cls)"]
+        lines += [f"    {line}" for line in body] + ["    return obj"]
+    else:
+        lines = ["def build(rows):", "    objs = []",
+                 "    append = objs.append", f"    for {targets} in rows:",
+                 "        obj = new(cls)"]
+        lines += [f"        {line}" for line in body]
+        lines += ["        append(obj)", "    return objs"]
+    exec("\n".join(lines), namespace)
+    cache[key] = namespace["build"]
+    return cache[key]
+
+
+def _check_names(cls, names):
+    """Raise :class:`ValueError` if ``names`` are not the fields of ``cls``.
+
+    If the fields of ``cls`` are not known yet, any names are accepted.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param names: Instance attribute names
+    :type names: tuple
+    :rtype: None
+    """
+    fields = cls._touketsu_fields
+    if (fields is not None) and (set(names) != set(fields)):
+        raise ValueError(f"{cls.__name__}: expected fields {fields}, got "
+                         f"{names}")
+
+
+@_generated
+def _from_columns(cls, **columns):
+    """Return instances of the class built from columns of attribute values.
+
+    Each keyword argument gives the values of the instance attribute with the
+    same name, one per instance, as a :class:`list`, :class:`tuple`,
+    :class:`array.array`, NumPy array, or other sequence. Arrays are converted
+    with their ``tolist`` method, so instances hold Python scalars. The
+    instances are built without calling :meth:`__init__` and are restricted
+    immediately.
+
+    :param columns: Attribute values by attribute name. If the fields of the
+        class are known, all of them must be given.
+    :returns: List of new instances.
+    :rtype: list
+    """
+    names = tuple(columns)
+    _check_names(cls, names)
+    cols = [col.tolist() if hasattr(col, "tolist") else col
+            for col in columns.values()]
+    if len(set(map(len, cols))) > 1:
+        raise ValueError(f"{cls.__name__}: columns must have equal length")
+    objs = _instance_builder(cls, names)(zip(*cols))
+    if cls._touketsu_deep: _deep_freeze_all(objs)
+    return _intern_all(cls, objs)
+
+
+@_generated
+def _from_records(cls, records):
+    """Return instances of the class built from records of attribute values.
+
+    The records are either all mappings from attribute names to values or all
+    sequences of values ordered like ``_touketsu_fields``. The instances are
+    built without calling :meth:`__init__` and are restricted immediately.
+
+    :param records: Iterable of records.
+    :type records: iterable
+    :returns: List of new instances.
+    :rtype: list
+    """
+    names = cls._touketsu_fields
+    if names is None:
+        raise TypeError(f"{cls.__name__}: fields unknown; pass fields to the "
+                        "decorator or create an instance first")
+    # kind of records is determined from the first one
+    records = iter(records)
+    first = next(records, None)
+    if first is None: return []
+    rows = chain((first,), records)
+    if isinstance(first, Mapping):
+        # itemgetter with a single item returns the item, not a tuple
+        if len(names) == 1: rows = ((rec[names[0]],) for rec in rows)
+        else: rows = map(itemgetter(*names), rows)
+    objs = _instance_builder(cls, names)(rows)
+    if cls._touketsu_deep: _deep_freeze_all(objs)
+    return _intern_all(cls, objs)
+
+
+@_generated
+def _copy(self):
+    """Return ``self`` if immutable, else a shallow copy.
+
+    Restricted immutable instances cannot change, so copying them is pointless.
+
+    :rtype: object
+    """
+    cls = type(self)
+    if (cls._touketsu_restriction == "immutable") and _is_restricted(self):
+        return self
+    return _new_with_state(cls, _instance_state(self))
+
+
+@_generated
+def _deepcopy(self, memo):
+    """Return ``self`` if deeply immutable, else a deep copy.
+
+    Deep copies are made without calling :meth:`__init__` and are interned if
+    the class is interned.
+
+    :param memo: Memo passed by :func:`copy.deepcopy`
+    :type memo: dict
+    :rtype: object
+    """
+    cls = type(self)
+    if cls._touketsu_deep and _is_restricted(self): return self
+    obj = _new_with_state(cls, {})
+    # register the copy first so that references back to self are preserved
+    memo[id(self)] = obj
+    for name, value in _instance_state(self).items():
+        object.__setattr__(obj, name, deepcopy(value, memo))
+    return _intern_all(cls, [obj])[0]
+
+
+_BUFFER_TYPES = frozenset((bytes, bytearray, memoryview))
+"Types of values :func:`_reduce_ex` may pickle as buffers."
+
+_PICKLE_METHODS = ("__reduce_ex__", "__reduce__", "__getstate__",
+                   "__setstate__", "__getnewargs__", "__getnewargs_ex__")
+"Methods whose presence means a class customizes pickling."
+
+
+def _thaw(value):
+    """Return ``value`` with read-only mappings replaced by :class:`dict`.
+
+    Used to pickle values frozen by :func:`_deep_freeze`, since
+    :class:`types.MappingProxyType` cannot be pickled.
+
+    :param value: Deeply frozen value
+    :type value: object
+    :rtype: object
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (tuple, frozenset)):
+        items = [_thaw(item) for item in value]
+        if all(a is b for a, b in zip(items, value)): return value
+        return _rebuild(value, items)
+    return value
+
+
+@_generated
+def _reduce_ex(self, protocol):
+    """Return a tuple for pickling the instance with :func:`_reconstruct`.
+
+    The instance attributes are pickled as a tuple of values and a tuple of
+    names, which is the tuple of fields of the class if possible so that it is
+    pickled once per :func:`pickle.dumps` call. With protocol 5, memoryviews
+    and large :class:`bytes` and :class:`bytearray` values are wrapped in
+    :class:`pickle.PickleBuffer` so they can be sent out-of-band. Memoryviews
+    are converted to :class:`bytes` for lower protocols.
+
+    :param protocol: Pickle protocol
+    :type protocol: int
+    :rtype: tuple
+    """
+    cls = type(self)
+    names, values = _instance_items(self)
+    if names == cls._touketsu_fields: names = cls._touketsu_fields
+    if cls._touketsu_deep: values = tuple(_thaw(value) for value in values)
+    # usually there are no buffers, which is checked without a Python loop
+    if _BUFFER_TYPES.isdisjoint(map(type, values)):
+        return _reconstruct, (cls, names, values)
+    # (index, type, memoryview format, memoryview shape) for buffers
+    buffers = []
+    for i, value in enumerate(values):
+        kind = type(value)
+        if kind is memoryview:
+            buffers.append((i, memoryview, value.format, value.shape))
+        elif ((kind is bytes) or (kind is bytearray)) and (protocol >= 5) and \
+            (len(value) >= _PICKLE_BUFFER_MIN_SIZE):
+            buffers.append((i, kind, None, None))
+    if not buffers: return _reconstruct, (cls, names, values)
+    values = list(values)
+    for i, kind, _, _ in buffers:
+        value = values[i]
+        if (kind is memoryview) and ((protocol < 5) or not value.contiguous):
+            values[i] = value.tobytes()
+        else: values[i] = PickleBuffer(value)
+    return _reconstruct, (cls, names, tuple(values), tuple(buffers))
+
+
+def _reconstruct(cls, names, values, buffers = ()):
+    """Return an instance of a decorated class unpickled from its values.
+
+    Values are written directly into the new instance like in ``from_records``,
+    without calling :meth:`__init__` or the restricted :meth:`__setattr__`.
+    Buffers are converted back to their original types, without copying
+    memoryviews.
+
+    :param cls: Decorated class
+    :type cls: type
+    :param names: Instance attribute names
+    :type names: tuple
+    :param values: Instance attribute values
+    :type values: tuple
+    :param buffers: Tuple of ``(index, type, format, shape)`` tuples giving the
+        type of each value that was pickled as a buffer. ``format`` and
+        ``shape`` are only used for memoryviews. Default ``()``.
+    :type buffers: tuple, optional
+    :rtype: object
+    """
+    if buffers:
+        values = list(values)
+        for i, kind, fmt, shape in buffers:
+            value = values[i]
+            if kind is memoryview:
+                value = memoryview(value)
+                if (value.format != fmt) or (value.shape != shape):
+                    value = value.cast("B").cast(fmt, shape)
+            # out-of-band buffers can be any object supporting the protocol
+            elif not isinstance(value, kind): value = kind(value)
+            values[i] = value
+    # inlined lookup of the cached builder, as this runs once per instance
+    builders = cls.__dict__.get("_touketsu_builders")
+    build = None if builders is None else builders.get((names, True))
+    if build is None: build = _instance_builder(cls, names, one = True)
+    obj = build(values)
+    if cls._touketsu_deep: _deep_freeze(obj, {})
+    cache = cls.__dict__.get("_touketsu_intern")
+    return obj if cache is None else cache.intern(obj)
+
+
+@_generated
+def _getstate(self):
+    """Return the instance attributes as a :class:`dict`.
+
+    :rtype: dict
+    """
+    return _instance_state(self)
+
+
+@_generated
+def _setstate(self, state):
+    """Set instance attributes from a :class:`dict` bypassing restrictions.
+
+    Also accepts the ``(dict_state, slot_state)`` tuples made by the default
+    pickling of instances with slots.
+
+    :param state: Instance attribute values by name
+    :type state: dict or tuple
+    :rtype: None
+    """
+    if isinstance(state, tuple):
+        state = dict(chain.from_iterable(part.items() for part in state
+                                         if part))
+    for name, value in state.items(): object.__setattr__(self, name, value)
 
-    # return decorator
-    return wrapper
+
+def _view_class(cls, getters, **attrs):
+    """Return a subclass of ``cls`` whose instances are read-only views.
+
+    Views store only their position, e.g. an offset or a row index, in the
+    ``_touketsu_pos`` slot, and each field is a read-only property computing
+    its value with the matching getter. Methods of ``cls`` therefore work on
+    views, which are instances of ``cls``. Views are pickled, deep copied, and
+    evolved into ordinary instances of ``cls``. New views are made with the
+    ``_touketsu_make`` static method of the returned class, which takes the
+    position.
+
+    :param cls: Immutable decorated class
+    :type cls: type
+    :param getters: Maps each field name to a function taking a view and
+        returning the field value.
+    :type getters: dict
+    :param attrs: Additional class attributes, e.g. objects views keep alive.
+    :rtype: type
+    """
+    names = tuple(getters)
+    namespace = {"__slots__": ("_touketsu_pos",), "__module__": cls.__module__,
+                 "__doc__": cls.__doc__}
+    namespace.update((name, property(get)) for name, get in getters.items())
+    # fields are read through the properties, see _instance_items
+    getter = _tuple_getter(names)
+    namespace["_touketsu_layout"] = (names, getter, False)
+    # the class evolve creates instances of
+    namespace["_touketsu_view_of"] = cls
+    namespace.update(attrs)
+    view = type(f"{cls.__name__}_view", (cls,), namespace)
+    deep = cls._touketsu_deep
+    new = object.__new__
+
+    def _touketsu_make(pos):
+        obj = new(view)
+        object.__setattr__(obj, "_touketsu_pos", pos)
+        return obj
+
+    def __reduce_ex__(self, protocol):
+        values = getter(self)
+        if deep: values = tuple(_thaw(value) for value in values)
+        return _reconstruct, (cls, names, values)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(_reconstruct(cls, names, getter(self)), memo)
+
+    view._touketsu_make = staticmethod(_touketsu_make)
+    view.__reduce_ex__ = __reduce_ex__
+    view.__deepcopy__ = __deepcopy__
+    return view
+
+
+def evolve(obj, **changes):
+    """Return a copy of a decorated class instance with some attributes changed.
+
+    The copy is made without calling :meth:`__init__` and shares the values of
+    all unchanged attributes with ``obj``, so it is cheap even for large
+    instances. Changed values of deeply immutable classes are frozen, and the
+    copy is interned if the class is interned.
+
+    .. code:: python
+
+       conf = config("prod", timeout = 5)
+       slow = evolve(conf, timeout = 30)
+
+    :param obj: Instance of a class decorated by a decorator returned by
+        :func:`class_decorator_factory`
+    :type obj: object
+    :param changes: New attribute values by name. The names must be instance
+        attributes of ``obj`` or fields of its class.
+    :returns: New restricted instance of the same class as ``obj``.
+    :rtype: object
+    """
+    _fn = evolve.__name__
+    # views, see _view_class, evolve into the class they are views of
+    cls = getattr(type(obj), "_touketsu_view_of", type(obj))
+    if not hasattr(cls, "_touketsu_restriction"):
+        raise TypeError(f"{_fn}: {cls.__name__} is not a touketsu decorated "
+                        "class")
+    state = _instance_state(obj)
+    unknown = set(changes).difference(state, cls._touketsu_fields or ())
+    if unknown:
+        raise ValueError(f"{_fn}: unknown attributes {sorted(unknown)}")
+    if cls._touketsu_deep:
+        memo = {}
+        changes = {name: _deep_freeze_value(value, memo)
+                   for name, value in changes.items()}
+    state.update(changes)
+    return _intern_all(cls, [_new_with_state(cls, state)])[0]
 
 
 def urt_class(cls):
@@ -149,6 +2274,16 @@ def urt_class(cls):
         except AttributeError:
             warnings.warn("Unable to delete _touketsu_restriction; likely a "
                           "superclass attribute")
+    # delete instance attribute names if cls was itself decorated
+    if "_touketsu_fields" in cls.__dict__: delattr(cls, "_touketsu_fields")
+    if "_touketsu_deep" in cls.__dict__: delattr(cls, "_touketsu_deep")
+    if "_touketsu_intern" in cls.__dict__: delattr(cls, "_touketsu_intern")
+    for name in ("_touketsu_mode", "_touketsu_sample", "_touketsu_order",
+                 "_touketsu_track", "_touketsu_batch", "_touketsu_init"):
+        if name in cls.__dict__: delattr(cls, name)
+    # delete caches of instance builders and slot names
+    for name in ("_touketsu_builders", "_touketsu_layout"):
+        if name in cls.__dict__: delattr(cls, name)
     # restore original docstring if necessary and delete _touketsu_orig__doc__
     # note we do delattr before doc assignment since this may be the superclass
     # __doc__, which we do not want
@@ -167,6 +2302,20 @@ def urt_class(cls):
     # override __setattr__ with original __setattr__ if necessary
     if hasattr(cls.__setattr__, "_touketsu_orig__setattr__"):
         cls.__setattr__ = cls.__setattr__._touketsu_orig__setattr__
+    # replace interning __new__ with the one it wraps. deleting it instead would
+    # not restore object.__new__ handling of __init__ arguments
+    _new = getattr(cls.__dict__.get("__new__"), "__func__", None)
+    if hasattr(_new, "_touketsu_orig__new__"):
+        cls.__new__ = staticmethod(_new._touketsu_orig__new__)
+    # remove methods added by the decorator and unwrap methods it wrapped
+    for name, member in list(cls.__dict__.items()):
+        if hasattr(getattr(member, "__func__", member), "_touketsu_generated"):
+            delattr(cls, name)
+        # wrappers of inherited methods are removed instead of unwrapped
+        elif hasattr(member, "_touketsu_batched"):
+            delattr(cls, name)
+            if getattr(cls, name, None) is not member.__wrapped__:
+                setattr(cls, name, member.__wrapped__)
     # return class
     return cls
 
@@ -208,6 +2357,16 @@ def urt_method(meth):
     instance attributes. The :func:`classmethod` ``a_class_method`` also does
     not need to be decorated since ``touketsu`` restrictions only apply to class
     *instances*, not the classes themselves.
+
+    The restriction is only lifted for the calling thread or asyncio task, so
+    other threads or tasks using the same instance while ``meth`` is executing
+    still see the instance as restricted.
+
+    Coroutine functions, i.e. ``async def`` methods, generator functions, and
+    asynchronous generator functions are also supported. The restriction is
+    lifted while the body of the method executes, across ``await`` points only
+    for the task running the coroutine, and is reapplied whenever a generator
+    yields control back to its consumer.
     
     :param meth: An unbound instance method
     :type meth: function
@@ -215,23 +2374,30 @@ def urt_method(meth):
         modification and creation during its execution.
     :rtype: function
     """
+    # nothing to lift when restrictions are off
+    if _settings.mode == "off":
+        meth.is_urt_method = True
+        return meth
+    # coroutines, generators, and async generators need their own wrappers
+    if iscoroutinefunction(meth): return _urt_coroutine_method(meth)
+    if isasyncgenfunction(meth): return _urt_asyncgen_method(meth)
+    if isgeneratorfunction(meth): return _urt_generator_method(meth)
+
     # wrapper for the method
     @wraps(meth)
     def meth_wrapper(obj, *args, **kwargs):
-        # temporarily unrestrict class instance
-        restriction = obj._touketsu_restriction
-        object.__setattr__(obj, "_touketsu_restriction", None)
-        # note try-catch since if an exception is thrown and not caught the
+        # temporarily unrestrict class instance in the current context. the
+        # call is synchronous, so the id is added to the set in place instead
+        # of setting a copy with _unrestrict, see _unrestricted
+        ids = _unrestricted.get()
+        key = id(obj)
+        if ids.thread != get_ident(): ids = _context_ids()
+        elif key in ids: return meth(obj, *args, **kwargs)
+        ids.add(key)
+        # note try-finally since if an exception is thrown and not caught the
         # restriction will not be reapplied
-        try:
-            res = meth(obj, *args, **kwargs)
-            # restore original restriction (don't need object.__setattr__)
-            obj._touketsu_restriction = restriction
-            return res
-        except Exception as e:
-            # restore restriction and raise (don't need object.__setattr__)
-            obj._touketsu_restriction = restriction
-            raise e
+        try: return meth(obj, *args, **kwargs)
+        finally: ids.discard(key)
 
     # make it identifiable as an urt_method
     meth_wrapper.is_urt_method = True
@@ -239,11 +2405,261 @@ def urt_method(meth):
     return meth_wrapper
 
 
+class unrestricted:
+    """Context manager that lifts the restriction of an instance in a block.
+
+    Use :class:`unrestricted` to make many writes to an instance of a decorated
+    class without writing a method decorated with :func:`urt_method` or
+    calling :meth:`object.__setattr__` manually. For example, if ``state`` is
+    an immutable instance,
+
+    .. code:: python
+
+       from touketsu import unrestricted
+
+       with unrestricted(state) as s:
+           s.bid = 100.25
+           s.ask = 100.5
+           s.ticks = s.ticks + 1
+
+    The restriction is lifted once when the block is entered and reapplied when
+    the block is exited, even if an exception is raised. Like
+    :func:`urt_method`, the restriction is only lifted for the current thread
+    or asyncio task. :class:`batch_update` is an alias.
+
+    :param obj: Instance of a decorated class.
+    :type obj: object
+    """
+    __slots__ = ("_obj", "_token", "_batch")
+
+    def __init__(self, obj):
+        self._obj = obj
+        self._token = None
+        self._batch = None
+
+    def __enter__(self):
+        self._token = _unrestrict(self._obj)
+        # writes to observable instances are coalesced until the block exits
+        batch = getattr(type(self._obj), "_touketsu_batch", None)
+        if batch is not None:
+            self._batch = batch()
+            self._batch.__enter__()
+        return self._obj
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _restrict(self._token)
+        self._token = None
+        if self._batch is not None:
+            batch, self._batch = self._batch, None
+            batch.__exit__(exc_type, exc_value, traceback)
+        return False
+
+
+batch_update = unrestricted
+
+
+def _check_decorated(obj, _fn):
+    """Raise :class:`TypeError` unless the class of ``obj`` is decorated.
+
+    :param obj: Class instance
+    :type obj: object
+    :param _fn: Name of the calling function, used in the error message
+    :type _fn: str
+    :rtype: None
+    """
+    if getattr(type(obj), "_touketsu_restriction", None) is None:
+        raise TypeError(f"{_fn}: {type(obj).__name__} is not a decorated "
+                        "class")
+
+
+class _thaw_ref(weakref.ref):
+    """Weak reference to an instance that knows its key in :data:`_thawed` or
+    :data:`_initialized`."""
+    __slots__ = ("key",)
+
+
+def _unthaw(ref):
+    """Remove the entry of a collected thawed instance from :data:`_thawed`.
+
+    :param ref: Weak reference to the collected instance
+    :type ref: :class:`_thaw_ref`
+    :rtype: None
+    """
+    if _thawed.get(ref.key) is ref: del _thawed[ref.key]
+
+
+def thaw(obj):
+    """Lift the restriction of an instance of a decorated class until frozen.
+
+    Unlike :func:`urt_class`, which changes the class and so affects all its
+    instances and invalidates CPython's per-type attribute cache, only ``obj``
+    is affected and its class is left untouched, so attribute and method
+    lookups on other instances are as fast as before. Unlike
+    :class:`unrestricted`, the restriction is lifted in all threads and asyncio
+    tasks until :func:`freeze` is called. Thawing takes constant time.
+
+    .. code:: python
+
+       from touketsu import freeze, thaw
+
+       thaw(state)
+       state.bid = 100.25
+       freeze(state)
+
+    .. note::
+
+       Thawed instances that do not support weak references, e.g. slotted
+       instances without a ``__weakref__`` slot, are kept alive until they are
+       frozen again.
+
+    :param obj: Instance of a decorated class
+    :type obj: object
+    :returns: ``obj``
+    :rtype: object
+    """
+    _check_decorated(obj, thaw.__name__)
+    key = id(obj)
+    if key in _thawed: return obj
+    try: _thawed[key] = _thaw_ref(obj, _unthaw)
+    except TypeError: _thawed[key] = obj
+    else: _thawed[key].key = key
+    return obj
+
+
+def freeze(obj):
+    """Reapply the restriction of an instance lifted by :func:`thaw`.
+
+    Containers assigned to a thawed instance of a deeply immutable class are
+    frozen again, and a cached hash computed by a generated :meth:`__hash__` and
+    a cached sort key are discarded, as the fields may have changed. Freezing an
+    instance that is not thawed has no effect.
+
+    :param obj: Instance of a decorated class
+    :type obj: object
+    :returns: ``obj``
+    :rtype: object
+    """
+    # only instances of decorated classes can be thawed
+    if _thawed.pop(id(obj), None) is None:
+        _check_decorated(obj, freeze.__name__)
+        return obj
+    cls = type(obj)
+    if getattr(cls, "_touketsu_deep", False): _deep_freeze(obj, {})
+    if hasattr(cls.__hash__, "_touketsu_generated"): _hashes.discard(obj)
+    if getattr(cls, "_touketsu_order", None) is not None:
+        _sort_keys.discard(obj)
+    return obj
+
+
+def is_frozen(obj):
+    """Return ``True`` if ``obj`` is a restricted instance of a decorated class.
+
+    Returns ``False`` for thawed instances, instances being initialized or
+    whose restriction is lifted in the current context, e.g. by
+    :class:`unrestricted`, and objects that are not instances of decorated
+    classes.
+
+    :param obj: Any object
+    :type obj: object
+    :rtype: bool
+    """
+    return _is_restricted(obj)
+
+
+def _urt_coroutine_method(meth):
+    """:func:`urt_method` for coroutine functions.
+
+    The restriction is lifted in the context of the task running the returned
+    coroutine, so it persists across ``await`` points for that task only. Like
+    an :class:`unrestricted` block, writes to observable instances are
+    coalesced until the coroutine returns.
+
+    :param meth: An unbound instance method defined with ``async def``
+    :type meth: function
+    :rtype: function
+    """
+    @wraps(meth)
+    async def meth_wrapper(obj, *args, **kwargs):
+        with unrestricted(obj): return await meth(obj, *args, **kwargs)
+
+    meth_wrapper.is_urt_method = True
+
+    return meth_wrapper
+
+
+def _urt_generator_method(meth):
+    """:func:`urt_method` for generator functions.
+
+    The wrapped generator is driven step by step, lifting the restriction only
+    while its body runs, since the body runs in the consumer's context. Each
+    step runs in an :class:`unrestricted` block, so writes to observable
+    instances are coalesced until the step yields.
+
+    :param meth: An unbound instance method that is a generator function
+    :type meth: function
+    :rtype: function
+    """
+    @wraps(meth)
+    def meth_wrapper(obj, *args, **kwargs):
+        gen = meth(obj, *args, **kwargs)
+        resume, arg = gen.send, None
+        while True:
+            with unrestricted(obj):
+                try: item = resume(arg)
+                except StopIteration as e: return e.value
+            # forward sent values and thrown exceptions to gen
+            try: arg = yield item
+            except GeneratorExit:
+                with unrestricted(obj): gen.close()
+                raise
+            except BaseException as e: resume, arg = gen.throw, e
+            else: resume = gen.send
+
+    meth_wrapper.is_urt_method = True
+
+    return meth_wrapper
+
+
+def _urt_asyncgen_method(meth):
+    """:func:`urt_method` for asynchronous generator functions.
+
+    Like :func:`_urt_generator_method`, the restriction is only lifted, and
+    writes to observable instances coalesced, while the body of the
+    asynchronous generator runs, including its ``await`` points, and not
+    while the consumer holds a yielded value.
+
+    :param meth: An unbound instance method that is an async generator function
+    :type meth: function
+    :rtype: function
+    """
+    @wraps(meth)
+    async def meth_wrapper(obj, *args, **kwargs):
+        agen = meth(obj, *args, **kwargs)
+        resume, arg = agen.asend, None
+        while True:
+            with unrestricted(obj):
+                try: item = await resume(arg)
+                except StopAsyncIteration: return
+            # forward sent values and thrown exceptions to agen
+            try: arg = yield item
+            except GeneratorExit:
+                with unrestricted(obj): await agen.aclose()
+                raise
+            except BaseException as e: resume, arg = agen.athrow, e
+            else: resume = agen.asend
+
+    meth_wrapper.is_urt_method = True
+
+    return meth_wrapper
+
+
 def orig_init(init):
     """Return original :meth:`__init__` from decorated :meth:`__init__`.
 
     If ``init`` is not the :meth:`__init__` of a decorated class, then ``init``
-    itself is returned.
+    itself is returned. Decorated subclasses do not need :func:`orig_init`, as
+    only their outermost decorated :meth:`__init__` call restricts an instance,
+    so they may call ``super().__init__()`` as usual.
 
     :param init: The unbound :meth:`__init__` of the decorated class.
     :type init: function
@@ -263,7 +2679,22 @@ def orig_init(init):
     raise TypeError("{0}: init must be a method or function".format(_fn))
 
 
-def immutable(cls):
+def _decorate(decorator, cls = None):
+    """Apply ``decorator`` to ``cls``, or return ``decorator`` if no ``cls``.
+
+    Allows :func:`immutable` and friends to be used with or without arguments.
+
+    :param decorator: Class decorator from :func:`class_decorator_factory`.
+    :type decorator: function
+    :param cls: The class to decorate, default ``None``.
+    :type cls: type, optional
+    :rtype: type or function
+    """
+    if cls is None: return decorator
+    return decorator(cls)
+
+
+def immutable(cls = None, **kwargs):
     """Makes a class immutable and modifies the class docstring.
 
     Equivalent to :func:`class_decorator_factory` with ``dectype = "immutable"``
@@ -276,16 +2707,49 @@ def immutable(cls):
        :func:`urt_class` first to return the class to its original state before
        applying :func:`immutable`.
 
-    :param cls: The class to decorate.
-    :type cls: type
+    :param cls: The class to decorate. If omitted, a decorator is returned, so
+        keyword arguments can be passed, e.g. ``@immutable(slots = True)``.
+    :type cls: type, optional
+    :param kwargs: Keyword arguments passed to :func:`class_decorator_factory`,
+        e.g. ``fields`` or ``slots``.
     :returns: A decorated version of the original class with immutable
         instances.
     :rtype: type
     """
-    return class_decorator_factory("immutable", "brief")(cls)
+    decorator = class_decorator_factory("immutable", "brief", **kwargs)
+    return _decorate(decorator, cls)
 
 
-def identity_immutable(cls):
+def deep_immutable(cls = None, **kwargs):
+    """Makes a class and the containers held by its instances immutable.
+
+    Equivalent to :func:`class_decorator_factory` with
+    ``dectype = "immutable"``, ``docmod = "brief"``, and ``deep = True``.
+    Lists, dicts, and sets assigned to instance attributes in :meth:`__init__`
+    are converted to tuples, read-only mappings, and frozensets, so instances
+    can be shared without defensive copies.
+
+    .. note::
+
+       Do not apply to a previously decorated class. Instead, use
+       :func:`urt_class` first to return the class to its original state before
+       applying :func:`deep_immutable`.
+
+    :param cls: The class to decorate. If omitted, a decorator is returned, so
+        keyword arguments can be passed, e.g. ``@deep_immutable(slots = True)``.
+    :type cls: type, optional
+    :param kwargs: Keyword arguments passed to :func:`class_decorator_factory`,
+        e.g. ``fields`` or ``slots``.
+    :returns: A decorated version of the original class with deeply immutable
+        instances.
+    :rtype: type
+    """
+    decorator = class_decorator_factory("immutable", "brief", deep = True,
+                                        **kwargs)
+    return _decorate(decorator, cls)
+
+
+def identity_immutable(cls = None, **kwargs):
     """Makes a class immutable without modifying the class docstring.
 
     .. caution::
@@ -300,16 +2764,21 @@ def identity_immutable(cls):
        :func:`urt_class` first to return the class to its original state before
        applying :func:`identity_immutable`.
 
-    :param cls: The class to decorate.
-    :type cls: type
+    :param cls: The class to decorate. If omitted, a decorator is returned, so
+        keyword arguments can be passed, e.g.
+        ``@identity_immutable(slots = True)``.
+    :type cls: type, optional
+    :param kwargs: Keyword arguments passed to :func:`class_decorator_factory`,
+        e.g. ``fields`` or ``slots``.
     :returns: A decorated version of the original class with immutable
         instances.
     :rtype: type
     """
-    return class_decorator_factory("immutable", "identity")(cls)
+    decorator = class_decorator_factory("immutable", "identity", **kwargs)
+    return _decorate(decorator, cls)
 
 
-def nondynamic(cls):
+def nondynamic(cls = None, **kwargs):
     """Makes a class nondynamic and modifies the class docstring.
 
     Equivalent to :func:`class_decorator_factory` with
@@ -322,16 +2791,20 @@ def nondynamic(cls):
        :func:`urt_class` first to return the class to its original state before
        applying :func:`nondynamic`.
 
-    :param cls: The class to decorate.
-    :type cls: type
+    :param cls: The class to decorate. If omitted, a decorator is returned, so
+        keyword arguments can be passed, e.g. ``@nondynamic(slots = True)``.
+    :type cls: type, optional
+    :param kwargs: Keyword arguments passed to :func:`class_decorator_factory`,
+        e.g. ``fields`` or ``slots``.
     :returns: A decorated version of the original class with immutable
         instances.
     :rtype: type
     """
-    return class_decorator_factory("nondynamic", "brief")(cls)
+    decorator = class_decorator_factory("nondynamic", "brief", **kwargs)
+    return _decorate(decorator, cls)
 
 
-def identity_nondynamic(cls):
+def identity_nondynamic(cls = None, **kwargs):
     """Makes a class nondynamic without modifying the class docstring.
 
     .. caution::
@@ -346,10 +2819,15 @@ def identity_nondynamic(cls):
        :func:`urt_class` first to return the class to its original state before
        applying :func:`identity_nondynamic`.
 
-    :param cls: The class to decorate.
-    :type cls: type
+    :param cls: The class to decorate. If omitted, a decorator is returned, so
+        keyword arguments can be passed, e.g.
+        ``@identity_nondynamic(slots = True)``.
+    :type cls: type, optional
+    :param kwargs: Keyword arguments passed to :func:`class_decorator_factory`,
+        e.g. ``fields`` or ``slots``.
     :returns: A decorated version of the original class with immutable
         instances.
     :rtype: type
     """
-    return class_decorator_factory("nondynamic", "identity")(cls)
\ No newline at end of file
+    decorator = class_decorator_factory("nondynamic", "identity", **kwargs)
+    return _decorate(decorator, cls)
\ No newline at end of file
@@ -0,0 +1,338 @@
+__doc__ = """Change notifications of ``touketsu`` nondynamic instances.
+
+Every write to an instance of a class decorated with ``observable = True``
+goes through its restricted :meth:`__setattr__`, which records the assigned
+name. Writes made in a :class:`batch` block, in a method decorated with
+:func:`~touketsu.core.urt_method`, or in a
+:class:`~touketsu.core.unrestricted` block are coalesced, so that each
+subscriber gets one :class:`change` per instance when the outermost window
+closes, instead of one per write. Other writes are delivered at once.
+"""
+
+import asyncio
+from collections import namedtuple
+from contextvars import ContextVar
+from functools import wraps
+from inspect import (isasyncgenfunction, iscoroutinefunction,
+                     isgeneratorfunction)
+import weakref
+
+change = namedtuple("change", ("obj", "fields"))
+change.__doc__ = """Change notification of an observable instance.
+
+:param obj: Instance whose attributes were assigned
+:type obj: object
+:param fields: Names of the assigned attributes, in order of first assignment
+:type fields: tuple
+"""
+
+_window = ContextVar("_window", default = None)
+"""Writes coalesced in the current batch window, or ``None`` outside one.
+
+Maps the :func:`id` of each written instance to the instance and a
+:class:`dict` whose keys are the assigned names, in order.
+"""
+
+_class_subs = {}
+"Subscriptions of observable classes, by class."
+
+_type_subs = {}
+"""Class subscriptions applying to instances of each type, including those of
+base classes. Cleared whenever a class subscription is made or cancelled."""
+
+_instance_subs = {}
+"""Subscriptions of single instances, by instance :func:`id`, as
+``(finalizer, subscriptions)`` pairs, removed when the instance dies."""
+
+_n_subs = 0
+"Number of live subscriptions, so that writes are not recorded without any."
+
+
+class subscription:
+    """Handle of a subscription made by :func:`subscribe`.
+
+    Calling :meth:`cancel` or leaving a ``with`` block using the handle ends
+    the subscription.
+
+    :param target: Observable class or instance
+    :type target: type or object
+    :param callback: Function called with each :class:`change`, or ``None``
+    :type callback: function
+    :param queue: :class:`asyncio.Queue` receiving each :class:`change`, or
+        ``None``
+    :type queue: :class:`asyncio.Queue`
+    """
+    __slots__ = ("_key", "_callback", "_queue", "_loop", "__weakref__")
+
+    def __init__(self, target, callback, queue):
+        # subscriptions are stored under the class or the instance id
+        self._key = target if isinstance(target, type) else id(target)
+        self._callback = callback
+        self._queue = queue
+        # queues are filled from the loop they were subscribed on, so writes
+        # in other threads are delivered with call_soon_threadsafe
+        try: self._loop = asyncio.get_running_loop()
+        except RuntimeError: self._loop = None
+
+    @property
+    def active(self):
+        "``True`` until the subscription is cancelled."
+        return self._key is not None
+
+    def cancel(self):
+        "End the subscription. Cancelling it again has no effect."
+        global _n_subs
+        key, self._key = self._key, None
+        if key is None: return
+        _n_subs = _n_subs - 1
+        if isinstance(key, type):
+            subs = _class_subs.get(key, ())
+            if self in subs: subs.remove(self)
+            if not subs: _class_subs.pop(key, None)
+            _type_subs.clear()
+            return
+        finalizer, subs = _instance_subs.get(key, (None, ()))
+        if self in subs: subs.remove(self)
+        if (finalizer is not None) and not subs:
+            finalizer.detach()
+            del _instance_subs[key]
+
+    def _send(self, event):
+        """Deliver ``event`` to the callback or queue of the subscription.
+
+        :param event: Change notification
+        :type event: :class:`change`
+        """
+        if self._callback is not None:
+            self._callback(event)
+            return
+        loop = self._loop
+        if (loop is not None) and not loop.is_closed():
+            try: running = asyncio.get_running_loop()
+            except RuntimeError: running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(self._queue.put_nowait, event)
+                return
+        self._queue.put_nowait(event)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cancel()
+        return False
+
+    def __repr__(self):
+        state = "active" if self.active else "cancelled"
+        return f"<{type(self).__name__} {state}>"
+
+
+def subscribe(target, callback = None, queue = None):
+    """Subscribe to the changes of an observable class or instance.
+
+    Subscribing to a class observes all of its instances, including instances
+    of subclasses. Each notification is a :class:`change` naming the instance
+    and the attributes assigned to it, coalesced over the batch window the
+    writes were made in.
+
+    .. code:: python
+
+       from touketsu import nondynamic, subscribe
+
+       @nondynamic(observable = True)
+       class book:
+
+           def __init__(self):
+               self.bid = 0.
+               self.ask = 0.
+
+       with subscribe(book, print):
+           state = book()
+           state.bid = 99.5    # change(obj=..., fields=('bid',)) is printed
+
+    :param target: Class decorated with ``observable = True``, or an instance
+        of one, which must be weak referenceable
+    :type target: type or object
+    :param callback: Function called synchronously with each :class:`change`
+        when its window closes. Exceptions it raises propagate to the writer.
+    :type callback: function, optional
+    :param queue: Queue to put each :class:`change` into instead, with
+        :meth:`~asyncio.Queue.put_nowait`. If :func:`subscribe` is called in
+        a running event loop, changes made in other threads are put into the
+        queue from that loop.
+    :type queue: :class:`asyncio.Queue`, optional
+    :rtype: :class:`subscription`
+    """
+    global _n_subs
+    _fn = subscribe.__name__
+    if (callback is None) == (queue is None):
+        raise ValueError(f"{_fn}: pass exactly one of callback and queue")
+    cls = target if isinstance(target, type) else type(target)
+    if getattr(cls, "_touketsu_batch", None) is None:
+        raise TypeError(f"{_fn}: {cls.__name__} is not decorated with "
+                        "observable")
+    sub = subscription(target, callback, queue)
+    if isinstance(target, type):
+        _class_subs.setdefault(target, []).append(sub)
+        _type_subs.clear()
+    else:
+        key = id(target)
+        entry = _instance_subs.get(key)
+        if entry is None:
+            try: finalizer = weakref.finalize(target, _instance_subs.pop, key,
+                                              None)
+            except TypeError:
+                raise TypeError(f"{_fn}: {cls.__name__} instances must "
+                                "support weak references") from None
+            # an interpreter exiting with live instances needs no cleanup
+            finalizer.atexit = False
+            entry = _instance_subs[key] = (finalizer, [])
+        entry[1].append(sub)
+    _n_subs = _n_subs + 1
+    return sub
+
+
+class batch:
+    """Context manager coalescing change notifications in a block.
+
+    Changes made in the block are delivered when the block exits, one
+    :class:`change` per instance and subscriber, even if an exception is
+    raised. Nested windows, including those of
+    :func:`~touketsu.core.urt_method` calls and
+    :class:`~touketsu.core.unrestricted` blocks of observable instances, are
+    merged into the outermost one. Like :class:`~touketsu.core.unrestricted`,
+    the window only covers the current thread or asyncio task.
+
+    .. code:: python
+
+       from touketsu import batch
+
+       with batch():
+           for state in states:
+               state.bid, state.ask = quotes[state.venue]
+    """
+    __slots__ = ("_token",)
+
+    def __init__(self):
+        self._token = None
+
+    def __enter__(self):
+        if _window.get() is None: self._token = _window.set({})
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        token, self._token = self._token, None
+        if token is None: return False
+        pending = _window.get()
+        try: _window.reset(token)
+        # a coroutine closed by the garbage collector is finalized in whatever
+        # context is current, where the token is invalid and the window lost
+        except ValueError: return False
+        for obj, names in pending.values(): _deliver(obj, tuple(names))
+        return False
+
+
+def _deliver(obj, fields):
+    """Send a :class:`change` of ``obj`` to its subscribers.
+
+    :param obj: Observable instance
+    :type obj: object
+    :param fields: Names of the assigned attributes
+    :type fields: tuple
+    """
+    subs = _type_subs.get(type(obj))
+    if subs is None:
+        subs = _type_subs[type(obj)] = tuple(
+            sub for klass in type(obj).__mro__
+            for sub in _class_subs.get(klass, ())
+        )
+    entry = _instance_subs.get(id(obj))
+    if entry is not None: subs = subs + tuple(entry[1])
+    if not subs: return
+    event = change(obj, fields)
+    for sub in subs: sub._send(event)
+
+
+def _record(obj, key):
+    """Record the assignment of attribute ``key`` of an observable instance.
+
+    Called by the restricted :meth:`__setattr__` after each write.
+
+    :param obj: Observable instance
+    :type obj: object
+    :param key: Name of the assigned attribute
+    :type key: str
+    """
+    if not _n_subs: return
+    pending = _window.get()
+    if pending is None:
+        _deliver(obj, (key,))
+        return
+    entry = pending.get(id(obj))
+    if entry is None: pending[id(obj)] = (obj, {key: None})
+    else: entry[1][key] = None
+
+
+def _batched(meth):
+    """Return ``meth`` running in a :class:`batch` window.
+
+    Used for the methods decorated with :func:`~touketsu.core.urt_method`
+    of observable classes. Coroutine, generator, and asynchronous generator
+    methods are returned unchanged, as their wrappers already open a window
+    around the coroutine or each step of the generator.
+
+    :param meth: Method decorated with :func:`~touketsu.core.urt_method`
+    :type meth: function
+    :rtype: function
+    """
+    if iscoroutinefunction(meth) or isasyncgenfunction(meth) or \
+        isgeneratorfunction(meth):
+        return meth
+
+    @wraps(meth)
+    def _batched_meth(obj, *args, **kwargs):
+        # the logic of batch is inlined for speed. without subscriptions,
+        # writes are not recorded, so no window is needed.
+        if (not _n_subs) or (_window.get() is not None):
+            return meth(obj, *args, **kwargs)
+        token = _window.set({})
+        try: return meth(obj, *args, **kwargs)
+        finally:
+            pending = _window.get()
+            _window.reset(token)
+            for inst, names in pending.values(): _deliver(inst, tuple(names))
+
+    _batched_meth._touketsu_batched = True
+    return _batched_meth
+
+
+def _silenced(init):
+    """Return ``init`` reporting no changes of the instance it initializes.
+
+    The attributes of a new instance are not changes, so its writes are
+    recorded in a :class:`batch` window and dropped when ``init`` returns.
+    Attributes set on ``init``, e.g. ``_touketsu_orig__init__``, are copied.
+
+    :param init: :meth:`__init__` of an observable class
+    :type init: function
+    :rtype: function
+    """
+    @wraps(init)
+    def _silenced_init(self, *args, **kwargs):
+        if not _n_subs: return init(self, *args, **kwargs)
+        pending = _window.get()
+        if pending is not None:
+            try: init(self, *args, **kwargs)
+            finally: pending.pop(id(self), None)
+            return
+        token = _window.set({})
+        try: init(self, *args, **kwargs)
+        finally:
+            pending = _window.get()
+            _window.reset(token)
+            pending.pop(id(self), None)
+            for obj, names in pending.values(): _deliver(obj, tuple(names))
+
+    # lets urt_class unwrap it if restrictions are off
+    _silenced_init._touketsu_batched = True
+    return _silenced_init
@@ -0,0 +1,451 @@
+__doc__ = """Shared memory publication of ``touketsu`` immutable instances.
+
+Since immutable instances never change, they can be written once to a
+:class:`multiprocessing.shared_memory.SharedMemory` block with :func:`share`
+and read by many processes through the views returned by :func:`attach`,
+instead of sending a pickled copy to each process.
+"""
+
+from collections.abc import Sequence
+import pickle
+import struct
+from weakref import WeakValueDictionary
+
+try: from multiprocessing import shared_memory
+# multiprocessing.shared_memory requires Python 3.8
+except ImportError: shared_memory = None
+
+from .core import _deep_freeze_value, _instance_items, _thaw, _view_class
+
+_MAGIC = b"TKSH"
+"Bytes starting each shared memory block written by :func:`share`."
+
+_HEADER = struct.Struct("<4sQ")
+"Block header, the magic bytes followed by the size of the pickled metadata."
+
+_KIND_FORMATS = {"?": "?", "q": "q", "d": "d", "s": "QQ", "y": "QQ", "o": "QQ"}
+"""Struct format of each kind of field.
+
+``"?"``, ``"q"``, and ``"d"`` are :class:`bool`, :class:`int`, and
+:class:`float` values stored in the record. ``"s"``, ``"y"``, and ``"o"`` are
+:class:`str`, :class:`bytes`, and pickled values stored in the heap following
+the records, given by their offset into the heap and size.
+"""
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+_attached = WeakValueDictionary()
+"""View classes of the blocks attached to in this process by block name.
+
+Entries are removed once the view class and all its views are collected.
+"""
+
+
+def _field_kind(values):
+    """Return the kind of a field given all of its values.
+
+    See :data:`_KIND_FORMATS`. Fields whose values are of several types, or
+    ints that do not fit in 64 bits, are pickled.
+
+    :param values: Values of the field, one per instance
+    :type values: iterable
+    :rtype: str
+    """
+    kinds = set(map(type, values))
+    if len(kinds) != 1: return "o"
+    kind = kinds.pop()
+    if kind is bool: return "?"
+    if kind is int:
+        if all(_INT64_MIN <= value <= _INT64_MAX for value in values):
+            return "q"
+        return "o"
+    if kind is float: return "d"
+    if kind is str: return "s"
+    if kind is bytes: return "y"
+    return "o"
+
+
+class shared_block:
+    """Handle to a shared memory block written by :func:`share`.
+
+    Pass the handle, or its :attr:`name`, to :func:`attach` to read the shared
+    instances. The handle can be pickled and sent to other processes, which
+    then attach to the block without taking ownership of it. The process that
+    called :func:`share` should call :meth:`unlink` once the block is no longer
+    needed, or use the handle as a context manager, which closes and unlinks the
+    block on exit.
+
+    :param shm: Shared memory block
+    :type shm: :class:`multiprocessing.shared_memory.SharedMemory`
+    """
+    __slots__ = ("shm",)
+
+    def __init__(self, shm):
+        self.shm = shm
+
+    @property
+    def name(self):
+        "Name of the shared memory block."
+        return self.shm.name
+
+    @property
+    def size(self):
+        "Size of the shared memory block in bytes."
+        return self.shm.size
+
+    def close(self):
+        """Close this process's access to the shared memory block.
+
+        Views made by :func:`attach` use their own handle, so they remain
+        valid.
+        """
+        self.shm.close()
+
+    def unlink(self):
+        """Request that the shared memory block be destroyed.
+
+        The block is destroyed once all processes have closed it.
+        """
+        self.shm.unlink()
+
+    def __reduce__(self):
+        return _open_block, (self.shm.name,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        self.unlink()
+        return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name!r}, size={self.size})"
+
+
+def _open_block(name):
+    """Return a :class:`shared_block` for an existing block, without ownership.
+
+    Before Python 3.13, the block is registered with the resource tracker of
+    the calling process. This is harmless for child processes, which share the
+    tracker of their parent, but the tracker of an unrelated process destroys
+    the block when that process exits.
+
+    :param name: Name of the shared memory block
+    :type name: str
+    :rtype: :class:`shared_block`
+    """
+    # the track parameter was added in Python 3.13
+    try: shm = shared_memory.SharedMemory(name, track = False)
+    except TypeError: shm = shared_memory.SharedMemory(name)
+    return shared_block(shm)
+
+
+class shared_records(Sequence):
+    """Read-only sequence of views of instances in a shared memory block.
+
+    Returned by :func:`attach` for a list of instances. Views are created on
+    access, so attaching is cheap even for many instances.
+
+    :param view: View class, see :func:`_block_view_class`. The view class
+        keeps the memory holding the records alive.
+    :type view: type
+    :param start: Offset of the first record in the block
+    :type start: int
+    :param size: Size of each record
+    :type size: int
+    :param count: Number of records
+    :type count: int
+    """
+    __slots__ = ("_view", "_start", "_size", "_count")
+
+    def __init__(self, view, start, size, count):
+        self._view = view
+        self._start = start
+        self._size = size
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0: index = index + self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self._view._touketsu_make(self._start + index * self._size)
+
+    def __iter__(self):
+        make = self._view._touketsu_make
+        for offset in range(self._start, self._start + self._count * self._size,
+                            self._size):
+            yield make(offset)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}({self._view.__name__}, "
+                f"count={self._count}, "
+                f"block={self._view._touketsu_block.name!r})")
+
+
+def _block_view_class(cls, names, kinds, buf, heap, **attrs):
+    """Return a view class of ``cls`` whose instances read from ``buf``.
+
+    Each field is a read-only property unpacking its value from the record at
+    the view's position, its offset in the buffer. See
+    :func:`~touketsu.core._view_class`.
+
+    :param cls: Shared class
+    :type cls: type
+    :param names: Field names
+    :type names: tuple
+    :param kinds: Field kinds, see :data:`_KIND_FORMATS`
+    :type kinds: tuple
+    :param buf: Buffer holding the records, laid out by :func:`_pack`
+    :type buf: memoryview
+    :param heap: Offset of the heap in the buffer
+    :type heap: int
+    :param attrs: Additional class attributes, e.g. the object owning the
+        buffer, which the views keep alive.
+    :rtype: type
+    """
+    getters = {}
+    offset = 0
+    for name, kind in zip(names, kinds):
+        unpack = struct.Struct("<" + _KIND_FORMATS[kind]).unpack_from
+        getters[name] = _field_getter(buf, unpack, offset, kind, heap,
+                                      cls._touketsu_deep)
+        offset = offset + struct.calcsize("<" + _KIND_FORMATS[kind])
+    return _view_class(cls, getters, **attrs)
+
+
+def _field_getter(buf, unpack, offset, kind, heap, deep):
+    """Return the getter of a view property reading one field.
+
+    :param buf: Buffer holding the records
+    :type buf: memoryview
+    :param unpack: ``unpack_from`` method of the field's :class:`struct.Struct`
+    :type unpack: function
+    :param offset: Offset of the field in the record
+    :type offset: int
+    :param kind: Field kind, see :data:`_KIND_FORMATS`
+    :type kind: str
+    :param heap: Offset of the heap in the buffer
+    :type heap: int
+    :param deep: Whether the shared class is deeply immutable, in which case
+        pickled values are frozen again.
+    :type deep: bool
+    :rtype: function
+    """
+    if kind in ("?", "q", "d"):
+        def getter(self):
+            return unpack(buf, self._touketsu_pos + offset)[0]
+        return getter
+
+    def getter(self):
+        start, size = unpack(buf, self._touketsu_pos + offset)
+        data = buf[heap + start:heap + start + size]
+        if kind == "s": return str(data, "utf-8")
+        if kind == "y": return bytes(data)
+        value = pickle.loads(data)
+        return _deep_freeze_value(value, {}) if deep else value
+    return getter
+
+
+def share(objs):
+    """Write an immutable instance or a list of them to shared memory.
+
+    The instances must be of the same immutable decorated class and have the
+    same instance attributes. :class:`bool`, :class:`int`, :class:`float`,
+    :class:`str`, and :class:`bytes` values are stored directly, while values
+    of other types, including fields with values of several types, are stored
+    pickled and unpickled on access.
+
+    .. code:: python
+
+       from touketsu import attach, share
+
+       block = share(records)
+       # in other processes, given block or block.name
+       records = attach(block)
+
+    :param objs: Instance or list of instances to share
+    :type objs: object or list
+    :returns: Handle of the new shared memory block. The calling process owns
+        the block and should unlink it once it is no longer needed.
+    :rtype: :class:`shared_block`
+    """
+    _fn = share.__name__
+    if shared_memory is None:
+        raise ImportError(f"{_fn}: multiprocessing.shared_memory requires "
+                          "Python 3.8")
+    size, fill = _pack(objs, _MAGIC, _fn)
+    shm = shared_memory.SharedMemory(create = True, size = size)
+    fill(shm.buf)
+    return shared_block(shm)
+
+
+def _pack(objs, magic, _fn):
+    """Lay out an immutable instance or a list of them for a buffer.
+
+    The buffer starts with :data:`_HEADER` and the pickled class, field names,
+    field kinds, number of records, and whether a single instance was given.
+    The fixed-size records follow, then the heap holding :class:`str`,
+    :class:`bytes`, and pickled values.
+
+    :param objs: Instance or list of instances, see :func:`share`.
+    :type objs: object or list
+    :param magic: Bytes starting the buffer
+    :type magic: bytes
+    :param _fn: Name of the calling function, used in error messages
+    :type _fn: str
+    :returns: Size of the buffer in bytes and a function writing the instances
+        to a writable buffer of at least that size.
+    :rtype: tuple
+    """
+    single = not isinstance(objs, (list, tuple))
+    if single: objs = [objs]
+    if not objs: raise ValueError(f"{_fn}: no instances given")
+    cls = type(objs[0])
+    if getattr(cls, "_touketsu_restriction", None) != "immutable":
+        raise TypeError(f"{_fn}: {cls.__name__} is not an immutable decorated "
+                        "class")
+    names = _instance_items(objs[0])[0]
+    rows = []
+    for obj in objs:
+        if type(obj) is not cls:
+            raise TypeError(f"{_fn}: expected {cls.__name__} instances, "
+                            f"received {type(obj).__name__}")
+        obj_names, values = _instance_items(obj)
+        if obj_names != names:
+            raise ValueError(f"{_fn}: instances have different attributes")
+        rows.append(values)
+    columns = list(zip(*rows)) if names else []
+    kinds = tuple(_field_kind(column) for column in columns)
+    record = struct.Struct("<" + "".join(_KIND_FORMATS[kind]
+                                         for kind in kinds))
+    # values stored in the heap are encoded and replaced by (offset, size)
+    heap, heap_size = [], 0
+    for j, kind in enumerate(kinds):
+        if kind not in ("s", "y", "o"): continue
+        refs = []
+        for value in columns[j]:
+            if kind == "s": data = value.encode("utf-8")
+            elif kind == "y": data = value
+            else: data = pickle.dumps(_thaw(value), pickle.HIGHEST_PROTOCOL)
+            refs.append((heap_size, len(data)))
+            heap.append(data)
+            heap_size = heap_size + len(data)
+        columns[j] = refs
+    meta = pickle.dumps((cls, names, kinds, len(objs), single),
+                        pickle.HIGHEST_PROTOCOL)
+    start = _HEADER.size + len(meta)
+    heap_start = start + record.size * len(objs)
+
+    def fill(buf):
+        _HEADER.pack_into(buf, 0, magic, len(meta))
+        buf[_HEADER.size:start] = meta
+        pack_into = record.pack_into
+        for i, row in enumerate(zip(*columns)):
+            # flatten (offset, size) pairs
+            pack_into(buf, start + i * record.size,
+                      *(item for value, kind in zip(row, kinds)
+                        for item in (value if kind in ("s", "y", "o")
+                                     else (value,))))
+        offset = heap_start
+        for data in heap:
+            buf[offset:offset + len(data)] = data
+            offset = offset + len(data)
+
+    return heap_start + heap_size, fill
+
+
+def attach(block):
+    """Return read-only views of the instances in a shared memory block.
+
+    Views are instances of a subclass of the shared class that read their
+    fields from the block without copying the block, so they can be used like
+    the original instances but cannot be changed. Views and instances of the
+    shared class do not compare equal, and pickled views are unpickled as
+    ordinary instances. The block stays open as long as views of it exist.
+
+    .. warning::
+
+       The block's metadata and pickled values are read with
+       :func:`pickle.loads`, which can run arbitrary code. Only attach to
+       blocks written by trusted processes.
+
+    :param block: Handle returned by :func:`share` or the name of the block
+    :type block: :class:`shared_block` or str
+    :returns: A view if a single instance was shared, otherwise a
+        :class:`shared_records` sequence of views.
+    :rtype: object or :class:`shared_records`
+    """
+    _fn = attach.__name__
+    if shared_memory is None:
+        raise ImportError(f"{_fn}: multiprocessing.shared_memory requires "
+                          "Python 3.8")
+    name = block if isinstance(block, str) else block.name
+    # attaching to a block again reuses its view class, so views compare equal
+    view = _attached.get(name)
+    if view is None: view = _attached[name] = _attach_block(name)
+    return _records(view, shared_records)
+
+
+def _attach_block(name):
+    """Open a block, read its metadata, and return its view class.
+
+    The block is opened again even if the calling process created it, so that
+    the creator can close its handle while views exist.
+
+    :param name: Name of the shared memory block
+    :type name: str
+    :rtype: type
+    """
+    block = _open_block(name)
+    # views keep the block open
+    return _unpack_view(block.shm.buf, _MAGIC, attach.__name__,
+                        _touketsu_block = block)
+
+
+def _unpack_view(buf, magic, _fn, **attrs):
+    """Read the metadata of a buffer written by :func:`_pack`.
+
+    :param buf: Buffer holding the records
+    :type buf: memoryview
+    :param magic: Bytes expected at the start of the buffer
+    :type magic: bytes
+    :param _fn: Name of the calling function, used in error messages
+    :type _fn: str
+    :param attrs: Additional attributes of the view class
+    :returns: View class, see :func:`_block_view_class`. Its
+        ``_touketsu_records`` attribute is a tuple of the offset of the first
+        record, the record size, the number of records, and whether a single
+        instance was written.
+    :rtype: type
+    """
+    if (len(buf) < _HEADER.size) or \
+        (_HEADER.unpack_from(buf, 0)[0] != magic):
+        raise ValueError(f"{_fn}: buffer was not written by touketsu")
+    start = _HEADER.size + _HEADER.unpack_from(buf, 0)[1]
+    cls, names, kinds, count, single = pickle.loads(buf[_HEADER.size:start])
+    size = struct.calcsize("<" + "".join(_KIND_FORMATS[kind]
+                                         for kind in kinds))
+    view = _block_view_class(cls, names, kinds, buf, start + size * count,
+                             **attrs)
+    view._touketsu_records = (start, size, count, single)
+    return view
+
+
+def _records(view, seqtype):
+    """Return the view of a single instance or a sequence of views.
+
+    :param view: View class returned by :func:`_unpack_view`
+    :type view: type
+    :param seqtype: :class:`shared_records` or a subclass
+    :type seqtype: type
+    :rtype: object or :class:`shared_records`
+    """
+    start, size, count, single = view._touketsu_records
+    if single: return view._touketsu_make(start)
+    return seqtype(view, start, size, count)
\ No newline at end of file
@@ -0,0 +1,117 @@
+__doc__ = """Memory-mapped files of ``touketsu`` immutable instances.
+
+:func:`dump` writes immutable instances to a file with the fixed-size record
+layout used by :func:`~touketsu.shared.share`, and :func:`load` maps the file
+read-only so that records are only read when accessed. Reopening a large
+snapshot is then nearly instant, and processes mapping the same file share the
+operating system's page cache.
+"""
+
+import mmap
+import os
+from weakref import WeakValueDictionary
+
+from .shared import _pack, _records, _unpack_view, shared_records
+
+_MAGIC = b"TKMM"
+"Bytes starting each file written by :func:`dump`."
+
+_loaded = WeakValueDictionary()
+"""View classes of the files mapped in this process.
+
+Keyed by the real path, inode, modification time, and size of the file, so a
+file replaced by :func:`dump` is mapped again. Entries are removed once the
+view class and all its views are collected.
+"""
+
+
+class stored_records(shared_records):
+    """Read-only sequence of views of instances in a memory-mapped file.
+
+    Returned by :func:`load` for a list of instances. Views are created on
+    access and read their fields from the mapped file.
+    """
+    __slots__ = ()
+
+    @property
+    def path(self):
+        "Path of the mapped file."
+        return self._view._touketsu_path
+
+    def __repr__(self):
+        return (f"{type(self).__name__}({self._view.__name__}, "
+                f"count={self._count}, path={self.path!r})")
+
+
+def dump(objs, path):
+    """Write an immutable instance or a list of them to a file.
+
+    The instances must be of the same immutable decorated class and have the
+    same instance attributes, see :func:`~touketsu.shared.share` for how values
+    are stored. The file is written next to ``path`` and then renamed over it,
+    so processes that mapped an earlier version of the file are unaffected.
+
+    .. code:: python
+
+       from touketsu.store import dump, load
+
+       dump(records, "snapshot.tks")
+       # later, in any number of processes
+       records = load("snapshot.tks")
+
+    :param objs: Instance or list of instances to write
+    :type objs: object or list
+    :param path: Path of the file
+    :type path: str or :class:`os.PathLike`
+    """
+    size, fill = _pack(objs, _MAGIC, dump.__name__)
+    path = os.fspath(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb+") as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as buf:
+                fill(buf)
+                buf.flush()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+
+
+def load(path):
+    """Return read-only views of the instances in a file made by :func:`dump`.
+
+    The file is memory-mapped read-only, so only its metadata is read up front
+    and each record is read, and its :class:`str`, :class:`bytes`, or pickled
+    values decoded, when its fields are accessed. Views are instances of a
+    subclass of the stored class, like those returned by
+    :func:`~touketsu.shared.attach`. The file stays mapped as long as views of
+    it exist.
+
+    .. warning::
+
+       The file's metadata and pickled values are read with
+       :func:`pickle.loads`, which can run arbitrary code. Only load files
+       from trusted sources.
+
+    :param path: Path of the file
+    :type path: str or :class:`os.PathLike`
+    :returns: A view if a single instance was written, otherwise a
+        :class:`stored_records` sequence of views.
+    :rtype: object or :class:`stored_records`
+    """
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    # loading an unchanged file again reuses its view class, so views compare
+    # equal and the file is mapped once
+    view = _loaded.get(key)
+    if view is None:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        # views keep the mapping alive
+        view = _loaded[key] = _unpack_view(memoryview(buf), _MAGIC,
+                                           load.__name__, _touketsu_mmap = buf,
+                                           _touketsu_path = path)
+    return _records(view, stored_records)
@@ -0,0 +1,361 @@
+__doc__ = """Columnar storage of ``touketsu`` immutable records.
+
+A :class:`frozen_table` stores many records of an immutable decorated class as
+one column per field, using :class:`array.array` or NumPy arrays for numeric
+fields, and hands out read-only row views that behave like instances of the
+class.
+"""
+
+from array import array
+from collections.abc import Sequence
+from itertools import compress
+
+try: import numpy as np
+except ImportError: np = None
+
+from .core import (_check_names, _deep_freeze_value, _instance_items,
+                   _view_class)
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _is_frozen_array(arr):
+    """Return ``True`` if the data of a NumPy array can never change.
+
+    The array and all the arrays it is a view of must be read-only, and the
+    memory must belong to one of them or to a :class:`bytes` object. A
+    read-only view of a writeable array changes with the array.
+
+    :param arr: NumPy array
+    :type arr: :class:`numpy.ndarray`
+    :rtype: bool
+    """
+    while isinstance(arr, np.ndarray):
+        if arr.flags.writeable: return False
+        arr = arr.base
+    return (arr is None) or isinstance(arr, bytes)
+
+
+def _column(values, deep = False):
+    """Return an immutable column holding ``values``.
+
+    NumPy arrays whose data can never change, see :func:`_is_frozen_array`,
+    are used without copying, while other NumPy arrays are copied into a
+    read-only array, so later writes to the caller's array do not change the
+    table. :class:`array.array` instances are copied. Otherwise, values that
+    are all :class:`int` or all :class:`float` are stored in an
+    :class:`array.array` and other values in a :class:`tuple`.
+
+    :param values: Values of one field, one per record
+    :type values: iterable
+    :param deep: Whether to deeply freeze values stored in a :class:`tuple`,
+        for deeply immutable classes. Default ``False``.
+    :type deep: bool, optional
+    :rtype: :class:`array.array`, :class:`tuple`, or NumPy array
+    """
+    if (np is not None) and isinstance(values, np.ndarray):
+        if values.dtype.hasobject: values = values.tolist()
+        else:
+            if _is_frozen_array(values): return values
+            values = values.copy()
+            values.flags.writeable = False
+            return values
+    if isinstance(values, array): return array(values.typecode, values)
+    values = tuple(values)
+    kinds = set(map(type, values))
+    if kinds == {float}: return array("d", values)
+    # bool is a subclass of int, but is excluded by the exact type check
+    if (kinds == {int}) and \
+        all(_INT64_MIN <= value <= _INT64_MAX for value in values):
+        return array("q", values)
+    if deep:
+        memo = {}
+        values = tuple(_deep_freeze_value(value, memo) for value in values)
+    return values
+
+
+def _take(column, indices):
+    """Return the values of ``column`` at ``indices`` as a new column.
+
+    :param column: Column made by :func:`_column`
+    :type column: :class:`array.array`, :class:`tuple`, or NumPy array
+    :param indices: Row indices
+    :type indices: list
+    :rtype: :class:`array.array`, :class:`tuple`, or NumPy array
+    """
+    if isinstance(column, array):
+        return array(column.typecode, map(column.__getitem__, indices))
+    if isinstance(column, tuple): return tuple(map(column.__getitem__, indices))
+    column = column[indices]
+    column.flags.writeable = False
+    return column
+
+
+class frozen_table(Sequence):
+    """Immutable table of records of an immutable decorated class.
+
+    Each field of the class is stored as a column, an :class:`array.array` or
+    NumPy array for numeric fields and a :class:`tuple` otherwise, so numeric
+    records take a few bytes per field instead of a full instance each. Tables
+    are usually made with :meth:`from_instances`, :meth:`from_records`,
+    :meth:`from_columns`, or :meth:`from_numpy`.
+
+    .. code:: python
+
+       from touketsu.table import frozen_table
+
+       table = frozen_table.from_columns(tick, venue = venues,
+                                         price = prices, size = sizes)
+       cheap = table.filter(table.column("price") < 100)  # NumPy columns
+       cheap[0].price
+
+    Indexing returns read-only row views, which are instances of a subclass of
+    the table's class whose fields read from the columns, so the class's
+    methods work on them. Like :func:`~touketsu.shared.attach` views, they do
+    not compare equal to ordinary instances, and pickling, deep copying, or
+    evolving them gives ordinary instances. Slicing and filtering return new
+    tables.
+
+    :param cls: Immutable decorated class
+    :type cls: type
+    :param columns: Maps each field name to its column, see :func:`_column`.
+        All columns must have the same length.
+    :type columns: dict
+    """
+    __slots__ = ("_cls", "_columns", "_len", "_view")
+
+    def __init__(self, cls, columns):
+        _fn = type(self).__name__
+        if getattr(cls, "_touketsu_restriction", None) != "immutable":
+            raise TypeError(f"{_fn}: {cls.__name__} is not an immutable "
+                            "decorated class")
+        _check_names(cls, tuple(columns))
+        columns = {name: _column(values, cls._touketsu_deep)
+                   for name, values in columns.items()}
+        lengths = set(map(len, columns.values()))
+        if len(lengths) > 1:
+            raise ValueError(f"{_fn}: columns must have equal length")
+        self._init(cls, columns, lengths.pop() if lengths else 0)
+
+    def _init(self, cls, columns, length):
+        """Set the attributes of the table without checking the columns.
+
+        :param cls: Immutable decorated class
+        :type cls: type
+        :param columns: Maps each field name to its column
+        :type columns: dict
+        :param length: Number of records
+        :type length: int
+        """
+        self._cls = cls
+        self._columns = columns
+        self._len = length
+        # view class, made on first access to a row
+        self._view = None
+
+    def _derive(self, columns):
+        """Return a new table of the same class from already immutable columns.
+
+        :param columns: Maps each field name to its column
+        :type columns: dict
+        :rtype: :class:`frozen_table`
+        """
+        table = object.__new__(type(self))
+        length = len(next(iter(columns.values()))) if columns else 0
+        table._init(self._cls, columns, length)
+        return table
+
+    @classmethod
+    def from_columns(cls, record_cls, **columns):
+        """Return a table of ``record_cls`` records given columns of values.
+
+        :param record_cls: Immutable decorated class
+        :type record_cls: type
+        :param columns: Values by field name, as lists, tuples,
+            :class:`array.array`, or NumPy arrays. If the fields of
+            ``record_cls`` are known, all of them must be given.
+        :rtype: :class:`frozen_table`
+        """
+        return cls(record_cls, columns)
+
+    @classmethod
+    def from_records(cls, record_cls, records):
+        """Return a table of ``record_cls`` records given sequences of values.
+
+        :param record_cls: Immutable decorated class with known fields
+        :type record_cls: type
+        :param records: Sequences of values ordered like the fields of
+            ``record_cls``
+        :type records: iterable
+        :rtype: :class:`frozen_table`
+        """
+        names = record_cls._touketsu_fields
+        if names is None:
+            raise TypeError(f"{cls.__name__}: fields of {record_cls.__name__} "
+                            "unknown; pass fields to the decorator or create "
+                            "an instance first")
+        records = list(records)
+        columns = zip(*records) if records else [()] * len(names)
+        return cls(record_cls, dict(zip(names, columns)))
+
+    @classmethod
+    def from_instances(cls, objs):
+        """Return a table holding the attribute values of instances.
+
+        :param objs: Instances of the same immutable decorated class
+        :type objs: list
+        :rtype: :class:`frozen_table`
+        """
+        if not objs: raise ValueError(f"{cls.__name__}: no instances given")
+        record_cls = type(objs[0])
+        names = _instance_items(objs[0])[0]
+        rows = []
+        for obj in objs:
+            obj_names, values = _instance_items(obj)
+            if (type(obj) is not record_cls) or (obj_names != names):
+                raise TypeError(f"{cls.__name__}: instances must be of the "
+                                "same class with the same attributes")
+            rows.append(values)
+        return cls(record_cls, dict(zip(names, zip(*rows))))
+
+    @classmethod
+    def from_numpy(cls, record_cls, arr):
+        """Return a table of ``record_cls`` records from a structured array.
+
+        No per-record objects are created. The fields of ``arr`` are copied
+        into read-only columns, unless ``arr`` is read-only and owns its data,
+        e.g. after ``arr.flags.writeable = False``, in which case the columns
+        are views of ``arr`` and no data is copied.
+
+        :param record_cls: Immutable decorated class
+        :type record_cls: type
+        :param arr: One-dimensional NumPy structured array whose field names
+            are the fields of ``record_cls``
+        :type arr: :class:`numpy.ndarray`
+        :rtype: :class:`frozen_table`
+        """
+        if np is None:
+            raise ImportError(f"{cls.__name__}: from_numpy requires numpy")
+        if arr.dtype.names is None:
+            raise ValueError(f"{cls.__name__}: expected a structured array")
+        return cls(record_cls, {name: arr[name] for name in arr.dtype.names})
+
+    def to_numpy(self):
+        """Return the table as a NumPy structured array.
+
+        Numeric columns are copied in bulk, and other columns become fields of
+        object dtype.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        if np is None:
+            raise ImportError(f"{type(self).__name__}: to_numpy requires numpy")
+        columns = {}
+        for name, column in self._columns.items():
+            if isinstance(column, array):
+                column = np.frombuffer(column, dtype = column.typecode)
+            elif isinstance(column, tuple):
+                column = np.fromiter(column, dtype = object,
+                                     count = len(column))
+            columns[name] = column
+        out = np.empty(self._len, dtype = [(name, column.dtype)
+                                           for name, column in columns.items()])
+        for name, column in columns.items(): out[name] = column
+        return out
+
+    def to_instances(self):
+        """Return the records as a list of ordinary instances.
+
+        The instances are made with the ``from_columns`` class method of the
+        table's class, without calling :meth:`__init__`.
+
+        :rtype: list
+        """
+        return self._cls.from_columns(**self._columns)
+
+    @property
+    def record_class(self):
+        "Class of the table's records."
+        return self._cls
+
+    @property
+    def names(self):
+        "Tuple of the field names of the table."
+        return tuple(self._columns)
+
+    def column(self, name):
+        """Return the column of the field ``name``.
+
+        NumPy columns are read-only arrays, :class:`array.array` columns are
+        returned as read-only memoryviews, and other columns as tuples.
+
+        :param name: Field name
+        :type name: str
+        :rtype: :class:`numpy.ndarray`, :class:`memoryview`, or :class:`tuple`
+        """
+        column = self._columns[name]
+        if isinstance(column, array):
+            view = memoryview(column)
+            # memoryview.toreadonly requires Python 3.8, so older versions get
+            # a view of a read-only copy
+            try: return view.toreadonly()
+            except AttributeError:
+                return memoryview(column.tobytes()).cast(column.typecode)
+        return column
+
+    def filter(self, mask):
+        """Return a new table with the rows where ``mask`` is true.
+
+        :param mask: One boolean per row, e.g. a NumPy boolean array.
+        :type mask: iterable
+        :rtype: :class:`frozen_table`
+        """
+        if (np is not None) and isinstance(mask, np.ndarray):
+            return self.take(np.flatnonzero(mask).tolist())
+        return self.take(list(compress(range(self._len), mask)))
+
+    def take(self, indices):
+        """Return a new table with the rows at ``indices``.
+
+        :param indices: Row indices
+        :type indices: iterable
+        :rtype: :class:`frozen_table`
+        """
+        indices = list(indices)
+        return self._derive({name: _take(column, indices)
+                             for name, column in self._columns.items()})
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._derive({name: column[index]
+                                 for name, column in self._columns.items()})
+        if index < 0: index = index + self._len
+        if not 0 <= index < self._len:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        if self._view is None: self._view = self._make_view_class()
+        return self._view._touketsu_make(index)
+
+    def __iter__(self):
+        if self._view is None: self._view = self._make_view_class()
+        return map(self._view._touketsu_make, range(self._len))
+
+    def __repr__(self):
+        return (f"{type(self).__name__}({self._cls.__name__}, "
+                f"names={self.names}, len={self._len})")
+
+    def _make_view_class(self):
+        """Return the class of the table's row views.
+
+        :rtype: type
+        """
+        getters = {}
+        for name, column in self._columns.items():
+            # item returns Python scalars instead of NumPy scalars
+            get = column.item if (np is not None) and \
+                isinstance(column, np.ndarray) else column.__getitem__
+            getters[name] = lambda obj, get = get: get(obj._touketsu_pos)
+        # views keep the table alive
+        return _view_class(self._cls, getters, _touketsu_table = self)
@@ -1,11 +1,13 @@
 __doc__ = "Some test classes for testing ``touketsu`` functions."
 
 from abc import ABCMeta, abstractmethod
+import asyncio
 import math
 from random import Random
 import sys
 
-from ..core import immutable, nondynamic, orig_init, urt_class, urt_method
+from ..core import (deep_immutable, immutable, nondynamic, orig_init, urt_class,
+                    urt_method)
 from . import srepr, vrepr
 from .utils import almost_one
 
@@ -357,5 +359,275 @@ class abc_child_b(an_abc):
         return _random_touch_ab(self, random_state = random_state)
 
 
+@immutable(slots = True)
+class slotted_record:
+    """Immutable test class storing its instance attributes in slots.
+
+    :param name: Parameter ``name``
+    :param value: Parameter ``value``, stored in a private attribute.
+    """
+    def __init__(self, name = "record", value = 0):
+        self.name = name
+        self.__value = value
+
+    @property
+    def value(self):
+        "Value of the record. Read-only property."
+        return self.__value
+
+    @urt_method
+    def bump(self, inc = 1):
+        """Increments :attr:`value` by ``inc``.
+
+        :param inc: Increment, default ``1``.
+        :type inc: int or float, optional
+        """
+        self.__value = self.__value + inc
+
+
+@nondynamic(slots = True)
+class slotted_child(slotted_record):
+    """Nondynamic subclass of :class:`slotted_record` also using slots.
+
+    :param name: Parameter ``name``
+    :param value: Parameter ``value``
+    :param tag: Parameter ``tag``
+    """
+    def __init__(self, name = "child", value = 1, tag = None):
+        orig_init(slotted_record.__init__)(self, name = name, value = value)
+        self.tag = tag
+
+    def describe(self):
+        "Returns description built with zero-argument :func:`super`."
+        return f"{self.name}: {super().value}"
+
+
+@deep_immutable
+class deep_config:
+    """Deeply immutable test class holding containers.
+
+    :param name: Parameter ``name``
+    :param tags: Parameter ``tags``, converted to a :class:`tuple`.
+    :param options: Parameter ``options``, converted to a read-only mapping.
+    :param child: Parameter ``child``, possibly another :class:`deep_config`.
+    """
+    def __init__(self, name = "config", tags = None, options = None,
+                 child = None):
+        self.name = name
+        self.tags = [] if tags is None else tags
+        self.options = {} if options is None else options
+        self.child = child
+
+
+@immutable(eq = True)
+class point:
+    """Immutable test class with generated ``__eq__`` and ``__hash__``.
+
+    :param x: Parameter ``x``
+    :param y: Parameter ``y``
+    """
+    def __init__(self, x = 0, y = 0):
+        self.x = x
+        self.y = y
+
+
+@immutable(eq = True, slots = True)
+class slotted_point:
+    """Slotted version of :class:`point` with an additional ``z`` coordinate.
+
+    :param x: Parameter ``x``
+    :param y: Parameter ``y``
+    :param z: Parameter ``z``
+    """
+    def __init__(self, x = 0, y = 0, z = 0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+@immutable(eq = True, order = ("venue", "price"), slots = True)
+class trade:
+    """Slotted immutable class ordered by venue, then price.
+
+    :param venue: Parameter ``venue``
+    :param price: Parameter ``price``
+    :param size: Parameter ``size``, not ordered
+    """
+    def __init__(self, venue = "XNYS", price = 0., size = 0):
+        self.venue = venue
+        self.price = price
+        self.size = size
+
+
+@immutable(interned = 4)
+class currency_pair:
+    """Interned immutable test class with a cache size of 4.
+
+    :param base: Parameter ``base``
+    :param quote: Parameter ``quote``
+    """
+    def __init__(self, base = "USD", quote = "JPY"):
+        self.base = base
+        self.quote = quote
+
+
+@immutable(slots = True)
+class blob_record:
+    """Slotted immutable test class holding binary data.
+
+    :param name: Parameter ``name``
+    :param data: Parameter ``data``, e.g. :class:`bytes` or a memoryview.
+    :param extra: Parameter ``extra``, e.g. a :class:`bytearray`.
+    """
+    def __init__(self, name = "blob", data = b"", extra = None):
+        self.name = name
+        self.data = data
+        self.extra = bytearray() if extra is None else extra
+
+
+@immutable
+class node:
+    """Immutable test class at the root of a decorated hierarchy.
+
+    :param ident: Parameter ``ident``
+    """
+    def __init__(self, ident = 0):
+        self.ident = ident
+
+
+@immutable
+class named_node(node):
+    """Decorated subclass of :class:`node` calling ``super().__init__()``.
+
+    :param ident: Parameter ``ident``
+    :param name: Parameter ``name``
+    """
+    def __init__(self, ident = 0, name = "node"):
+        super().__init__(ident)
+        self.name = name
+
+
+@deep_immutable
+class tagged_node(named_node):
+    """Deeply immutable subclass of :class:`named_node`.
+
+    :param ident: Parameter ``ident``
+    :param name: Parameter ``name``
+    :param tags: Parameter ``tags``, to which ``name`` is appended.
+    """
+    def __init__(self, ident = 0, name = "tagged", tags = None):
+        self.tags = [] if tags is None else tags
+        super().__init__(ident, name)
+        # instance is still unrestricted after the superclass __init__ returns
+        self.tags.append(self.name)
+
+
+@immutable(init = True, eq = True)
+class quote:
+    """Immutable test class with a generated ``__init__``.
+
+    :param venue: Parameter ``venue``
+    :param bid: Parameter ``bid``
+    :param ask: Parameter ``ask``, default ``None``.
+    """
+    venue: str
+    bid: float
+    ask: float = None
+
+
+@immutable(init = True, slots = True, fields = ("name", "value"))
+class slotted_quote:
+    """Slotted test class with a generated ``__init__`` from ``fields``.
+
+    :param name: Parameter ``name``
+    :param value: Parameter ``value``, default ``0``.
+    """
+    value = 0
+
+
+@nondynamic(track_changes = True)
+class book_state:
+    """Nondynamic test class recording its changed attributes.
+
+    :param bid: Parameter ``bid``
+    :param ask: Parameter ``ask``
+    """
+    def __init__(self, bid = 0., ask = 0.):
+        self.bid = bid
+        self.ask = ask
+
+    @urt_method
+    def halt(self):
+        "Create the ``halted`` attribute."
+        self.halted = True
+
+
+@nondynamic(track_changes = True, slots = True)
+class slotted_book_state:
+    """Slotted version of :class:`book_state`.
+
+    :param bid: Parameter ``bid``
+    :param ask: Parameter ``ask``
+    """
+    def __init__(self, bid = 0., ask = 0.):
+        self.bid = bid
+        self.ask = ask
+
+
+@nondynamic
+class async_state:
+    """Nondynamic test class with coroutine and generator methods.
+
+    Each method creates new instance attributes, so each needs to be decorated
+    with :func:`~touketsu.core.urt_method`.
+
+    :param n: Parameter ``n``
+    """
+    def __init__(self, n = 0):
+        self.n = n
+
+    @urt_method
+    async def build(self, steps = 2):
+        """Creates attributes ``step_0``, ``step_1``, ... across ``await``s.
+
+        :param steps: Number of attributes to create, default ``2``.
+        :type steps: int, optional
+        :returns: ``steps``
+        :rtype: int
+        """
+        for i in range(steps):
+            await asyncio.sleep(0)
+            setattr(self, f"step_{i}", i)
+        return steps
+
+    @urt_method
+    def count_up(self, stop):
+        """Generator incrementing ``n`` up to ``stop``.
+
+        Each value of ``n`` is also written to the new attribute ``last``.
+
+        :param stop: Value to stop counting at.
+        :type stop: int
+        """
+        while self.n < stop:
+            self.n = self.n + 1
+            self.last = self.n
+            yield self.n
+
+    @urt_method
+    async def stream(self, stop):
+        """Asynchronous generator version of :meth:`count_up`.
+
+        Writes each value to the new attribute ``last_async``.
+
+        :param stop: Value to stop counting at.
+        :type stop: int
+        """
+        for i in range(stop):
+            await asyncio.sleep(0)
+            self.last_async = i
+            yield i
+
+
 if __name__ == "__main__": 
     print(f"{__file__}: do not run module as script.", file = sys.stderr)
\ No newline at end of file
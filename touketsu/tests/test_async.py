@@ -0,0 +1,78 @@
+__doc__ = "Tests ``urt_method`` on coroutine and generator methods."
+
+import asyncio
+
+import pytest
+
+from .classes import async_state
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def async_state_instance():
+    "Return default :class:`~touketsu.tests.classes.async_state` instance."
+    return async_state()
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_coroutine_method(async_state_instance):
+    """Test a coroutine method decorated with :func:`~touketsu.core.urt_method`.
+
+    The coroutine creates attributes across ``await`` points while a second
+    task, which sees the instance restricted, fails to create one.
+
+    :param async_state_instance: :func:`async_state_instance` ``pytest``
+        fixture.
+    :type async_state_instance: :class:`~touketsu.tests.classes.async_state`
+    """
+    async def intrude():
+        await asyncio.sleep(0)
+        with pytest.raises(AttributeError):
+            async_state_instance.intruder = True
+
+    async def main():
+        return await asyncio.gather(async_state_instance.build(steps = 3),
+                                    intrude())
+
+    steps, _ = asyncio.run(main())
+    assert steps == 3
+    assert async_state_instance.step_2 == 2
+    assert not hasattr(async_state_instance, "intruder")
+
+
+def test_generator_method(async_state_instance):
+    """Test a generator method decorated with :func:`~touketsu.core.urt_method`.
+
+    The restriction is reapplied while the consumer holds each yielded value.
+
+    :param async_state_instance: :func:`async_state_instance` ``pytest``
+        fixture.
+    :type async_state_instance: :class:`~touketsu.tests.classes.async_state`
+    """
+    values = []
+    for value in async_state_instance.count_up(3):
+        values.append(value)
+        with pytest.raises(AttributeError):
+            async_state_instance.consumer = value
+    assert values == [1, 2, 3]
+    assert async_state_instance.last == 3
+
+
+def test_asyncgen_method(async_state_instance):
+    """Test an async generator decorated with :func:`~touketsu.core.urt_method`.
+
+    :param async_state_instance: :func:`async_state_instance` ``pytest``
+        fixture.
+    :type async_state_instance: :class:`~touketsu.tests.classes.async_state`
+    """
+    async def main():
+        values = []
+        async for value in async_state_instance.stream(3):
+            values.append(value)
+            with pytest.raises(AttributeError):
+                async_state_instance.consumer = value
+        return values
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert async_state_instance.last_async == 2
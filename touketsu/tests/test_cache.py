@@ -0,0 +1,105 @@
+__doc__ = "Tests caching of derived values of ``touketsu`` instances."
+
+import gc
+import pytest
+
+from ..cache import cached_method, lazy_attr, memoize
+from ..core import immutable, nondynamic
+
+## -- Non-test functions -------------------------------------------------------
+
+@immutable(slots = True)
+class curve:
+    """Slotted immutable class with cached derived values.
+
+    :param points: Parameter ``points``
+    """
+    def __init__(self, points = (1, 2, 3)):
+        self.points = points
+        self.calls = []
+
+    @cached_method(maxsize = 2)
+    def scaled(self, factor, offset = 0):
+        "Return the points scaled by ``factor`` and shifted by ``offset``."
+        self.calls.append(factor)
+        return tuple(p * factor + offset for p in self.points)
+
+    @lazy_attr
+    def total(self):
+        "Sum of the points."
+        self.calls.append("total")
+        return sum(self.points)
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_cached_method():
+    "Test per-instance LRU caching of method results."
+    curve.scaled.cache_clear()
+    a, b = curve(), curve((1,))
+    assert a.scaled(2) == (2, 4, 6) and a.scaled(2) == (2, 4, 6)
+    assert b.scaled(2) == (2,) and (a.scaled(2, offset = 1) == (3, 5, 7))
+    assert a.calls == [2, 2] and curve.scaled.__doc__.startswith("Return")
+    # (2,) was used last, so (2, offset = 1) is evicted by (3,)
+    a.scaled(2), a.scaled(3), a.scaled(2, offset = 1)
+    assert a.calls == [2, 2, 3, 2]
+    assert curve.scaled.cache_info() == (2, 5, 2, 3)
+    curve.scaled.cache_clear(a)
+    assert curve.scaled.cache_info().currsize == 1
+    # entries are dropped with their instance
+    del b
+    gc.collect()
+    assert curve.scaled.cache_info().currsize == 0
+
+
+def test_lazy_attr():
+    "Test attributes computed once per instance."
+    inst = curve()
+    assert (inst.total == 6) and (inst.total == 6)
+    assert inst.calls == ["total"] and isinstance(curve.total, lazy_attr)
+    with pytest.raises(AttributeError):
+        inst.total = 0
+
+
+def test_cache_errors():
+    "Test that caching needs instances of immutable classes."
+
+    @nondynamic
+    class state:
+        def __init__(self): self.value = 1
+
+        @lazy_attr
+        def double(self): return 2 * self.value
+
+    with pytest.raises(TypeError):
+        state().double
+    with pytest.raises(ValueError):
+        cached_method(maxsize = 0)(len)
+
+
+def test_memoize():
+    "Test caching of functions by the identity of immutable arguments."
+    calls = []
+
+    @memoize
+    def total(crv, factor, offset = 0):
+        "Return the sum of the scaled points of ``crv``."
+        calls.append(factor)
+        return sum(crv.scaled(factor, offset))
+
+    a, b = curve(), curve((1,))
+    assert (total(a, 2) == 12) and (total(a, 2) == 12) and (total(b, 2) == 2)
+    assert (total(a, 2, offset = 1) == 15) and (calls == [2, 2, 2])
+    assert total.cache_info() == (1, 3, None, 3)
+    # results computed from an instance are evicted when it dies
+    del a
+    gc.collect()
+    assert total.cache_info().currsize == 1
+    total.cache_clear()
+    assert total.cache_info() == (0, 0, None, 0)
+    # least recently used results are evicted first
+    bounded = memoize(maxsize = 1)(total.__wrapped__)
+    bounded(b, 1), bounded(b, 2), bounded(b, 1)
+    assert (calls[-3:] == [1, 2, 1]) and (bounded.cache_info().currsize == 1)
+    with pytest.raises(TypeError):
+        total(b, [1])
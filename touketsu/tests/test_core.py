@@ -1,11 +1,26 @@
 __doc__ = "Tests some core features of ``touketsu`` using the test classes."
 
+from array import array
+from collections import namedtuple, OrderedDict
+import contextvars
+import copy
 import pytest
+from inspect import signature
 from random import Random
 import textwrap
+import threading
 
+from ..core import (_dirty, _hashes, _settings_from_env, _unrestricted,
+                    changed_fields, checkpoint, class_decorator_factory,
+                    configure, evolve,
+                    freeze, immutable, intern_clear, intern_info, is_frozen,
+                    nondynamic, orig_init, sort_key, thaw, unrestricted,
+                    urt_class, urt_method)
 from .classes import (a_class, b_class, c_class, an_abc, abc_child_a,
-                      abc_child_b, almost_one)
+                      abc_child_b, almost_one, book_state, currency_pair,
+                      deep_config, named_node, node, point, quote,
+                      slotted_book_state, slotted_point, slotted_quote,
+                      slotted_record, tagged_node, trade)
 from .fixtures import _GLOBAL_SEED, global_random_state
 
 _module_random_state = Random()
@@ -94,6 +109,14 @@ def c_class_instance():
     return c_class()
 
 
+@pytest.fixture
+def restore_settings():
+    "Restore the :func:`~touketsu.core.configure` settings after a test."
+    settings = configure()
+    yield
+    configure(*settings)
+
+
 ## -- Tests --------------------------------------------------------------------
 
 ## a_class tests ##
@@ -272,4 +295,812 @@ def test_make_c_clean(c_class_instance, global_random_state):
     object.__setattr__(c_class_instance, "c_is_dirty", True)
     # unset and assert
     c_class_instance.make_c_clean()
-    assert c_class_instance.c_is_dirty == False
\ No newline at end of file
+    assert c_class_instance.c_is_dirty == False
+
+## nondynamic attribute schema tests ##
+
+def test_learned_fields(b_class_instance):
+    """Test that nondynamic classes learn their instance attribute names.
+
+    The names are learned from the first completed ``__init__`` call and are
+    used as a fast path for allowed assignments.
+
+    :param b_class_instance: :func:`b_class_instance` ``pytest`` fixture.
+    :type b_class_instance: :class:`~touketsu.tests.classes.b_class`
+    """
+    assert b_class_instance.__class__._touketsu_fields == ("b", "_b")
+    # existing attributes can be modified, new ones cannot be created
+    b_class_instance.b = 8
+    with pytest.raises(AttributeError):
+        b_class_instance.bb = 8
+    # class attributes are still found by hasattr fallback
+    b_class_instance.b_default = 1.0
+    assert b_class_instance.b_default == 1.0
+
+
+def test_declared_fields():
+    "Test that fields passed to the decorator factory are allowed names."
+    @class_decorator_factory("nondynamic", fields = ("x", "y"))
+    class point:
+        def __init__(self, x = 0): self.x = x
+
+    assert point._touketsu_fields == ("x", "y")
+    # y need not exist yet since it was declared
+    pt = point()
+    pt.y = 1
+    with pytest.raises(AttributeError):
+        pt.z = 2
+    # fields must be strings
+    with pytest.raises(TypeError):
+        class_decorator_factory("nondynamic", fields = (1, 2))
+
+
+## restriction state tests ##
+
+def test_no_instance_restriction(a_class_instance, c_class_instance):
+    """Test that the restriction is not stored in instance ``__dict__``.
+
+    Also checks that no instance is left unrestricted after initialization or
+    after a :func:`~touketsu.core.urt_method` call.
+
+    :param a_class_instance: :func:`a_class_instance` ``pytest`` fixture.
+    :type a_class_instance: :class:`~touketsu.tests.classes.a_class`
+    :param c_class_instance: :func:`c_class_instance` ``pytest`` fixture.
+    :type c_class_instance: :class:`~touketsu.tests.classes.c_class`
+    """
+    for inst in (a_class_instance, c_class_instance):
+        assert "_touketsu_restriction" not in vars(inst)
+    assert c_class._touketsu_restriction == "immutable"
+    # restriction is reapplied even if the urt_method raises
+    with pytest.raises(TypeError):
+        c_class_instance.make_c_dirty(random_state = "bad")
+    assert not _unrestricted.get()
+    with pytest.raises(AttributeError):
+        c_class_instance.c = 1
+
+
+def test_urt_method_thread_local():
+    """Test that :func:`~touketsu.core.urt_method` only affects its own thread.
+
+    While one thread is inside an :func:`~touketsu.core.urt_method` of an
+    immutable instance, writes to the instance from another thread still fail.
+    """
+    entered, release = threading.Event(), threading.Event()
+
+    @immutable
+    class counter:
+        def __init__(self): self.count = 0
+
+        @urt_method
+        def hold(self):
+            self.count = self.count + 1
+            entered.set()
+            release.wait(timeout = 5)
+            self.count = self.count + 1
+
+    inst = counter()
+    worker = threading.Thread(target = inst.hold)
+    worker.start()
+    try:
+        assert entered.wait(timeout = 5)
+        with pytest.raises(AttributeError):
+            inst.count = -1
+    finally:
+        release.set()
+        worker.join()
+    assert inst.count == 2
+
+
+def test_urt_method_copied_context():
+    """Test that copied contexts don't see instances unrestricted in place.
+
+    A context copied while an :func:`~touketsu.core.urt_method` runs shares
+    its set of unrestricted ids, but only the thread owning the set counts it,
+    and the id is gone once the method returns.
+    """
+    seen = []
+
+    @immutable
+    class counter:
+        def __init__(self): self.count = 0
+
+        @urt_method
+        def spawn(self):
+            ctx = contextvars.copy_context()
+            worker = threading.Thread(
+                target = ctx.run, args = (lambda: seen.append(is_frozen(self)),)
+            )
+            worker.start()
+            worker.join()
+            seen.append(is_frozen(self))
+            return ctx
+
+    inst = counter()
+    ctx = inst.spawn()
+    assert seen == [True, False]
+    assert ctx.run(is_frozen, inst)
+    assert not _unrestricted.get()
+
+
+def test_unrestricted(c_class_instance):
+    """Test the :class:`~touketsu.core.unrestricted` context manager.
+
+    Writes succeed inside the block and fail after it, even if the block was
+    exited by an exception.
+
+    :param c_class_instance: :func:`c_class_instance` ``pytest`` fixture.
+    :type c_class_instance: :class:`~touketsu.tests.classes.c_class`
+    """
+    with unrestricted(c_class_instance) as inst:
+        inst.c = 0.5
+        inst.c_is_dirty = True
+        inst.d = "d"
+    assert (c_class_instance.c, c_class_instance.d) == (0.5, "d")
+    with pytest.raises(AttributeError):
+        c_class_instance.c = 1
+    with pytest.raises(KeyError):
+        with unrestricted(c_class_instance):
+            raise KeyError("bail")
+    with pytest.raises(AttributeError):
+        c_class_instance.c = 1
+
+
+def test_thaw_freeze(c_class_instance):
+    """Test :func:`~touketsu.core.thaw` and :func:`~touketsu.core.freeze`.
+
+    Thawing affects only the instance, in all threads, and leaves the class
+    untouched.
+
+    :param c_class_instance: :func:`c_class_instance` ``pytest`` fixture.
+    :type c_class_instance: :class:`~touketsu.tests.classes.c_class`
+    """
+    cls_dict = dict(vars(c_class))
+    other = c_class()
+    assert is_frozen(thaw(c_class_instance)) is False
+    worker = threading.Thread(target = setattr,
+                              args = (c_class_instance, "c", 0.5))
+    worker.start()
+    worker.join()
+    assert (c_class_instance.c == 0.5) and is_frozen(other)
+    with pytest.raises(AttributeError):
+        other.c = 1
+    assert freeze(c_class_instance) is c_class_instance
+    assert is_frozen(c_class_instance) and (dict(vars(c_class)) == cls_dict)
+    with pytest.raises(AttributeError):
+        c_class_instance.c = 1
+    assert not is_frozen(object())
+    with pytest.raises(TypeError):
+        thaw(object())
+
+
+def test_freeze_deep_hash():
+    "Test that freezing refreezes containers and discards the cached hash."
+    conf = thaw(deep_config())
+    conf.tags = ["a"]
+    assert freeze(conf).tags == ("a",)
+    pt = slotted_point(1, 2, 3)
+    hash(pt)
+    thaw(pt).x = 0
+    freeze(pt)
+    assert hash(pt) == hash(slotted_point(0, 2, 3))
+
+
+## inheritance tests ##
+
+def test_super_init():
+    """Test decorated subclasses calling ``super().__init__()``.
+
+    The instance is restricted, and its containers frozen, only once the
+    outermost :meth:`__init__` returns.
+    """
+    inst = tagged_node(1, tags = ["root"])
+    assert (inst.ident, inst.name) == (1, "tagged")
+    assert inst.tags == ("root", "tagged")
+    for attr in ("ident", "name", "tags"):
+        with pytest.raises(AttributeError):
+            setattr(inst, attr, None)
+    with pytest.raises(AttributeError):
+        named_node().name = "other"
+
+
+def test_no_stacked_init():
+    "Test that inherited decorated ``__init__`` methods are not rewrapped."
+    for cls in (named_node, tagged_node):
+        assert cls.__init__.__wrapped__ is orig_init(cls.__init__)
+    sub = immutable(type("sub", (named_node,), {}))
+    assert sub.__init__.__wrapped__ is orig_init(named_node.__init__)
+    again = immutable(sub)
+    assert again.__init__.__wrapped__ is orig_init(named_node.__init__)
+    assert sub().name == "node"
+
+
+def test_undecorated_subclass():
+    """Test undecorated subclasses overriding ``__init__``.
+
+    Instances are restricted once the decorated :meth:`__init__` they call
+    returns, and stay unrestricted if it is never called.
+    """
+
+    class child(node):
+        def __init__(self, ident):
+            super().__init__(ident)
+
+    class generated_child(quote):
+        def __init__(self, bid):
+            super().__init__("XNYS", bid)
+
+    class orphan(node):
+        def __init__(self, ident):
+            self.ident = ident
+
+    for inst in (child(1), generated_child(2.)):
+        with pytest.raises(AttributeError, match = "Immutable"):
+            inst.a = 99
+    inst = orphan(1)
+    inst.ident = 2
+    assert inst.ident == 2
+
+
+def test_init_shadowing_names():
+    "Test decorated ``__init__`` methods with parameters named like builtins."
+
+    @nondynamic
+    class record:
+        def __init__(self, id, *args, type = None, **kwargs):
+            self.id = id
+            self.type = type
+
+    inst = record(5, type = "a")
+    assert (inst.id, inst.type) == (5, "a")
+    with pytest.raises(AttributeError):
+        inst.other = 1
+
+
+## generated __init__ tests ##
+
+def test_generated_init():
+    "Test the ``__init__`` generated from annotations or ``fields``."
+    inst = quote("XNYS", 100.25)
+    assert (inst.venue, inst.bid, inst.ask) == ("XNYS", 100.25, None)
+    assert inst == quote(venue = "XNYS", bid = 100.25, ask = None)
+    assert str(signature(quote)) == "(venue, bid, ask=None)"
+    assert quote._touketsu_fields == ("venue", "bid", "ask")
+    assert is_frozen(inst) and not hasattr(quote, "ask")
+    with pytest.raises(AttributeError):
+        inst.bid = 1
+    rec = slotted_quote("x")
+    assert (rec.name, rec.value) == ("x", 0) and not hasattr(rec, "__dict__")
+    with pytest.raises(TypeError):
+        quote("XNYS")
+    # deeply immutable classes freeze the arguments
+    conf = class_decorator_factory("immutable", fields = ("hosts",),
+                                   deep = True, init = True)(
+        type("conf", (), {})
+    )
+    assert conf(["a"]).hosts == ("a",)
+    # fields may be named like builtins used by the generated method
+    keyed = class_decorator_factory("immutable", fields = ("id", "tags"),
+                                    deep = True, init = True)(
+        type("keyed", (), {})
+    )
+    assert vars(keyed(1, ["a"])) == {"id": 1, "tags": ("a",)}
+
+
+def test_inherited_init_fields():
+    "Test that generated ``__init__`` methods take the fields of bases first."
+
+    @immutable(init = True)
+    class level(quote):
+        size: int = 0
+        bid: float = 0.
+
+    inst = level("XNYS", ask = 1., size = 5)
+    assert str(signature(level)) == "(venue, bid=0.0, ask=None, size=0)"
+    assert vars(inst) == {"venue": "XNYS", "bid": 0., "ask": 1., "size": 5}
+    assert level("XNYS", 1., 2., 3).size == 3
+    # quote keeps its own fields and defaults
+    assert str(signature(quote)) == "(venue, bid, ask=None)"
+
+
+def test_generated_init_errors():
+    "Test that generated ``__init__`` methods need valid fields."
+    annotations = {"a": int, "b": int}
+    for attrs in ({"__init__": lambda self: None,
+                   "__annotations__": annotations},
+                  {}, {"__annotations__": annotations, "a": 0},
+                  {"__annotations__": {"a": list}, "a": []}):
+        with pytest.raises((TypeError, ValueError)):
+            immutable(init = True)(type("bad", (), attrs))
+
+
+## bulk construction tests ##
+
+def test_from_columns():
+    """Test the generated ``from_columns`` class method.
+
+    Instances are built from a list and :class:`array.array` columns and are
+    immutable. Columns that do not match the class fields raise an error.
+    """
+    insts = c_class.from_columns(a = ["a1", "a2"], b = array("d", [1., 2.]),
+                                 c = ("c1", "c2"), create_attr_called = [0, 0],
+                                 _b = [1., 1.], c_is_dirty = [False, False])
+    assert [inst.b for inst in insts] == [1., 2.]
+    assert isinstance(insts[1], c_class) and (insts[1].a == "a2")
+    with pytest.raises(AttributeError):
+        insts[0].c = "c"
+    # all fields must be present
+    with pytest.raises(ValueError):
+        c_class.from_columns(a = ["a1"])
+
+
+def test_from_records():
+    "Test the generated ``from_records`` class method on a slotted class."
+    insts = slotted_record.from_records([("x", 1)])
+    insts = insts + slotted_record.from_records(
+        [{"name": "y", "_slotted_record__value": 2}]
+    )
+    assert [(inst.name, inst.value) for inst in insts] == [("x", 1), ("y", 2)]
+    with pytest.raises(AttributeError):
+        insts[0].name = "z"
+    assert slotted_record.from_records([]) == []
+
+
+## deep immutability tests ##
+
+def test_deep_immutable():
+    """Test that :class:`deep_config` converts nested containers.
+
+    Shared containers are converted once, and the containers of nested
+    instances are converted as well.
+    """
+    shared = {"level": [1, 2]}
+    inst = deep_config(tags = ["a", {"b"}],
+                       options = {"x": shared, "y": shared},
+                       child = deep_config(tags = ["c"]))
+    assert inst.tags == ("a", frozenset({"b"}))
+    assert inst.options["x"]["level"] == (1, 2)
+    assert inst.options["x"] is inst.options["y"]
+    assert inst.child.tags == ("c",)
+    with pytest.raises(TypeError):
+        inst.options["z"] = 1
+    with pytest.raises(AttributeError):
+        inst.tags = []
+    # unchanged tuples are kept as is
+    tags = ("a", "b")
+    assert deep_config(tags = tags).tags is tags
+    # bulk construction also converts containers
+    (bulk,) = deep_config.from_records([("bulk", [1], {}, None)])
+    assert bulk.tags == (1,)
+
+
+def test_deep_immutable_shallow_child():
+    "Test that nested instances of shallow immutable classes are left alone."
+
+    @immutable
+    class shallow:
+        def __init__(self, items): self.items = items
+
+    child = shallow([1, 2])
+    inst = deep_config(child = child)
+    assert inst.child is child and child.items == [1, 2]
+    # the child's list is still its own to change
+    child.items.append(3)
+    assert inst.child.items == [1, 2, 3]
+
+
+def test_deep_immutable_subclasses():
+    "Test that tuple subclasses keep their type and other subclasses do not."
+    level = namedtuple("level", ("price", "sizes"))
+    inst = deep_config(tags = level(1., [1, 2]),
+                       options = OrderedDict(x = [1]))
+    assert (type(inst.tags), inst.tags.sizes) == (level, (1, 2))
+    assert inst.options == {"x": (1,)}
+    # copies thaw the containers without losing the namedtuple
+    assert copy.deepcopy(inst).tags == level(1., (1, 2))
+
+
+def test_deep_immutable_errors(b_class_instance):
+    """Test that :class:`deep_config` rejects cycles and nondynamic values.
+
+    :param b_class_instance: :class:`~touketsu.tests.classes.b_class` instance
+    :type b_class_instance: :class:`~touketsu.tests.classes.b_class`
+    """
+    cyclic = []
+    cyclic.append(cyclic)
+    with pytest.raises(ValueError, match = "cyclic"):
+        deep_config(tags = cyclic)
+    with pytest.raises(TypeError, match = "nondynamic"):
+        deep_config(child = b_class_instance)
+    with pytest.raises(ValueError, match = "deep"):
+        class_decorator_factory("nondynamic", deep = True)
+
+
+## equality and hashing tests ##
+
+@pytest.mark.parametrize("cls", [point, slotted_point])
+def test_eq_hash(cls):
+    """Test the generated ``__eq__`` and cached ``__hash__``.
+
+    :param cls: Class decorated with ``eq = True``
+    :type cls: type
+    """
+    a, b, c = cls(1, 2), cls(1, 2), cls(2, 1)
+    assert (a == b) and (a != c) and (a != (1, 2))
+    assert hash(a) == hash(b)
+    # hash is cached after the first call
+    assert _hashes.get(a) == hash(a)
+    assert {a: "a"}[b] == "a"
+    assert len({a, b, c}) == 2
+    # the cached hash is not an instance attribute
+    assert "_touketsu_hash" not in cls._touketsu_fields
+    assert "_touketsu_hash" not in getattr(a, "__dict__", {})
+    assert a == copy.copy(a)
+    with pytest.raises(AttributeError):
+        a._touketsu_hash = 0
+
+
+def test_eq_hash_fields():
+    """Test that all fields of slotted instances are compared.
+
+    Instances of different classes never compare equal.
+    """
+    assert not hasattr(slotted_point(), "__dict__")
+    assert slotted_point(1, 2, 3) != slotted_point(1, 2, 4)
+    assert point(1, 2) != slotted_point(1, 2)
+    with pytest.raises(ValueError, match = "eq"):
+        class_decorator_factory("nondynamic", eq = True)
+
+
+## ordering tests ##
+
+def test_order():
+    "Test generated comparisons and cached sort keys."
+    a, b, c = trade("XNYS", 2.), trade("XNAS", 3.), trade("XNYS", 1., 5)
+    assert sorted([a, b, c]) == [b, c, a]
+    assert sorted([a, b, c], key = sort_key) == [b, c, a]
+    assert (c < a) and (c <= a) and (a > b) and (a >= trade("XNYS", 2., 9))
+    # the key is cached in a slot and excluded from the instance state
+    assert (a._touketsu_sort_key == ("XNYS", 2.)) and (sort_key(a) is
+                                                       sort_key(a))
+    assert copy.copy(a).size == 0
+    with pytest.raises(TypeError):
+        a < point()
+    with pytest.raises(TypeError):
+        sort_key(point())
+    # order = True compares all fields, and the key is recomputed after thaw
+    @immutable(eq = True, order = True)
+    class pair:
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    inst = pair(1, 2)
+    assert (inst < pair(1, 3)) and (sort_key(inst) == (1, 2))
+    thaw(inst).y = 0
+    assert sort_key(freeze(inst)) == (1, 0)
+    with pytest.raises(ValueError, match = "order"):
+        class_decorator_factory("nondynamic", order = True)
+    with pytest.raises(ValueError, match = "eq"):
+        class_decorator_factory("immutable", order = True)
+
+
+def test_order_names():
+    """Test that ``order`` names are checked once the fields are known.
+
+    Slotted classes know their fields when decorated, while other classes
+    learn them from their first instance.
+    """
+    with pytest.raises(ValueError, match = "price"):
+        @immutable(eq = True, order = ("price",), slots = True)
+        class level:
+            def __init__(self, size):
+                self.size = size
+
+    @immutable(eq = True, order = ("venue", "price"))
+    class fill:
+        def __init__(self, venue):
+            self.venue = venue
+
+    a, b = fill("XNYS"), fill("XNAS")
+    with pytest.raises(ValueError, match = "price"):
+        a < b
+
+
+## interning tests ##
+
+@pytest.fixture
+def clear_currency_pair():
+    "Clears the instance cache of :class:`currency_pair` before a test."
+    intern_clear(currency_pair)
+
+
+def test_interned(clear_currency_pair):
+    """Test that :class:`currency_pair` instances with equal fields are shared.
+
+    :param clear_currency_pair: Fixture clearing the instance cache
+    :type clear_currency_pair: None
+    """
+    a = currency_pair("EUR", quote = "USD")
+    b = currency_pair(base = "EUR", quote = "USD")
+    assert (a is b) and (currency_pair("GBP", "USD") is not a)
+    # bulk construction returns interned instances as well
+    assert currency_pair.from_records([("EUR", "USD")])[0] is a
+    assert intern_info(currency_pair)[:2] == (2, 2)
+    # unhashable field values are not interned
+    assert currency_pair(["EUR"]) is not currency_pair(["EUR"])
+    with pytest.raises(AttributeError):
+        a.base = "JPY"
+
+
+def test_interned_eviction(clear_currency_pair):
+    """Test the eviction of least recently used and collected instances.
+
+    :param clear_currency_pair: Fixture clearing the instance cache
+    :type clear_currency_pair: None
+    """
+    pairs = [currency_pair("USD", quote) for quote in "ABCD"]
+    # touch the oldest entry so that "B" is evicted by "E" instead
+    currency_pair("USD", "A")
+    pairs.append(currency_pair("USD", "E"))
+    info = intern_info(currency_pair)
+    assert (info.evictions, info.maxsize, info.currsize) == (1, 4, 4)
+    assert currency_pair("USD", "A") is pairs[0]
+    assert currency_pair("USD", "B") is not pairs[1]
+    # entries of garbage collected instances are removed
+    del pairs
+    assert intern_info(currency_pair).currsize == 0
+
+
+def test_interned_keys(clear_currency_pair):
+    """Test that field types are part of the key and mutations evict entries.
+
+    :param clear_currency_pair: Fixture clearing the instance cache
+    :type clear_currency_pair: None
+    """
+    assert currency_pair(1, 1) is currency_pair(1, 1)
+    assert currency_pair(1.0, 1).base.__class__ is float
+    assert currency_pair(True, 1).base is True
+
+    @immutable(interned = True)
+    class pair:
+        def __init__(self, base, quote):
+            self.base = base
+            self.quote = quote
+
+        @urt_method
+        def flip(self):
+            self.base, self.quote = self.quote, self.base
+
+    a = pair("EUR", "USD")
+    a.flip()
+    b = pair("EUR", "USD")
+    assert (b is not a) and (b.base, b.quote) == ("EUR", "USD")
+    # thawed instances are not handed out, even before they are changed
+    thaw(b)
+    assert pair("EUR", "USD") is not b
+    with unrestricted(a):
+        assert pair("USD", "EUR") is not a
+
+
+def test_interned_classes():
+    "Test subclasses, invalid classes, and :func:`urt_class` with interning."
+    class pair_child(currency_pair):
+        pass
+
+    assert pair_child("A", "B") is not pair_child("A", "B")
+    assert pair_child("A", "B").quote == "B"
+    with pytest.raises(TypeError, match = "__new__"):
+        immutable(type("bad", (), {"__new__": object.__new__}),
+                  interned = True)
+
+    @immutable(interned = True)
+    class tag:
+        def __init__(self, name):
+            self.name = name
+
+    assert tag("a") is tag("a")
+    urt_class(tag)
+    assert tag("a") is not tag("a")
+    with pytest.raises(TypeError):
+        intern_info(tag)
+
+
+## evolve and copy tests ##
+
+def test_evolve(b_class_instance):
+    """Test :func:`evolve` on dict-based, slotted, deep, and interned classes.
+
+    :param b_class_instance: :class:`~touketsu.tests.classes.b_class` instance
+    :type b_class_instance: :class:`~touketsu.tests.classes.b_class`
+    """
+    conf = deep_config(tags = ["a"], options = {"x": 1})
+    new = evolve(conf, name = "new", tags = ["b"])
+    assert (new.name, new.tags, conf.tags) == ("new", ("b",), ("a",))
+    # unchanged values are shared
+    assert new.options is conf.options
+    with pytest.raises(AttributeError):
+        new.name = "newer"
+    rec = evolve(slotted_record("x", 1), _slotted_record__value = 2)
+    assert (rec.name, rec.value) == ("x", 2)
+    assert evolve(currency_pair("A", "B"), quote = "C") is \
+        currency_pair("A", "C")
+    # nondynamic instances can be evolved too
+    assert evolve(b_class_instance, b = 1).b == 1
+    with pytest.raises(ValueError, match = "unknown"):
+        evolve(conf, colour = "red")
+    with pytest.raises(TypeError):
+        evolve(object())
+
+
+def test_copy(b_class_instance):
+    """Test the generated ``__copy__`` and ``__deepcopy__``.
+
+    :param b_class_instance: :class:`~touketsu.tests.classes.b_class` instance
+    :type b_class_instance: :class:`~touketsu.tests.classes.b_class`
+    """
+    conf = deep_config(tags = ["a"], child = deep_config())
+    assert copy.copy(conf) is conf
+    assert copy.deepcopy(conf) is conf
+    # immutable instances may hold mutable values, which are deep copied
+    inst = point([1], [2])
+    dup = copy.deepcopy(inst)
+    assert (copy.copy(inst) is inst) and (dup is not inst)
+    assert (dup == inst) and (dup.x is not inst.x)
+    # nondynamic instances are copied
+    dup = copy.copy(b_class_instance)
+    assert (dup is not b_class_instance) and (dup.b == b_class_instance.b)
+    assert copy.copy(slotted_record("x", 1)).value == 1
+
+
+## restriction mode tests ##
+
+def test_mode_off(restore_settings):
+    """Test classes decorated with restrictions turned off.
+
+    :param restore_settings: :func:`restore_settings` ``pytest`` fixture.
+    """
+    assert configure(mode = "off").mode == "off"
+
+    @immutable(eq = True)
+    class pair:
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+        @urt_method
+        def swap(self):
+            self.a, self.b = self.b, self.a
+
+    configure(mode = "enforce")
+    # metadata and generated methods are kept, restrictions are not
+    assert (pair.__setattr__ is object.__setattr__) and \
+        (pair._touketsu_restriction == "immutable")
+    assert not hasattr(pair.__init__, "_touketsu_orig__init__")
+    assert not hasattr(pair.swap, "__wrapped__")
+    inst = pair(1, 2)
+    inst.a = 3
+    inst.swap()
+    assert (inst == pair(2, 3)) and not is_frozen(inst)
+    assert freeze(thaw(inst)) is inst
+
+
+def test_mode_sampled(restore_settings):
+    """Test that only a fraction of instances are restricted in sampled mode.
+
+    :param restore_settings: :func:`restore_settings` ``pytest`` fixture.
+    """
+    for rate in (0, 0.5, 1):
+        configure(mode = "sampled", sample_rate = rate)
+
+        @immutable
+        class box:
+            def __init__(self, value = 0): self.value = value
+
+        boxes = [box() for _ in range(200)]
+        frozen = sum(map(is_frozen, boxes))
+        assert frozen == 0 if rate == 0 else \
+            (frozen == 200 if rate == 1 else 0 < frozen < 200)
+        # unsampled instances can be written to
+        for inst in boxes:
+            if not is_frozen(inst): inst.value = 1
+        with pytest.raises(ValueError):
+            configure(mode = "bad")
+    with pytest.raises(ValueError):
+        configure(sample_rate = 2)
+    assert configure().mode == "sampled"
+
+
+def test_mode_sampled_reused_ids(restore_settings):
+    """Test that sampling is decided per instance, not per :func:`id`.
+
+    CPython reuses the ids of collected instances, so instances created and
+    discarded one at a time usually share a single id.
+
+    :param restore_settings: :func:`restore_settings` ``pytest`` fixture.
+    """
+    configure(mode = "sampled", sample_rate = 0.5)
+
+    @immutable
+    class box:
+        def __init__(self, value = 0): self.value = value
+
+    ids, frozen = set(), 0
+    for _ in range(400):
+        inst = box()
+        ids.add(id(inst))
+        frozen += is_frozen(inst)
+        # the outcome is kept for the instance's lifetime
+        assert is_frozen(inst) == is_frozen(inst)
+        del inst
+    assert len(ids) < 400 and 100 < frozen < 300
+
+
+def test_mode_env(monkeypatch):
+    """Test reading the settings from the environment.
+
+    :param monkeypatch: ``pytest`` monkeypatch fixture
+    """
+    monkeypatch.setenv("TOUKETSU_MODE", "sampled")
+    monkeypatch.setenv("TOUKETSU_SAMPLE_RATE", "0.25")
+    assert tuple(_settings_from_env()) == ("sampled", 0.25)
+    monkeypatch.setenv("TOUKETSU_MODE", "strict")
+    with pytest.raises(ValueError):
+        _settings_from_env()
+    monkeypatch.setenv("TOUKETSU_MODE", "sampled")
+    monkeypatch.setenv("TOUKETSU_SAMPLE_RATE", "1%")
+    with pytest.raises(ValueError, match = "TOUKETSU_SAMPLE_RATE"):
+        _settings_from_env()
+
+
+## change tracking tests ##
+
+@pytest.mark.parametrize("cls", [book_state, slotted_book_state])
+def test_track_changes(cls):
+    """Test recording of attributes assigned since the last checkpoint.
+
+    :param cls: Class decorated with ``track_changes``
+    :type cls: type
+    """
+    inst = cls()
+    # all attributes count as changed before the first checkpoint
+    assert checkpoint(inst) == ("bid", "ask")
+    assert changed_fields(inst) == ()
+    ref = _dirty.data.get(id(inst))
+    inst.ask = 1.
+    inst.bid = 0.
+    assert changed_fields(inst) == ("bid", "ask")
+    # writes update the table entry of unslotted instances in place
+    assert _dirty.data.get(id(inst)) is ref
+    assert checkpoint(inst) == ("bid", "ask") and (changed_fields(inst) == ())
+    # copies start untracked, and the bitset is not part of the state
+    assert changed_fields(copy.copy(inst)) == ("bid", "ask")
+    assert "_touketsu_dirty" not in getattr(inst, "__dict__", {})
+    with pytest.raises(AttributeError):
+        inst.spread = 1.
+    with pytest.raises(TypeError):
+        checkpoint(b_class())
+    with pytest.raises(ValueError, match = "track_changes"):
+        class_decorator_factory("immutable", track_changes = True)
+
+
+def test_track_new_attrs(restore_settings):
+    """Test tracking of attributes created later and with restrictions off.
+
+    :param restore_settings: :func:`restore_settings` ``pytest`` fixture.
+    """
+    inst = book_state()
+    checkpoint(inst)
+    inst.halt()
+    assert changed_fields(inst) == ("halted",)
+    configure(mode = "off")
+
+    @nondynamic(track_changes = True)
+    class counter:
+        def __init__(self): self.n = 0
+
+    inst = counter()
+    checkpoint(inst)
+    inst.n = 1
+    inst.extra = 2
+    assert changed_fields(inst) == ("n", "extra")
+    assert urt_class(counter).__setattr__ is object.__setattr__
@@ -2,6 +2,7 @@ __doc__ = "Tests ``touketsu`` features with metaclasses and inheritance."
 
 import pytest
 
+from ..core import immutable, nondynamic, orig_init
 from .classes import abc_child_a, abc_child_b
 from .test_core import global_random_state
 
@@ -90,4 +91,30 @@ def test_b_random_touch(abc_child_b_instance, global_random_state):
     # default value is string, check if numeric == check if a is dirty
     assert isinstance(abc_child_b_instance.a, (int, float))
     # attribute created after the method call
-    assert hasattr(abc_child_b_instance, "b")
\ No newline at end of file
+    assert hasattr(abc_child_b_instance, "b")
+
+## decorated subclass tests ##
+
+def test_nondynamic_child_of_immutable():
+    """Test a nondynamic subclass of an immutable class.
+
+    The subclass's restriction replaces the superclass restriction instead of
+    being checked on top of it, so existing attributes can be modified.
+    """
+    @immutable
+    class parent:
+        def __init__(self, a = "a"): self.a = a
+
+    @nondynamic
+    class child(parent):
+        def __init__(self, a = "a", b = "b"):
+            orig_init(parent.__init__)(self, a = a)
+            self.b = b
+
+    inst = child()
+    inst.a = "aa"
+    assert inst.a == "aa"
+    with pytest.raises(AttributeError):
+        inst.c = "c"
+    # original __setattr__ is the undecorated one, not the parent's
+    assert child.__setattr__._touketsu_orig__setattr__ is object.__setattr__
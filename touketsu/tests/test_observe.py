@@ -0,0 +1,195 @@
+__doc__ = "Tests change notifications of ``touketsu`` instances."
+
+import asyncio
+import gc
+import threading
+
+import pytest
+
+from ..core import (class_decorator_factory, configure, nondynamic,
+                    unrestricted, urt_class, urt_method)
+from ..observe import _instance_subs, batch, change, subscribe
+from .classes import b_class
+
+## -- Non-test functions -------------------------------------------------------
+
+@nondynamic(observable = True, slots = True)
+class quote_state:
+    """Slotted observable class.
+
+    :param bid: Parameter ``bid``
+    :param ask: Parameter ``ask``
+    """
+    def __init__(self, bid = 0., ask = 0.):
+        self.bid = bid
+        self.ask = ask
+
+    @urt_method
+    def update(self, bid, ask):
+        "Assign ``bid`` twice and ``ask`` once, and return ``self``."
+        self.bid = 0.
+        self.bid = bid
+        self.ask = ask
+        return self
+
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def restore_settings():
+    "Restore the :func:`~touketsu.core.configure` settings after a test."
+    settings = configure()
+    yield
+    configure(*settings)
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_subscribe_class():
+    "Test coalesced notifications of all instances of a class."
+    events = []
+    with subscribe(quote_state, events.append) as sub:
+        # writes in __init__ are not changes
+        a, b = quote_state(), quote_state()
+        assert events == []
+        a.bid = 1.
+        assert events == [change(a, ("bid",))]
+        a.update(2., 3.)
+        with unrestricted(b):
+            b.ask = 1.
+            b.ask = 2.
+        assert events[1:] == [change(a, ("bid", "ask")), change(b, ("ask",))]
+        with batch():
+            a.ask = 4.
+            b.update(1., 1.)
+            c = quote_state()
+            c.bid = 5.
+            a.bid = 4.
+            assert len(events) == 3
+        assert events[3:] == [change(a, ("ask", "bid")),
+                              change(b, ("bid", "ask")), change(c, ("bid",))]
+    assert not sub.active
+    a.bid = 0.
+    assert len(events) == 6
+
+
+def test_subscribe_instance():
+    "Test notifications of one instance delivered to an asyncio queue."
+    a, b = quote_state(), quote_state()
+
+    async def consume():
+        queue = asyncio.Queue()
+        subscribe(a, queue = queue)
+        b.bid = 1.
+        a.update(1., 2.)
+        # writes in another thread are put into the queue from the loop
+        thread = threading.Thread(target = setattr, args = (a, "ask", 3.))
+        thread.start()
+        thread.join()
+        return [await queue.get(), await queue.get()]
+
+    assert asyncio.run(consume()) == [change(a, ("bid", "ask")),
+                                      change(a, ("ask",))]
+    # subscriptions of an instance are dropped when it dies
+    key = id(a)
+    del a
+    gc.collect()
+    assert key not in _instance_subs
+
+
+def test_inherited_urt_method():
+    "Test coalescing of urt_method methods inherited from a base class."
+
+    class base:
+        def __init__(self): self.n = 0
+
+        @urt_method
+        def bump(self):
+            self.n = self.n + 1
+            self.m = self.n
+
+    cls = nondynamic(observable = True)(type("counter", (base,), {}))
+    events = []
+    with subscribe(cls, events.append):
+        inst = cls()
+        inst.bump()
+    assert events == [change(inst, ("n", "m"))]
+    assert "bump" not in urt_class(cls).__dict__
+
+
+def test_async_and_generator_urt_methods():
+    """Test coalescing of coroutine, generator, and async generator methods.
+
+    Coroutines deliver their writes when they return, generators each time they
+    yield.
+    """
+    @nondynamic(observable = True)
+    class feed:
+        def __init__(self): self.bid, self.ask = 0., 0.
+
+        @urt_method
+        async def refresh(self):
+            self.bid = 1.
+            await asyncio.sleep(0)
+            self.ask = 2.
+
+        @urt_method
+        def ticks(self):
+            for i in range(2):
+                self.bid = self.ask = float(i)
+                yield i
+
+        @urt_method
+        async def aticks(self):
+            for i in range(2):
+                self.ask = float(i)
+                await asyncio.sleep(0)
+                self.bid = float(i)
+                yield i
+
+    async def consume(inst):
+        return [i async for i in inst.aticks()]
+
+    events = []
+    with subscribe(feed, events.append):
+        inst = feed()
+        asyncio.run(inst.refresh())
+        assert events == [change(inst, ("bid", "ask"))]
+        del events[:]
+        # each step is delivered before the consumer gets the yielded value
+        assert [(i, len(events)) for i in inst.ticks()] == [(0, 1), (1, 2)]
+        assert asyncio.run(consume(inst)) == [0, 1]
+    assert events == [change(inst, ("bid", "ask"))] * 2 + \
+        [change(inst, ("ask", "bid"))] * 2
+
+
+def test_observe_off(restore_settings):
+    """Test notifications of a class decorated with restrictions off.
+
+    :param restore_settings: :func:`restore_settings` ``pytest`` fixture.
+    """
+    configure(mode = "off")
+
+    @nondynamic(observable = True)
+    class counter:
+        def __init__(self): self.n = 0
+
+    events = []
+    with subscribe(counter, events.append):
+        inst = counter()
+        inst.n = 1
+        inst.extra = 2
+    assert events == [change(inst, ("n",)), change(inst, ("extra",))]
+    cls = urt_class(counter)
+    assert (cls.__setattr__ is object.__setattr__) and \
+        not hasattr(cls.__init__, "__wrapped__")
+
+
+def test_observe_errors():
+    "Test that only observable classes can be subscribed to."
+    with pytest.raises(TypeError):
+        subscribe(b_class(), print)
+    with pytest.raises(ValueError):
+        subscribe(quote_state, print, asyncio.Queue())
+    with pytest.raises(ValueError, match = "observable"):
+        class_decorator_factory("immutable", observable = True)
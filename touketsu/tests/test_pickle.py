@@ -0,0 +1,97 @@
+__doc__ = "Tests pickling and copying of ``touketsu`` decorated classes."
+
+import copy
+import pickle
+import pytest
+
+from ..core import _PICKLE_BUFFER_MIN_SIZE as _min_size
+from .classes import (b_class, blob_record, currency_pair, deep_config, point,
+                      slotted_child, slotted_record)
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def blob_record_instance():
+    """Return :class:`~touketsu.tests.classes.blob_record` with large buffers.
+
+    ``data`` is a 2D memoryview of a :class:`bytes` object and ``extra`` a
+    :class:`bytearray`, both large enough to be pickled out-of-band.
+    """
+    rows = _min_size // 256
+    data = memoryview(bytes(range(256)) * 2 * rows).cast("B", (2 * rows, 256))
+    return blob_record("blob", data, bytearray(_min_size))
+
+
+## -- Tests --------------------------------------------------------------------
+
+@pytest.mark.parametrize("protocol", range(2, pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_roundtrip(protocol):
+    """Test pickling of dict-based, slotted, deep, and interned instances.
+
+    :param protocol: Pickle protocol
+    :type protocol: int
+    """
+    rec = pickle.loads(pickle.dumps(slotted_record("x", 2), protocol))
+    assert (rec.name, rec.value) == ("x", 2)
+    with pytest.raises(AttributeError):
+        rec.name = "y"
+    child = pickle.loads(pickle.dumps(slotted_child("c", 1, "t"), protocol))
+    assert (child.describe(), child.tag) == ("c: 1", "t")
+    inst = pickle.loads(pickle.dumps(b_class(1.), protocol))
+    assert (inst.b == 1.) and isinstance(inst, b_class)
+    with pytest.raises(AttributeError):
+        inst.new_attr = 1
+    conf = deep_config(tags = ["a"], options = {"x": {"y": [1]}},
+                       child = deep_config())
+    conf = pickle.loads(pickle.dumps(conf, protocol))
+    assert (conf.options["x"]["y"] == (1,)) and (conf.child.tags == ())
+    with pytest.raises(TypeError):
+        conf.options["z"] = 1
+    pair = currency_pair("EUR", "USD")
+    assert pickle.loads(pickle.dumps(pair, protocol)) is pair
+
+
+def test_pickle_fields():
+    """Test that field names are pickled once and cached hashes not at all.
+
+    Many instances of a class should cost little more than their values.
+    """
+    pts = [point(i, i) for i in range(100)]
+    hash(pts[0])
+    data = pickle.dumps(pts)
+    assert data.count(b"_touketsu_hash") == 0
+    assert data.count(b"x") == 1
+    assert pickle.loads(data) == pts
+
+
+def test_pickle_buffers(blob_record_instance):
+    """Test out-of-band pickling of buffers with protocol 5.
+
+    :param blob_record_instance: :func:`blob_record_instance` ``pytest``
+        fixture.
+    :type blob_record_instance: :class:`~touketsu.tests.classes.blob_record`
+    """
+    buffers = []
+    data = pickle.dumps(blob_record_instance, 5,
+                        buffer_callback = buffers.append)
+    assert (len(buffers) == 2) and (len(data) < _min_size)
+    inst = pickle.loads(data, buffers = buffers)
+    assert isinstance(inst.data, memoryview)
+    assert inst.data.shape == blob_record_instance.data.shape
+    assert inst.data.tobytes() == blob_record_instance.data.tobytes()
+    assert isinstance(inst.extra, bytearray)
+    assert inst.extra == bytearray(_min_size)
+    # memoryviews are converted to bytes in band
+    inst = pickle.loads(pickle.dumps(blob_record_instance, 4))
+    assert inst.data.tolist() == blob_record_instance.data.tolist()
+    # small values are pickled as usual
+    assert pickle.loads(pickle.dumps(blob_record("a", b"ab"), 5)).data == b"ab"
+
+
+def test_copy_slotted():
+    "Test copying of slotted instances, which bypasses the restriction."
+    rec = slotted_child("c", 1, ["t"])
+    dup = copy.deepcopy(rec)
+    assert (dup.tag == ["t"]) and (dup.tag is not rec.tag)
+    with pytest.raises(AttributeError):
+        dup.undeclared = 1
@@ -0,0 +1,87 @@
+__doc__ = "Tests shared memory publication of ``touketsu`` instances."
+
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import pickle
+import pytest
+
+from ..core import evolve
+from ..shared import attach, share
+from .classes import b_class, deep_config, point, slotted_record
+
+## -- Non-test functions -------------------------------------------------------
+
+def _sum_x(block):
+    """Return the sum of ``x`` over the :class:`point` views in ``block``.
+
+    Run in a worker process.
+
+    :param block: Handle of a block holding :class:`point` instances
+    :type block: :class:`~touketsu.shared.shared_block`
+    :rtype: int
+    """
+    return sum(pt.x for pt in attach(block))
+
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def shared_points():
+    "Return handle of a block of :class:`point` instances, unlinked after use."
+    with share([point(i, float(i)) for i in range(10)]) as block:
+        yield block
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_attach(shared_points):
+    """Test views of shared :class:`point` instances.
+
+    :param shared_points: :func:`shared_points` ``pytest`` fixture.
+    :type shared_points: :class:`~touketsu.shared.shared_block`
+    """
+    pts = attach(shared_points)
+    assert (len(pts) == 10) and isinstance(pts[-1], point)
+    assert [(pt.x, pt.y) for pt in pts[2:4]] == [(2, 2.), (3, 3.)]
+    assert (pts[1] == attach(shared_points.name)[1]) and (pts[1] != pts[2])
+    with pytest.raises(AttributeError):
+        pts[0].x = 1
+    # views become ordinary instances when pickled, copied, or evolved
+    for new in (pickle.loads(pickle.dumps(pts[5])), copy.deepcopy(pts[5]),
+                evolve(pts[5], y = 0.)):
+        assert (type(new) is point) and (new.x == 5)
+    with pytest.raises(IndexError):
+        pts[10]
+
+
+def test_attach_kinds():
+    "Test single instances and values stored in the heap or pickled."
+    with share(slotted_record("record", 2 ** 70)) as block:
+        rec = attach(pickle.loads(pickle.dumps(block)))
+        assert (rec.name, rec.value) == ("record", 2 ** 70)
+    confs = [deep_config(tags = ["a"], options = {"x": [1]}), deep_config()]
+    with share(confs) as block:
+        conf = attach(block)[0]
+        assert (conf.tags, conf.options["x"]) == (("a",), (1,))
+        with pytest.raises(TypeError):
+            conf.options["y"] = 1
+
+
+def test_share_errors():
+    "Test that only homogeneous immutable instances can be shared."
+    with pytest.raises(TypeError):
+        share(b_class())
+    with pytest.raises(TypeError):
+        share([point(), slotted_record()])
+    with pytest.raises(ValueError):
+        share([])
+
+
+def test_attach_process(shared_points):
+    """Test attaching to a block from worker processes.
+
+    :param shared_points: :func:`shared_points` ``pytest`` fixture.
+    :type shared_points: :class:`~touketsu.shared.shared_block`
+    """
+    with ProcessPoolExecutor(2) as pool:
+        assert list(pool.map(_sum_x, [shared_points] * 2)) == [45, 45]
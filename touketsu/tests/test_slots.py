@@ -0,0 +1,129 @@
+__doc__ = "Tests ``touketsu`` decorated classes that use ``__slots__``."
+
+import pytest
+
+from ..core import immutable, nondynamic, urt_class, urt_method
+from .classes import slotted_child, slotted_record
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def slotted_record_instance():
+    "Return default :class:`~touketsu.tests.classes.slotted_record` instance."
+    return slotted_record()
+
+
+@pytest.fixture
+def slotted_child_instance():
+    "Return default :class:`~touketsu.tests.classes.slotted_child` instance."
+    return slotted_child()
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_slotted_layout(slotted_record_instance, slotted_child_instance):
+    """Test that slotted instances have no ``__dict__`` and correct fields.
+
+    :param slotted_record_instance: :func:`slotted_record_instance` ``pytest``
+        fixture.
+    :type slotted_record_instance:
+        :class:`~touketsu.tests.classes.slotted_record`
+    :param slotted_child_instance: :func:`slotted_child_instance` ``pytest``
+        fixture.
+    :type slotted_child_instance: :class:`~touketsu.tests.classes.slotted_child`
+    """
+    for inst in (slotted_record_instance, slotted_child_instance):
+        assert not hasattr(inst, "__dict__")
+    # private names are mangled, property value is not a slot
+    assert slotted_record._touketsu_fields == ("name", "_slotted_record__value")
+    assert slotted_child._touketsu_fields == \
+        ("name", "_slotted_record__value", "tag")
+
+
+def test_slotted_immutable(slotted_record_instance):
+    """Test immutability and :func:`~touketsu.core.urt_method` with slots.
+
+    :param slotted_record_instance: :func:`slotted_record_instance` ``pytest``
+        fixture.
+    :type slotted_record_instance:
+        :class:`~touketsu.tests.classes.slotted_record`
+    """
+    with pytest.raises(AttributeError):
+        slotted_record_instance.name = "new"
+    slotted_record_instance.bump(inc = 2)
+    assert slotted_record_instance.value == 2
+
+
+def test_slotted_nondynamic(slotted_child_instance):
+    """Test nondynamic subclass using :func:`~touketsu.core.orig_init`.
+
+    :param slotted_child_instance: :func:`slotted_child_instance` ``pytest``
+        fixture.
+    :type slotted_child_instance: :class:`~touketsu.tests.classes.slotted_child`
+    """
+    slotted_child_instance.tag = "tag"
+    assert slotted_child_instance.tag == "tag"
+    with pytest.raises(AttributeError):
+        slotted_child_instance.other = "other"
+    # zero-argument super refers to the slotted copy of the class
+    assert slotted_child_instance.describe() == "child: 1"
+
+
+def test_slotted_urt_class():
+    "Test that :func:`~touketsu.core.urt_class` works on a slotted class."
+    @immutable(slots = True)
+    class point:
+        def __init__(self, x = 0): self.x = x
+
+    urt_class(point)
+    # generated methods are removed as well
+    assert not hasattr(point, "from_records")
+    pt = point()
+    pt.x = 1
+    assert pt.x == 1
+
+
+def test_slotted_inferred():
+    """Test slots of classes without their own ``__init__`` and of names set
+    with :func:`setattr`."""
+    # object.__init__ is wrapped, with a warning
+    with pytest.warns(UserWarning):
+        @immutable(slots = True, fields = ("x",))
+        class bare:
+            pass
+
+    assert bare._touketsu_fields == ("x",)
+
+    @nondynamic(slots = True)
+    class named:
+        def __init__(self):
+            setattr(self, "label", "a")
+
+    assert named._touketsu_fields == ("label",) and named().label == "a"
+
+
+def test_slotted_super_urt_method():
+    "Test zero-argument ``super()`` in a slotted :func:`urt_method` method."
+    class base:
+        def go(self): return "base"
+
+    @immutable(slots = True)
+    class child(base):
+        def __init__(self): self.n = 0
+
+        @urt_method
+        def go(self):
+            self.n = self.n + 1
+            return super().go()
+
+    inst = child()
+    assert (inst.go(), inst.n) == ("base", 1)
+
+
+def test_slotted_conflict():
+    "Test that slots conflicting with class attributes raise ValueError."
+    with pytest.raises(ValueError):
+        @nondynamic(slots = True)
+        class point:
+            x = 0
+            def __init__(self, x = 0): self.x = x
@@ -0,0 +1,63 @@
+__doc__ = "Tests memory-mapped files of ``touketsu`` instances."
+
+import copy
+import pickle
+import pytest
+
+from ..core import evolve
+from ..store import dump, load
+from .classes import b_class, deep_config, point, slotted_record
+
+## -- Tests --------------------------------------------------------------------
+
+def test_load(tmp_path):
+    """Test views of :class:`point` instances loaded from a file.
+
+    :param tmp_path: ``pytest`` temporary directory fixture
+    :type tmp_path: :class:`pathlib.Path`
+    """
+    path = tmp_path / "points.tks"
+    dump([point(i, float(i)) for i in range(10)], path)
+    pts = load(path)
+    assert (len(pts) == 10) and isinstance(pts[-1], point)
+    assert [(pt.x, pt.y) for pt in pts[2:4]] == [(2, 2.), (3, 3.)]
+    assert (pts[1] == load(str(path))[1]) and (pts[1] != pts[2])
+    with pytest.raises(AttributeError):
+        pts[0].x = 1
+    for new in (pickle.loads(pickle.dumps(pts[5])), copy.deepcopy(pts[5]),
+                evolve(pts[5], y = 0.)):
+        assert (type(new) is point) and (new.x == 5)
+    # replacing the file leaves existing views intact
+    dump([point(-1, -1.)], path)
+    assert (pts[9].x == 9) and (load(path)[0].x == -1)
+
+
+def test_load_kinds(tmp_path):
+    """Test single instances and values stored in the heap or pickled.
+
+    :param tmp_path: ``pytest`` temporary directory fixture
+    :type tmp_path: :class:`pathlib.Path`
+    """
+    dump(slotted_record("record", 2 ** 70), tmp_path / "record.tks")
+    rec = load(tmp_path / "record.tks")
+    assert (rec.name, rec.value) == ("record", 2 ** 70)
+    dump([deep_config(tags = ["a"], options = {"x": [1]})],
+         tmp_path / "config.tks")
+    conf = load(tmp_path / "config.tks")[0]
+    assert (conf.tags, conf.options["x"]) == (("a",), (1,))
+    with pytest.raises(TypeError):
+        conf.options["y"] = 1
+
+
+def test_store_errors(tmp_path):
+    """Test that only immutable instances are written and loaded.
+
+    :param tmp_path: ``pytest`` temporary directory fixture
+    :type tmp_path: :class:`pathlib.Path`
+    """
+    with pytest.raises(TypeError):
+        dump(b_class(), tmp_path / "b.tks")
+    assert not list(tmp_path.iterdir())
+    (tmp_path / "bad.tks").write_bytes(b"not a store")
+    with pytest.raises(ValueError):
+        load(tmp_path / "bad.tks")
@@ -0,0 +1,108 @@
+__doc__ = "Tests columnar storage of ``touketsu`` instances."
+
+from array import array
+import copy
+import pickle
+import pytest
+
+from ..core import evolve
+from ..table import frozen_table
+from .classes import (b_class, blob_record, deep_config, point,
+                      slotted_record)
+
+## -- Fixtures -----------------------------------------------------------------
+
+@pytest.fixture
+def point_table():
+    "Return a :class:`~touketsu.table.frozen_table` of :class:`point` records."
+    return frozen_table.from_instances([point(i, i / 2) for i in range(10)])
+
+
+## -- Tests --------------------------------------------------------------------
+
+def test_table_views(point_table):
+    """Test row views of a table of :class:`point` records.
+
+    :param point_table: :func:`point_table` ``pytest`` fixture.
+    :type point_table: :class:`~touketsu.table.frozen_table`
+    """
+    assert (len(point_table) == 10) and (point_table.names == ("x", "y"))
+    assert isinstance(point_table[-1], point) and (point_table[-1].x == 9)
+    assert [pt.y for pt in point_table[2:4]] == [1., 1.5]
+    assert (point_table[1] == point_table[1]) and \
+        (point_table[1] != point_table[2])
+    with pytest.raises(AttributeError):
+        point_table[0].x = 1
+    with pytest.raises(IndexError):
+        point_table[10]
+    # views become ordinary instances when pickled, copied, or evolved
+    for new in (pickle.loads(pickle.dumps(point_table[5])),
+                copy.deepcopy(point_table[5]), evolve(point_table[5], y = 0.)):
+        assert (type(new) is point) and (new.x == 5)
+    assert point_table.to_instances() == [point(i, i / 2) for i in range(10)]
+
+
+def test_table_columns(point_table):
+    """Test column storage, filtering, and taking rows.
+
+    :param point_table: :func:`point_table` ``pytest`` fixture.
+    :type point_table: :class:`~touketsu.table.frozen_table`
+    """
+    xs = point_table.column("x")
+    assert (xs.format == "q") and xs.readonly and \
+        (xs.tolist() == list(range(10)))
+    assert point_table.column("y").format == "d"
+    odd = point_table.filter(x % 2 for x in xs)
+    assert [pt.x for pt in odd] == [1, 3, 5, 7, 9]
+    assert [pt.x for pt in odd.take([4, 0])] == [9, 1]
+    pts = frozen_table.from_records(point, [(1, 2.), (3, 4.)])
+    assert (pts[1].x, pts[1].y) == (3, 4.)
+    # mixed values are stored in a tuple, deeply frozen for deep classes
+    blobs = frozen_table.from_columns(blob_record, name = ["a", "b"],
+                                      data = [b"", b"x"], extra = [1, None])
+    assert blobs.column("extra") == (1, None)
+    confs = frozen_table.from_columns(deep_config, name = ["a"],
+                                      tags = [["x"]], options = [{}],
+                                      child = [None])
+    assert confs[0].tags == ("x",)
+    with pytest.raises(TypeError):
+        confs[0].options["y"] = 1
+    # array.array columns are copied
+    values = array("q", [1, 2])
+    pts = frozen_table.from_columns(point, x = values, y = (0., 0.))
+    values[0] = 0
+    assert pts[0].x == 1
+
+
+def test_table_errors():
+    "Test that tables hold complete columns of immutable classes."
+    with pytest.raises(TypeError):
+        frozen_table.from_columns(b_class, b = [1])
+    with pytest.raises(ValueError):
+        frozen_table.from_columns(point, x = [1], y = [])
+    with pytest.raises(ValueError):
+        frozen_table.from_instances([])
+    with pytest.raises(TypeError):
+        frozen_table.from_instances([point(), slotted_record()])
+
+
+def test_table_numpy(point_table):
+    """Test conversion to and from NumPy structured arrays.
+
+    :param point_table: :func:`point_table` ``pytest`` fixture.
+    :type point_table: :class:`~touketsu.table.frozen_table`
+    """
+    np = pytest.importorskip("numpy")
+    arr = point_table.to_numpy()
+    assert arr.dtype.names == ("x", "y") and (arr["x"].sum() == 45)
+    table = frozen_table.from_numpy(point, arr)
+    assert not table.column("x").flags.writeable
+    cheap = table.filter(table.column("y") < 2)
+    assert (len(cheap) == 4) and (cheap[3].x == 3)
+    assert isinstance(point_table.filter(np.arange(10) > 7)[0], point)
+    # writeable input is copied, read-only input owning its data is not
+    arr["x"][0] = 99
+    assert (table[0].x == 0) and (type(table[0].x) is int)
+    arr.flags.writeable = False
+    assert np.shares_memory(frozen_table.from_numpy(point, arr).column("x"),
+                            arr)
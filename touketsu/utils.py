@@ -1,6 +1,8 @@
 __doc__ = "Various utilities for the ``touketsu`` package."
 
-from textwrap import fill
+import ast
+import inspect
+from textwrap import dedent, fill
 
 # left and right formatting strings for identifier appended by _docmod_class to
 # a docstring when docmod is "brief" or "fancy" (_RFMT should end with " ")
@@ -44,4 +46,122 @@ def classdocmod(obj, class_type, docmod = None):
         obj.__doc__ = _LFMT + class_type.title() + _RFMT + odoc
         return None
     raise ValueError(f"{classdocmod.__name__}: docmod must be \"brief\", or "
-                     f"\"identity\"")
\ No newline at end of file
+                     f"\"identity\"")
+
+
+def _literal_str(node):
+    """Return the value of an :mod:`ast` string literal node, else ``None``.
+
+    Python 3.7 parses string literals as ``ast.Str`` nodes, while later versions
+    parse them as :class:`ast.Constant` nodes.
+
+    :param node: Expression node
+    :type node: :class:`ast.AST`
+    :rtype: str
+    """
+    if isinstance(node, ast.Constant): value = node.value
+    # ast.Str is deprecated, so it is matched by name
+    elif node.__class__.__name__ == "Str": value = node.s
+    else: return None
+    return value if isinstance(value, str) else None
+
+
+def init_attr_names(init):
+    """Infers the instance attribute names assigned by an :meth:`__init__`.
+
+    Parses the source of ``init`` and collects, in order of first appearance,
+    the names ``name`` in assignments of the form ``self.name = ...``, including
+    augmented, annotated, and tuple assignments, as well as calls of the form
+    ``setattr(self, "name", ...)`` with a literal name. ``self`` is whatever the
+    first parameter of ``init`` is named.
+
+    :param init: The unbound :meth:`__init__` to inspect.
+    :type init: function
+    :returns: Tuple of instance attribute names.
+    :rtype: tuple
+    :raises TypeError: If the source of ``init`` cannot be retrieved.
+    """
+    _fn = init_attr_names.__name__
+    try: source = dedent(inspect.getsource(init))
+    except (OSError, TypeError):
+        raise TypeError(f"{_fn}: unable to retrieve source of {init!r}")
+    tree = ast.parse(source)
+    # first function definition is init itself; get name of its self parameter
+    func = next(node for node in ast.walk(tree)
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    if not func.args.args: return ()
+    self_name = func.args.args[0].arg
+    # dict used as an ordered set
+    names = {}
+    for node in ast.walk(func):
+        # self.name in a store context, i.e. any kind of assignment target
+        if isinstance(node, ast.Attribute) and \
+            isinstance(node.ctx, ast.Store) and \
+            isinstance(node.value, ast.Name) and (node.value.id == self_name):
+            names[node.attr] = None
+        # setattr(self, "name", value) with a literal name
+        elif isinstance(node, ast.Call) and \
+            isinstance(node.func, ast.Name) and \
+            (node.func.id == "setattr") and \
+            (len(node.args) == 3) and isinstance(node.args[0], ast.Name) and \
+            (node.args[0].id == self_name) and \
+            isinstance(_literal_str(node.args[1]), str):
+            names[_literal_str(node.args[1])] = None
+    return tuple(names)
+
+
+def slotted_copy(cls, slots):
+    """Returns a copy of a class that stores instance attributes in slots.
+
+    The copy has the same name, bases, metaclass, and namespace as ``cls``,
+    except that ``__slots__`` is set to ``slots``, so instances of the copy do
+    not carry a ``__dict__`` unless a base class provides one. A
+    ``__weakref__`` slot is added if no base class provides one so instances
+    stay weak referenceable. Methods that use zero-argument :func:`super` are
+    updated to refer to the copy.
+
+    :param cls: The class to copy.
+    :type cls: type
+    :param slots: Names of the instance attributes to store in slots.
+    :type slots: tuple
+    :returns: Slotted copy of ``cls``.
+    :rtype: type
+    :raises ValueError: If a slot name is also the name of a class attribute.
+    """
+    _fn = slotted_copy.__name__
+    cls_dict = dict(cls.__dict__)
+    # class attributes, e.g. default values, would shadow the slot descriptors
+    conflicts = [name for name in slots if name in cls_dict]
+    if conflicts:
+        raise ValueError(f"{_fn}: slot names {conflicts} conflict with class "
+                         f"attributes of {cls.__name__}")
+    slots = tuple(slots)
+    if not any(base.__weakrefoffset__ for base in cls.__bases__):
+        slots = slots + ("__weakref__",)
+    cls_dict["__slots__"] = slots
+    # descriptors for the old class's __dict__ and __weakref__ must go
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    # point __class__ cells of methods using zero-argument super to new_cls.
+    # decorated methods, e.g. by urt_method, are followed through __wrapped__
+    for member in cls_dict.values():
+        if isinstance(member, (classmethod, staticmethod)):
+            funcs = [member.__func__]
+        elif isinstance(member, property):
+            funcs = [member.fget, member.fset, member.fdel]
+        else: funcs = [member]
+        seen = set()
+        while funcs:
+            func = funcs.pop()
+            if (func is None) or (id(func) in seen): continue
+            seen.add(id(func))
+            wrapped = getattr(func, "__wrapped__", None)
+            if wrapped is not None: funcs.append(wrapped)
+            code = getattr(func, "__code__", None)
+            if (code is None) or ("__class__" not in code.co_freevars):
+                continue
+            cell = func.__closure__[code.co_freevars.index("__class__")]
+            if cell.cell_contents is cls: cell.cell_contents = new_cls
+    return new_cls
\ No newline at end of file